@@ -1,13 +1,27 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from werkzeug.exceptions import RequestEntityTooLarge
 from dbHelper import DBHelper 
+from database import HEARTBEAT_TIMEOUT
+from chartHelper import process_temperature_data, process_production_data, empty_chart_data, pivot_series
+from wireFormat import JSON, negotiate, encode_payload
+from subscriptions import ALL, group_by_machine, parse_scope, rows_for, scope_machine_ids
 from datetime import datetime, timedelta 
-import threading
+from decimal import Decimal
 import time
 import json
+import os
+import threading
+from metrics import REGISTRY, counter, gauge, histogram
+from profiler import SamplingProfiler
+from log import RunSummary, get_logger
+from events import Debouncer, subscribe
+from ingest import MAX_REQUEST_BYTES, InvalidReadings, ReadingWriter, parse_readings
 
 app = Flask(__name__)
+# Caps every request body, including chunked ones that send no Content-Length
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
 CORS(app, origins=["http://localhost:3000", "https://intellifactory.netlify.app"], 
      methods=["GET", "POST"], 
      allow_headers=["Content-Type"])
@@ -21,9 +35,28 @@ socketio = SocketIO(app,
 # socketio = SocketIO(app, cors_allowed_origins=["http://localhost:3000"], async_mode='eventlet')
 
 db = DBHelper()
+log = get_logger(__name__)
+
+# Hourly rollup buckets span days, so their chart labels include the date
+ROLLUP_LABEL_FORMAT = '%m-%d %H:%M'
 
 # Store connected clients
 connected_clients = set()
+# Set while any client is connected; the broadcaster sleeps on it otherwise
+clients_present = threading.Event()
+
+HTTP_REQUEST_SECONDS = histogram('http_request_seconds', 'Time to handle a Flask request, by route.', ['route', 'method'])
+HTTP_REQUESTS = counter('http_requests_total', 'Flask requests by route, method and status.', ['route', 'method', 'status'])
+BROADCAST_PHASE_SECONDS = histogram('broadcaster_phase_seconds',
+                                    'Time spent per broadcaster phase (query, pivot, serialize, emit).', ['phase'])
+BROADCAST_CYCLE_SECONDS = histogram('broadcaster_cycle_seconds', 'Time for one broadcaster cycle that sent updates.')
+BROADCAST_CYCLES = counter('broadcaster_cycles_total', 'Broadcaster cycles by result (sent, idle, error).', ['result'])
+gauge('socketio_connected_clients', 'Connected Socket.IO clients.', function=lambda: len(connected_clients))
+
+# Opt-in sampling profiler, toggled through /api/debug/profiler or SAMPLING_PROFILER=1
+profiler = SamplingProfiler()
+if os.environ.get('SAMPLING_PROFILER') == '1':
+    profiler.start()
 
 def serialize_datetime_objects(obj):
     """Recursively convert datetime objects to ISO format strings"""
@@ -38,245 +71,503 @@ def serialize_datetime_objects(obj):
     else:
         return obj
 
-# Helper functions defined FIRST
-def process_temperature_data(readings):
-    if not readings:
-        return empty_chart_data("Temperature")
-    
-    # Group data by machine and time
-    machines = {r['machine_id'] for r in readings}
-    time_points = sorted({r['timestamp'].strftime('%H:%M') for r in readings})
-    
-    datasets = []
-    colors = [
-        ("rgba(255, 99, 132, 1)", "rgba(255, 99, 132, 0.2)"),
-        ("rgba(54, 162, 235, 1)", "rgba(54, 162, 235, 0.2)")
-    ]
+# Socket.IO rooms are named 'liveupdate:<mode>:<format>:<scope>'. Clients that
+# connect with ?mode=delta get small 'liveupdate.delta' events, everyone else
+# receives full snapshots; ?format=columnar or ?encoding=msgpack pick a compact
+# payload. ?machines=M1,M2 or ?line=<location> (or a 'subscribe' event) narrow
+# the scope to the machines a screen actually shows.
+live_clients = {}  # sid -> (mode, format, scope)
+
+def live_room(mode, fmt, scope=ALL):
+    return f'liveupdate:{mode}:{fmt}:{scope}'
+
+def machines_in(scope):
+    """Resolve a subscription scope to machine IDs (None for every machine)."""
+    return scope_machine_ids(scope, db.get_machine_lines() if scope.startswith('line=') else {})
+
+FETCH_LIMIT = 1000  # most rows per table one broadcast picks up
+
+# High-water marks of the rows already broadcast
+live_marks = {'anomaly_id': None, 'reading_id': None, 'seq': 0}
+
+def build_snapshot(machine_ids=None):
+    """Build the full live-update payload from the latest data, for ``machine_ids`` or every machine."""
+    with BROADCAST_PHASE_SECONDS.time(phase='query'):
+        anomalies = db.get_anomalies(limit=10, machine_ids=machine_ids)
+        readings = db.get_machine_readings(hours=1, machine_ids=machine_ids)
+        machines = db.get_machines() if machine_ids is None else machine_ids
     
-    for i, machine_id in enumerate(machines):
-        color = colors[i % len(colors)]
-        data = [
-            next((r['temperature'] for r in readings 
-                 if r['machine_id'] == machine_id 
-                 and r['timestamp'].strftime('%H:%M') == time), None)
-            for time in time_points
-        ]
-        
-        datasets.append({
-            "label": f"{machine_id} Temperature",
-            "data": data,
-            "borderColor": color[0],
-            "backgroundColor": color[1],
-            "tension": 0.1
-        })
+    # Process data for charts
+    with BROADCAST_PHASE_SECONDS.time(phase='pivot'):
+        temperature_data = process_temperature_data(readings) if readings else empty_chart_data("Temperature")
+        production_data = process_production_data(readings) if readings else empty_chart_data("Production")
     
     return {
-        "labels": time_points,
-        "datasets": datasets
+        'timestamp': datetime.now(),
+        'seq': live_marks['seq'],
+        'anomalies': anomalies or [],
+        'readings': readings[-10:] if readings else [],
+        'machine_count': len(machines) if machines else 0,
+        'anomaly_count': len(anomalies) if anomalies else 0,
+        'temperature_data': temperature_data,
+        'production_data': production_data
     }
 
-def process_production_data(readings):
-    if not readings:
-        return empty_chart_data("Production")
-    
-    # Similar to temperature but for production
-    machines = {r['machine_id'] for r in readings}
-    time_points = sorted({r['timestamp'].strftime('%H:%M') for r in readings})
+def build_delta(anomalies, readings):
+    """Build a 'liveupdate.delta' payload holding only rows newer than the last tick."""
+    with BROADCAST_PHASE_SECONDS.time(phase='pivot'):
+        return {
+            'timestamp': datetime.now(),
+            'seq': live_marks['seq'],
+            'anomalies': anomalies,
+            'readings': readings,
+            'temperature_data': process_temperature_data(readings) if readings else None,
+            'production_data': process_production_data(readings) if readings else None
+        }
+
+def encode_for(payload, fmt):
+    """Encode a raw payload for a negotiated wire format."""
+    with BROADCAST_PHASE_SECONDS.time(phase='serialize'):
+        return encode_payload(payload, fmt, serialize_datetime_objects)
+
+def init_high_water_marks():
+    """Start the high-water marks at the newest rows already in the database."""
+    marks = db.get_high_water_marks()
+    if marks is None:
+        return False
+    live_marks['anomaly_id'] = marks['anomaly_id'] or 0
+    live_marks['reading_id'] = marks['reading_id'] or 0
+    return True
+
+def fetch_new_rows():
+    """Fetch anomalies and readings past the high-water marks and advance them."""
+    if live_marks['anomaly_id'] is None and not init_high_water_marks():
+        return [], []
     
-    datasets = []
-    for machine_id in machines:
-        data = [
-            next((r['units_produced'] for r in readings 
-                 if r['machine_id'] == machine_id 
-                 and r['timestamp'].strftime('%H:%M') == time), None)
-            for time in time_points
-        ]
-        
-        datasets.append({
-            "label": f"{machine_id} Production",
-            "data": data,
-            "borderColor": "rgba(75, 192, 192, 1)",
-            "backgroundColor": "rgba(75, 192, 192, 0.2)",
-            "tension": 0.1
-        })
+    with BROADCAST_PHASE_SECONDS.time(phase='query'):
+        anomalies = db.get_anomalies_since(live_marks['anomaly_id'], FETCH_LIMIT)
+        readings = db.get_readings_since(live_marks['reading_id'], FETCH_LIMIT)
     
-    return {
-        "labels": time_points,
-        "datasets": datasets
-    }
-
-def empty_chart_data(title):
-    return {
-        "labels": [],
-        "datasets": [{
-            "label": title,
-            "data": [],
-            "borderColor": "rgba(200, 200, 200, 1)",
-            "backgroundColor": "rgba(200, 200, 200, 0.1)"
-        }]
-    }
+    if anomalies:
+        live_marks['anomaly_id'] = anomalies[-1]['id']
+    if readings:
+        live_marks['reading_id'] = readings[-1]['id']
+    return anomalies, readings
 
 @socketio.on('connect')
 def handle_connect():
+    try:
+        scope = parse_scope(request.args.get('machines'), request.args.get('line'))
+    except ValueError as e:
+        log.warning('⚠️ Rejected client %s: %s', request.sid, e)
+        return False
+    if not connected_clients:
+        # The marks stood still while nobody watched; skip the rows written meanwhile,
+        # which the snapshot below already covers, rather than replay them as live
+        init_high_water_marks()
     connected_clients.add(request.sid)
-    print(f'✅ Client connected: {request.sid}')
-    emit('status', {'msg': 'Connected to Manufacturing Monitor', 'timestamp': datetime.now().isoformat()})
+    clients_present.set()
+    mode = 'delta' if request.args.get('mode') == 'delta' else 'full'
+    fmt = negotiate(request.args.get('format'), request.args.get('encoding'))
+    live_clients[request.sid] = (mode, fmt, scope)
+    join_room(live_room(mode, fmt, scope))
+    log.info('✅ Client connected: %s', request.sid)
+    emit('status', {'msg': 'Connected to Manufacturing Monitor', 'timestamp': datetime.now().isoformat(),
+                    'mode': mode, 'format': fmt, 'scope': scope})
+    send_snapshot(fmt, scope)
+
+@socketio.on('subscribe')
+def handle_subscribe(data=None):
+    """Switch a client to other machines ({"machines": [...]}) or a line ({"line": ...}); {} watches all."""
+    data = data if isinstance(data, dict) else {}
+    try:
+        scope = parse_scope(data.get('machines'), data.get('line'))
+    except ValueError as e:
+        return {'error': str(e)}
+    mode, fmt, previous = live_clients.get(request.sid, ('full', JSON, ALL))
+    leave_room(live_room(mode, fmt, previous))
+    join_room(live_room(mode, fmt, scope))
+    live_clients[request.sid] = (mode, fmt, scope)
+    send_snapshot(fmt, scope)
+    return {'scope': scope}
+
+@socketio.on('resync')
+def handle_resync():
+    """Send a full snapshot to a client that missed a delta."""
+    _, fmt, scope = live_clients.get(request.sid, ('full', JSON, ALL))
+    send_snapshot(fmt, scope)
+
+def send_snapshot(fmt, scope=ALL):
+    """Emit a full snapshot of a scope to the client of the current Socket.IO request."""
+    try:
+        emit('liveupdate', encode_for(build_snapshot(machines_in(scope)), fmt))
+    except Exception as e:
+        log.error("❌ Snapshot error: %s", e)
 
 @socketio.on('disconnect')
 def handle_disconnect():
     connected_clients.discard(request.sid)
-    print(f'❌ Client disconnected: {request.sid}')
+    live_clients.pop(request.sid, None)
+    if not connected_clients:
+        clients_present.clear()
+    log.info('❌ Client disconnected: %s', request.sid)
+
+# Seconds between broadcaster summary lines; per-tick detail is logged at DEBUG
+BROADCAST_SUMMARY_SECONDS = 60
+
+# The broadcaster blocks until in-process write events arrive, debounced so
+# a burst of writes becomes one emit; writes from other processes (CLI runs,
+# batch jobs) are caught by a slow fallback poll, so an idle plant costs no
+# database queries between polls.
+BROADCAST_DEBOUNCE_SECONDS = 0.25
+BROADCAST_MAX_DELAY_SECONDS = 1.0
+BROADCAST_FALLBACK_POLL_SECONDS = 30
+
+live_changes = Debouncer(BROADCAST_DEBOUNCE_SECONDS, BROADCAST_MAX_DELAY_SECONDS)
+subscribe(live_changes.touch, 'anomalies', 'machine_readings')
 
 def real_time_data_broadcaster():
     """Background task to broadcast real-time data"""
-    print("🚀 Starting real-time data broadcaster...")
+    log.info("🚀 Starting real-time data broadcaster...")
+    init_high_water_marks()
+    summary = RunSummary(log, 'Broadcaster')
+    last_check = time.monotonic()
     
     while True:
         try:
-            if connected_clients:
-                # Get latest data
-                anomalies = db.get_anomalies(limit=10)
-                readings = db.get_machine_readings(hours=1)
-                machines = db.get_machines()
-                
-                # Serialize all datetime objects BEFORE broadcasting
-                anomalies_clean = serialize_datetime_objects(anomalies) if anomalies else []
-                readings_clean = serialize_datetime_objects(readings[-10:]) if readings else []
-                
-                # Process data for charts
-                temperature_data = process_temperature_data(readings) if readings else empty_chart_data("Temperature")
-                production_data = process_production_data(readings) if readings else empty_chart_data("Production")
+            # With nobody to send to, block until a client connects rather than polling
+            if not connected_clients:
+                clients_present.wait()
+                last_check = time.monotonic()
+            
+            next_poll = last_check + BROADCAST_FALLBACK_POLL_SECONDS - time.monotonic()
+            changed = live_changes.wait(timeout=max(next_poll, 0))
+            polling = time.monotonic() - last_check >= BROADCAST_FALLBACK_POLL_SECONDS
+            if changed or polling:
+                last_check = time.monotonic()
+            
+            if connected_clients and (changed or polling):
+                started = time.perf_counter()
+                anomalies, readings = fetch_new_rows()
+                summary.add(events=int(changed), polls=int(not changed))
                 
-                # Create broadcast data with all datetime objects serialized
-                broadcast_data = {
-                    'timestamp': datetime.now().isoformat(),
-                    'anomalies': anomalies_clean,
-                    'readings': readings_clean,
-                    'machine_count': len(machines) if machines else 0,
-                    'anomaly_count': len(anomalies) if anomalies else 0,
-                    'temperature_data': temperature_data,
-                    'production_data': production_data
-                }
+                # A full page means more rows are waiting; pick them up next wake
+                if len(anomalies) >= FETCH_LIMIT or len(readings) >= FETCH_LIMIT:
+                    live_changes.touch()
                 
-                # Broadcast to all connected clients
-                socketio.emit('liveupdate', broadcast_data, room=None)
-                print(f"✅ Broadcasted update to {len(connected_clients)} clients - No errors!")
+                # Nothing new since the last check: nothing to send
+                if not (anomalies or readings):
+                    BROADCAST_CYCLES.inc(result='idle')
+                else:
+                    live_marks['seq'] += 1
+                    payloads = {}  # (mode, scope) -> payload, None when the scope saw nothing new
+                    groups = None
+                    
+                    # Only rooms with members are visited; each payload is built
+                    # once per watched scope and encoded once per room
+                    for mode, fmt, scope in set(live_clients.values()):
+                        if (mode, scope) not in payloads:
+                            machine_ids = machines_in(scope)
+                            scoped_anomalies, scoped_readings = anomalies, readings
+                            if machine_ids is not None:
+                                groups = groups or (group_by_machine(anomalies), group_by_machine(readings))
+                                scoped_anomalies = rows_for(groups[0], machine_ids, lambda row: row['id'])
+                                scoped_readings = rows_for(groups[1], machine_ids,
+                                                           lambda row: (row['timestamp'], row['id']))
+                            if not (scoped_anomalies or scoped_readings):
+                                payloads[(mode, scope)] = None
+                            elif mode == 'delta':
+                                payloads[(mode, scope)] = build_delta(scoped_anomalies, scoped_readings)
+                            else:
+                                payloads[(mode, scope)] = build_snapshot(machine_ids)
+                        
+                        payload = payloads[(mode, scope)]
+                        if payload is None:
+                            continue
+                        event = 'liveupdate.delta' if mode == 'delta' else 'liveupdate'
+                        encoded = encode_for(payload, fmt)
+                        with BROADCAST_PHASE_SECONDS.time(phase='emit'):
+                            socketio.emit(event, encoded, room=live_room(mode, fmt, scope))
+                    
+                    BROADCAST_CYCLE_SECONDS.observe(time.perf_counter() - started)
+                    BROADCAST_CYCLES.inc(result='sent')
+                    summary.add(broadcasts=1, anomalies=len(anomalies), readings=len(readings))
+                    log.debug("✅ Broadcasted %d new anomalies and %d new readings to %d clients",
+                              len(anomalies), len(readings), len(connected_clients))
             
-            time.sleep(5)  # Update every 5 seconds
+            if time.perf_counter() - summary.started >= BROADCAST_SUMMARY_SECONDS:
+                if summary.counts:
+                    summary.add(clients=len(connected_clients))
+                    summary.log()
+                summary = RunSummary(log, 'Broadcaster')
             
         except Exception as e:
-            print(f"❌ Real-time broadcast error: {e}")
+            BROADCAST_CYCLES.inc(result='error')
+            log.error("❌ Real-time broadcast error: %s", e)
             time.sleep(10)
 
-# Start background thread
-real_time_thread = threading.Thread(target=real_time_data_broadcaster)
+# The broadcaster's database calls block (mysql-connector, pool waits), and the
+# process is not monkey-patched, so it runs on a real OS thread rather than as
+# a green thread that would stall the eventlet hub. Write events reach it
+# through the debouncer's thread-safe queue.
+real_time_thread = threading.Thread(target=real_time_data_broadcaster, name='live-broadcaster')
 real_time_thread.daemon = True
 real_time_thread.start()
 
+# Pushed readings are queued here and written in batches by a background thread
+reading_writer = ReadingWriter()
+reading_writer.start()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Record latency per route; streamed responses are timed to their first byte."""
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method=request.method)
+        HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of the in-process metrics."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/dashboard', methods=['GET'])
 def dashboard():
+    """Dashboard summary served from the per-machine hourly rollups."""
     try:
-        # Quick static response for testing
+        hours = request.args.get('hours', default=24, type=int)
+        rollups = db.get_dashboard_rollups(hours=hours)
+        anomalies = db.get_anomalies(limit=5)
+        
+        # Rollup rows carry avg temperature and total units per bucket
+        buckets = [{
+            "timestamp": r['bucket'],
+            "machine_id": r['machine_id'],
+            "temperature": float(r['temperature_avg']) if r['temperature_avg'] is not None else None,
+            "units_produced": int(r['units_produced_sum'])
+        } for r in rollups]
+        
         response_data = {
-            "anomalyCount": 2,
-            "machineCount": 2,
-            "recentAnomalies": [
-                {
-                    "id": 1,
-                    "machine_id": "Machine-01",
-                    "timestamp": datetime.now().isoformat(),
-                    "severity": "medium",
-                    "message": "Temperature spike detected"
-                }
-            ],
-            "temperatureData": empty_chart_data("Temperature"),
-            "productionData": empty_chart_data("Production"),
-            "status": "✅ Fast Response (Static)",
+            "anomalyCount": sum(int(r['anomaly_count']) for r in rollups),
+            "machineCount": len({r['machine_id'] for r in rollups}),
+            "readingCount": sum(int(r['reading_count']) for r in rollups),
+            "errorCount": sum(int(r['error_count']) for r in rollups),
+            "recentAnomalies": serialize_datetime_objects(anomalies) if anomalies else [],
+            "temperatureData": pivot_series(buckets, 'temperature', "Avg Temperature", time_format=ROLLUP_LABEL_FORMAT),
+            "productionData": pivot_series(buckets, 'units_produced', "Production", time_format=ROLLUP_LABEL_FORMAT),
+            "status": "✅ Rollups",
             "timestamp": datetime.now().isoformat()
         }
         
         return jsonify(response_data)
         
     except Exception as e:
+        log.error("❌ Dashboard error: %s", e)
         return jsonify({
             "error": str(e),
             "anomalyCount": 0,
             "machineCount": 0,
             "recentAnomalies": [],
+            "temperatureData": empty_chart_data("Temperature"),
+            "productionData": empty_chart_data("Production"),
             "status": "❌ Backend Error"
         }), 500
 
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+STREAM_BATCH_ROWS = 1000
+# /api/logs shows this many hours of readings unless given a start or end
+DEFAULT_LOG_HOURS = 24
 
-# @app.route('/api/dashboard', methods=['GET'])
-# def dashboard():
-#     try:
-#         # Get dashboard data
-#         anomalies = db.get_anomalies(limit=5)
-#         machines = db.get_machines()
-#         readings = db.get_machine_readings(hours=24)
-        
-#         # FIXED: Serialize datetime objects in anomalies
-#         anomalies_clean = serialize_datetime_objects(anomalies) if anomalies else []
-        
-#         response_data = {
-#             "anomalyCount": len(anomalies) if anomalies else 0,
-#             "machineCount": len(machines) if machines else 0,
-#             "recentAnomalies": anomalies_clean,  # Now properly serialized
-#             "temperatureData": process_temperature_data(readings) if readings else empty_chart_data("Temperature"),
-#             "productionData": process_production_data(readings) if readings else empty_chart_data("Production"),
-#             "status": "✅ Enhanced Backend with WebSocket (FIXED!)",
-#             "timestamp": datetime.now().isoformat()
-#         }
-        
-#         print(f"📊 Dashboard: {len(anomalies or [])} anomalies, {len(machines or [])} machines")
-#         return jsonify(response_data)
-        
-#     except Exception as e:
-#         print(f"❌ Dashboard error: {str(e)}")
-#         return jsonify({
-#             "error": str(e),
-#             "anomalyCount": 0,
-#             "machineCount": 0,
-#             "recentAnomalies": [],
-#             "temperatureData": empty_chart_data("Temperature"),
-#             "productionData": empty_chart_data("Production"),
-#             "status": "❌ Backend Error"
-#         }), 200
+def json_default(obj):
+    """json.dumps fallback for the DB types jsonify would otherwise handle."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+def parse_time_arg(name):
+    """Parse an optional ISO-8601 query argument; raises ValueError if malformed."""
+    value = request.args.get(name)
+    return datetime.fromisoformat(value) if value else None
+
+def parse_query_filters():
+    """Read the machine/time-range filters shared by the log and anomaly endpoints."""
+    return {
+        "machine_id": request.args.get('machine_id'),
+        "start": parse_time_arg('start'),
+        "end": parse_time_arg('end')
+    }
+
+def parse_page_size():
+    limit = request.args.get('limit', default=DEFAULT_PAGE_SIZE, type=int)
+    return min(max(limit, 1), MAX_PAGE_SIZE)
+
+def stream_response(rows, fmt):
+    """Stream rows as NDJSON or as one JSON array without buffering the result."""
+    def batches():
+        batch = []
+        for row in rows:
+            batch.append(json.dumps(row, default=json_default))
+            if len(batch) >= STREAM_BATCH_ROWS:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    if fmt == 'ndjson':
+        body = ('\n'.join(batch) + '\n' for batch in batches())
+        return Response(stream_with_context(body), mimetype='application/x-ndjson')
+
+    def json_array():
+        yield '['
+        first = True
+        for batch in batches():
+            yield ('' if first else ',') + ','.join(batch)
+            first = False
+        yield ']'
+
+    return Response(stream_with_context(json_array()), mimetype='application/json')
+
+def format_log(r):
+    """Format a reading row for the frontend logs table."""
+    return {
+        "id": r['id'],
+        "timestamp": r['timestamp'].isoformat() if r['timestamp'] else None,
+        "machine_id": r['machine_id'],
+        "temperature": r['temperature'],
+        "units_produced": r['units_produced'],
+        "error_flag": bool(r['error_flag']),
+        "status": "anomaly" if r['error_flag'] else "normal"
+    }
 
 @app.route('/api/logs', methods=['GET'])
 def get_logs():
+    """Readings, newest first: one keyset page, or every row with ?stream=ndjson|json.
+
+    Without start or end, the first page covers the last DEFAULT_LOG_HOURS
+    hours, or all readings if there are none that recent. The window used is
+    returned as ``start``; send it back with ``cursor`` for the next page.
+    """
     try:
-        readings = db.get_machine_readings(hours=24)
-        if not readings:
-            return jsonify({"logs": []}), 200
-            
-        # Format for frontend with datetime serialization
-        logs = [{
-            "timestamp": r['timestamp'].isoformat() if r['timestamp'] else None,
-            "machine_id": r['machine_id'],
-            "temperature": r['temperature'],
-            "units_produced": r['units_produced'],
-            "error_flag": bool(r['error_flag']),
-            "status": "anomaly" if r['error_flag'] else "normal"
-        } for r in readings]
+        filters = parse_query_filters()
+        cursor = request.args.get('cursor')
+        default_window = not (filters['start'] or filters['end'] or cursor)
+        if default_window:
+            filters['start'] = (datetime.now() - timedelta(hours=DEFAULT_LOG_HOURS)).replace(microsecond=0)
+        fmt = request.args.get('stream')
+        if fmt in ('ndjson', 'json'):
+            return stream_response((format_log(r) for r in db.stream_readings(**filters)), fmt)
+        
+        limit = parse_page_size()
+        readings, next_cursor = db.get_readings_page(limit=limit, cursor=cursor, **filters)
+        if default_window and readings == []:
+            # Nothing recent (e.g. a replayed historical log), so show the newest readings there are
+            filters['start'] = None
+            readings, next_cursor = db.get_readings_page(limit=limit, **filters)
+        if readings is None:
+            return jsonify({"error": "Database error", "logs": []}), 500
         
-        return jsonify({"logs": logs})
+        return jsonify({
+            "logs": [format_log(r) for r in readings],
+            "next_cursor": next_cursor,
+            "start": filters['start'].isoformat() if filters['start'] else None
+        })
         
+    except ValueError as e:
+        return jsonify({"error": str(e), "logs": []}), 400
     except Exception as e:
-        print(f"❌ Logs error: {str(e)}")
+        log.error("❌ Logs error: %s", e)
         return jsonify({"error": str(e), "logs": []}), 200
 
+@app.route('/api/anomalies', methods=['GET'])
+def get_anomalies():
+    """Anomalies, newest first: one keyset page, or every row with ?stream=ndjson|json."""
+    try:
+        filters = parse_query_filters()
+        filters["anomaly_type"] = request.args.get('type')
+        fmt = request.args.get('stream')
+        if fmt in ('ndjson', 'json'):
+            return stream_response(db.stream_anomalies(**filters), fmt)
+        
+        anomalies, next_cursor = db.get_anomalies_page(
+            limit=parse_page_size(), cursor=request.args.get('cursor'), **filters
+        )
+        if anomalies is None:
+            return jsonify({"error": "Database error", "anomalies": []}), 500
+        
+        return jsonify({"anomalies": serialize_datetime_objects(anomalies), "next_cursor": next_cursor})
+        
+    except ValueError as e:
+        return jsonify({"error": str(e), "anomalies": []}), 400
+    except Exception as e:
+        log.error("❌ Anomalies error: %s", e)
+        return jsonify({"error": str(e), "anomalies": []}), 500
+
+@app.route('/api/machines', methods=['GET'])
+def get_machines():
+    """Registered machines and their heartbeat; ?stale=1 lists only those silent for ?timeout= seconds."""
+    try:
+        timeout = int(request.args.get('timeout', HEARTBEAT_TIMEOUT))
+        machines = db.get_machine_heartbeats(timeout)
+        if machines is None:
+            return jsonify({"error": "Database unavailable", "machines": []}), 503
+        stale = [machine for machine in machines if machine['stale']]
+        return jsonify({
+            "machines": serialize_datetime_objects(stale if request.args.get('stale') == '1' else machines),
+            "count": len(machines),
+            "stale_count": len(stale),
+            "timeout": timeout
+        })
+        
+    except ValueError:
+        return jsonify({"error": "timeout must be a whole number of seconds", "machines": []}), 400
+    except Exception as e:
+        log.error("❌ Machines error: %s", e)
+        return jsonify({"error": str(e), "machines": []}), 500
+
+@app.route('/api/readings', methods=['POST'])
+def ingest_readings():
+    """Accept a batch of readings as a JSON array or NDJSON and queue it for the background writer."""
+    try:
+        rows = parse_readings(request.get_data(cache=False), request.mimetype)
+    except RequestEntityTooLarge:
+        return jsonify({"error": f"Request body over {MAX_REQUEST_BYTES} bytes; send smaller batches"}), 413
+    except InvalidReadings as e:
+        return jsonify({"error": "Invalid readings", "details": e.errors}), 400
+
+    if not reading_writer.submit(rows):
+        response = jsonify({"error": "Ingest queue is full, retry later", "queued": reading_writer.queued})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+    return jsonify({"accepted": len(rows), "queued": reading_writer.queued}), 202
+
 @app.route('/api/system/health', methods=['GET'])
 def system_health():
     """System health with WebSocket status"""
     try:
-        machines = db.get_machines()
+        # None, rather than an empty list, when the database can not be read
+        machines = db.get_machine_heartbeats()
         db_status = "connected" if machines is not None else "error"
         
         health_data = {
             "timestamp": datetime.now().isoformat(),
-            "status": "healthy",
+            "status": "healthy" if machines is not None else "degraded",
             "database": db_status,
+            "database_pool": db.pool_stats(),
+            "machines": {
+                "count": len(machines),
+                "stale": sum(1 for machine in machines if machine['stale'])
+            } if machines is not None else None,
+            "query_cache": db.cache_stats(),
             "websocket": {
                 "connected_clients": len(connected_clients),
                 "real_time_enabled": True
@@ -318,6 +609,25 @@ def debug_data():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/debug/profiler', methods=['GET', 'POST'])
+def profiler_control():
+    """Start/stop the sampling profiler (POST ?action=start|stop|reset) or fetch its collapsed stacks."""
+    if request.method == 'POST':
+        action = request.args.get('action', 'start')
+        if action == 'start':
+            profiler.start()
+        elif action == 'stop':
+            profiler.stop()
+        elif action == 'reset':
+            profiler.reset()
+        else:
+            return jsonify({"error": f"Unknown action: {action}"}), 400
+        return jsonify(profiler.status())
+    
+    if request.args.get('format') == 'status':
+        return jsonify(profiler.status())
+    return Response(profiler.collapsed(request.args.get('limit', type=int)), mimetype='text/plain')
+
 
 if __name__ == '__main__':
     print("🚀 Starting Enhanced Manufacturing Monitor with WebSocket...")
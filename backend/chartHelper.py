@@ -0,0 +1,79 @@
+import zlib
+
+# (border, background) pairs; each machine keeps the same pair on every chart
+MACHINE_COLORS = [
+    ("rgba(255, 99, 132, 1)", "rgba(255, 99, 132, 0.2)"),
+    ("rgba(54, 162, 235, 1)", "rgba(54, 162, 235, 0.2)"),
+    ("rgba(75, 192, 192, 1)", "rgba(75, 192, 192, 0.2)"),
+    ("rgba(255, 159, 64, 1)", "rgba(255, 159, 64, 0.2)"),
+    ("rgba(153, 102, 255, 1)", "rgba(153, 102, 255, 0.2)"),
+    ("rgba(255, 205, 86, 1)", "rgba(255, 205, 86, 0.2)"),
+    ("rgba(201, 203, 207, 1)", "rgba(201, 203, 207, 0.2)"),
+    ("rgba(46, 204, 113, 1)", "rgba(46, 204, 113, 0.2)"),
+]
+
+
+def machine_color(machine_id):
+    """Return a stable (border, background) colour pair for a machine."""
+    index = zlib.crc32(str(machine_id).encode('utf-8')) % len(MACHINE_COLORS)
+    return MACHINE_COLORS[index]
+
+
+def pivot_series(readings, metric, title, time_format='%H:%M'):
+    """Pivot readings into Chart.js datasets for one metric in a single pass.
+
+    Readings are grouped by machine and time bucket; when several readings
+    fall into the same bucket the first one wins, matching the order the
+    readings were queried in.
+    """
+    if not readings:
+        return empty_chart_data(title)
+
+    bucket_labels = {}
+    series = {}
+
+    for r in readings:
+        timestamp = r['timestamp']
+        label = bucket_labels.get(timestamp)
+        if label is None:
+            label = bucket_labels[timestamp] = timestamp.strftime(time_format)
+        series.setdefault(r['machine_id'], {}).setdefault(label, r[metric])
+
+    labels = sorted(set(bucket_labels.values()))
+
+    datasets = []
+    for machine_id in sorted(series, key=str):
+        values = series[machine_id]
+        border, background = machine_color(machine_id)
+        datasets.append({
+            "label": f"{machine_id} {title}",
+            "data": [values.get(label) for label in labels],
+            "borderColor": border,
+            "backgroundColor": background,
+            "tension": 0.1
+        })
+
+    return {
+        "labels": labels,
+        "datasets": datasets
+    }
+
+
+def process_temperature_data(readings):
+    return pivot_series(readings, 'temperature', "Temperature")
+
+
+def process_production_data(readings):
+    return pivot_series(readings, 'units_produced', "Production")
+
+
+def empty_chart_data(title):
+    return {
+        "labels": [],
+        "datasets": [{
+            "label": title,
+            "data": [],
+            "borderColor": "rgba(200, 200, 200, 1)",
+            "backgroundColor": "rgba(200, 200, 200, 0.1)"
+        }]
+    }
@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolError(Exception):
+    """Raised when the pool cannot hand out a connection."""
+
+
+class PoolTimeoutError(PoolError):
+    """Raised when no connection became free within the pool timeout."""
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of reusable database connections.
+
+    Keeps up to ``pool_size`` idle connections and allows ``max_overflow``
+    extra connections under load. Callers wait up to ``timeout`` seconds
+    for a free slot. Idle connections older than ``recycle`` seconds are
+    replaced, and every connection is health-checked with ``ping`` before
+    it is handed out.
+    """
+
+    def __init__(self, connect, pool_size=5, max_overflow=10, timeout=30,
+                 recycle=1800, ping=None):
+        self._connect = connect
+        self._ping = ping or (lambda conn: conn.is_connected())
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+
+        self._lock = threading.Condition()
+        self._idle = deque()  # (connection, created_at)
+        self._created_at = {}
+        self._in_use = 0
+        self._total = 0
+
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._opened = 0
+        self._recycled = 0
+        self._discarded = 0
+
+    def acquire(self):
+        """Take a healthy connection from the pool, opening one if allowed."""
+        deadline = time.monotonic() + self.timeout
+        waited_since = None
+
+        with self._lock:
+            while not self._idle and self._total >= self.pool_size + self.max_overflow:
+                if waited_since is None:
+                    waited_since = time.monotonic()
+                    self._waits += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    self._wait_time += time.monotonic() - waited_since
+                    raise PoolTimeoutError(f"No connection available within {self.timeout}s")
+                self._lock.wait(remaining)
+
+            if waited_since is not None:
+                self._wait_time += time.monotonic() - waited_since
+
+            if self._idle:
+                connection, created_at = self._idle.pop()
+            else:
+                connection, created_at = None, None
+                self._total += 1
+            self._in_use += 1
+
+        if connection is not None and self._is_reusable(connection, created_at):
+            return connection
+        if connection is not None:
+            self._close(connection)
+            with self._lock:
+                self._recycled += 1
+
+        try:
+            connection = self._connect()
+        except Exception:
+            connection = None
+        if connection is None:
+            with self._lock:
+                self._in_use -= 1
+                self._total -= 1
+                self._lock.notify()
+            raise PoolError("Could not open a database connection")
+
+        with self._lock:
+            self._created_at[id(connection)] = time.monotonic()
+            self._opened += 1
+        return connection
+
+    def release(self, connection, discard=False):
+        """Return a connection to the pool, or close it if it is broken or surplus."""
+        with self._lock:
+            self._in_use -= 1
+            keep = not discard and len(self._idle) < self.pool_size
+            if keep:
+                self._idle.append((connection, self._created_at.get(id(connection), time.monotonic())))
+            else:
+                self._total -= 1
+                self._created_at.pop(id(connection), None)
+                if discard:
+                    self._discarded += 1
+            self._lock.notify()
+
+        if not keep:
+            self._close(connection)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that acquires a connection and always releases it."""
+        connection = self.acquire()
+        discard = False
+        try:
+            yield connection
+        except Exception:
+            discard = True
+            raise
+        finally:
+            self.release(connection, discard=discard)
+
+    def stats(self):
+        """Return a snapshot of pool usage counters."""
+        with self._lock:
+            return {
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "total": self._total,
+                "waits": self._waits,
+                "wait_time_ms": round(self._wait_time * 1000, 2),
+                "timeouts": self._timeouts,
+                "opened": self._opened,
+                "recycled": self._recycled,
+                "discarded": self._discarded,
+            }
+
+    def close_all(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+        for connection, _ in idle:
+            self._close(connection)
+
+    def _is_reusable(self, connection, created_at):
+        if self.recycle and time.monotonic() - created_at > self.recycle:
+            return False
+        try:
+            return self._ping(connection)
+        except Exception:
+            return False
+
+    def _close(self, connection):
+        with self._lock:
+            self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
@@ -1,34 +1,177 @@
-import mysql.connector
-from mysql.connector import Error
+import base64
+import binascii
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from connectionPool import ConnectionPool, PoolError
+from queryCache import QueryCache, tables_read_by, tables_written_by
 
-# Add connection pooling to your DBHelper
-app.config['SQLALCHEMY_POOL_SIZE'] = 5
-app.config['SQLALCHEMY_MAX_OVERFLOW'] = 10
-app.config['SQLALCHEMY_POOL_TIMEOUT'] = 30
+# Storage backends are shared with the detection pipeline in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from storage import Error, get_backend
+from database import HEARTBEAT_TIMEOUT
+from metrics import counter, histogram
+from log import get_logger
+from events import publish, subscribe
+
+log = get_logger(__name__)
+
+# Seconds a read may be served from the query cache, per query kind
+CACHE_TTLS = {
+    'anomalies': 2,
+    'machine_readings': 5,
+    'machines': 30,
+    'rollups': 10,
+}
+
+DB_QUERY_SECONDS = histogram('db_query_seconds', 'Time to run a database query, by query name.', ['query'])
+DB_QUERIES = counter('db_queries_total', 'Database queries by query name and outcome (ok, cached, error).',
+                     ['query', 'outcome'])
+
+READING_COLUMNS = 'id, timestamp, machine_id, temperature, units_produced, error_flag'
+ANOMALY_COLUMNS = 'id, timestamp, machine_id, anomaly_type as type, value, message'
+
+DASHBOARD_ROLLUPS_QUERY = '''
+    SELECT machine_id, bucket, SUM(reading_count) as reading_count, 
+           SUM(temperature_sum) / NULLIF(SUM(temperature_count), 0) as temperature_avg, 
+           MIN(temperature_min) as temperature_min, MAX(temperature_max) as temperature_max, 
+           SUM(units_produced_sum) as units_produced_sum, SUM(error_count) as error_count, 
+           SUM(anomaly_count) as anomaly_count 
+    FROM machine_rollup_hour 
+    WHERE bucket >= %s 
+    GROUP BY machine_id, bucket 
+    ORDER BY bucket
+'''
+
+# Hot read queries, also run through EXPLAIN by src/query_plans.py. The
+# templates take a ``condition`` from machine_filter or a ``where`` from page_filters.
+RECENT_ANOMALIES_QUERY = '''
+    SELECT id, timestamp, machine_id, anomaly_type as type, value, message 
+    FROM anomalies 
+    WHERE {condition} 
+    ORDER BY timestamp DESC 
+    LIMIT %s
+'''
+
+RECENT_READINGS_QUERY = '''
+    SELECT timestamp, machine_id, temperature, units_produced, error_flag 
+    FROM machine_readings 
+    WHERE timestamp >= %s AND {condition} 
+    ORDER BY timestamp DESC
+'''
+
+LATEST_READINGS_QUERY = '''
+    SELECT timestamp, machine_id, temperature, units_produced, error_flag 
+    FROM machine_readings 
+    WHERE {condition} 
+    ORDER BY timestamp DESC 
+    LIMIT 50
+'''
+
+ANOMALIES_SINCE_QUERY = f'''
+    SELECT {ANOMALY_COLUMNS} 
+    FROM anomalies 
+    WHERE id > %s 
+    ORDER BY id 
+    LIMIT %s
+'''
+
+READINGS_SINCE_QUERY = f'''
+    SELECT {READING_COLUMNS} 
+    FROM machine_readings 
+    WHERE id > %s 
+    ORDER BY id 
+    LIMIT %s
+'''
+
+PAGE_QUERY = '''
+    SELECT {columns} 
+    FROM {table} 
+    {where} 
+    ORDER BY timestamp DESC, id DESC 
+    LIMIT %s
+'''
+
+
+def encode_cursor(timestamp, row_id):
+    """Encode a (timestamp, id) keyset position as an opaque page cursor."""
+    raw = f"{timestamp.isoformat()}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Decode a page cursor back to (timestamp, id); raises ValueError if malformed."""
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def machine_filter(machine_ids):
+    """Return (SQL condition, params) restricting rows to ``machine_ids``.
+
+    ``None`` means every machine; an empty collection gives a ``None``
+    condition, since no row can match.
+    """
+    if machine_ids is None:
+        return '1 = 1', []
+    machine_ids = sorted(machine_ids)
+    if not machine_ids:
+        return None, []
+    return f"machine_id IN ({', '.join(['%s'] * len(machine_ids))})", machine_ids
+
+
+def page_filters(cursor=None, machine_id=None, anomaly_type=None, start=None, end=None):
+    """Build the WHERE clause shared by the keyset-paginated and streamed queries."""
+    clauses = []
+    params = []
+    if machine_id:
+        clauses.append('machine_id = %s')
+        params.append(machine_id)
+    if anomaly_type:
+        clauses.append('anomaly_type = %s')
+        params.append(anomaly_type)
+    if start:
+        clauses.append('timestamp >= %s')
+        params.append(start)
+    if end:
+        clauses.append('timestamp < %s')
+        params.append(end)
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        clauses.append('(timestamp < %s OR (timestamp = %s AND id < %s))')
+        params.extend([timestamp, timestamp, row_id])
+    where = 'WHERE ' + ' AND '.join(clauses) if clauses else ''
+    return where, params
 
 
 class DBHelper:
-    """Database helper class for MySQL operations."""
+    """Database helper class for the dashboard, on MySQL or the embedded SQLite backend."""
     
-    def __init__(self):
-        self.config = {
-            'host': 'localhost',
-            'user': 'root', 
-            'password': '123456',
-            'database': 'project',
-            'charset': 'utf8mb4',
-            'use_unicode': True
-        }
+    def __init__(self, pool_size=5, max_overflow=10, pool_timeout=30, pool_recycle=1800, cache_size=256, backend=None):
+        self.backend = backend or get_backend()
+        self.pool = ConnectionPool(
+            self.connect,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            timeout=pool_timeout,
+            recycle=pool_recycle
+        )
+        self.cache = QueryCache(maxsize=cache_size)
+        # Writes made on other connections in this process (e.g. the ingest writer) expire cached reads too
+        subscribe(lambda table, **details: self.cache.invalidate({table}))
 
     def connect(self):
-        """Create a new database connection."""
+        """Create a new database connection (used by the pool)."""
         try:
-            connection = mysql.connector.connect(**self.config)
+            connection = self.backend.connect()
             if connection.is_connected():
-                print("✅ DBHelper: Successfully connected to MySQL database!")
+                log.info("✅ DBHelper: Successfully connected to %s database!", self.backend.name)
                 return connection
         except Error as e:
-            print(f"❌ DBHelper: Error connecting to MySQL: {e}")
+            log.error("❌ DBHelper: Error connecting to %s: %s", self.backend.name, e)
             return None
 
     def close(self, connection):
@@ -36,109 +179,252 @@ class DBHelper:
         if connection and connection.is_connected():
             connection.close()
 
-    def execute_query(self, query, params=None):
-        """Execute a query and return results."""
+    def execute_query(self, query, params=None, cache_ttl=None, name=None):
+        """Execute a query on a pooled connection and return results.
+
+        SELECTs with a ``cache_ttl`` are served from the query cache while
+        fresh; writes invalidate cached reads of the tables they touch.
+        Latency is recorded under ``name``, by default the calling method.
+        """
+        name = name or sys._getframe(1).f_code.co_name
+        is_select = query.strip().upper().startswith('SELECT')
+        if is_select and cache_ttl:
+            cache_key = (query, tuple(params or ()))
+            hit, cached = self.cache.get(cache_key)
+            if hit:
+                DB_QUERIES.inc(query=name, outcome='cached')
+                return cached
+            # Taken before the query runs, so a write that lands meanwhile keeps its result out of the cache
+            generation = self.cache.generation()
+
         connection = None
+        broken = False
+        started = time.perf_counter()
         try:
-            connection = self.connect()
-            if connection:
-                cursor = connection.cursor(dictionary=True, buffered=True)
-                cursor.execute(query, params or ())
+            connection = self.pool.acquire()
+            cursor = connection.cursor(dictionary=True, buffered=True)
+            cursor.execute(query, params or ())
+            
+            # Check if it's a SELECT query
+            if is_select:
+                result = cursor.fetchall()
+                if cache_ttl:
+                    self.cache.set(cache_key, result, cache_ttl, tables_read_by(query), generation)
+            else:
+                connection.commit()
+                result = cursor.rowcount
+                for table in tables_written_by(query):
+                    publish(table, rows=result)
                 
-                # Check if it's a SELECT query
-                if query.strip().upper().startswith('SELECT'):
-                    result = cursor.fetchall()
-                else:
-                    connection.commit()
-                    result = cursor.rowcount
-                    
-                cursor.close()
-                return result
+            cursor.close()
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started, query=name)
+            DB_QUERIES.inc(query=name, outcome='ok')
+            return result
+        except PoolError as e:
+            DB_QUERIES.inc(query=name, outcome='error')
+            log.error("❌ DBHelper: %s", e)
+            return None
         except Error as e:
-            print(f"❌ DBHelper: Error executing query: {e}")
-            print(f"Query: {query}")
-            print(f"Params: {params}")
+            broken = True
+            DB_QUERIES.inc(query=name, outcome='error')
+            log.error("❌ DBHelper: Error executing %s: %s", name, e)
+            log.debug("Query: %s Params: %s", query, params)
             return None
         finally:
             if connection:
-                self.close(connection)
+                self.pool.release(connection, discard=broken)
+
+    def pool_stats(self):
+        """Return connection pool usage counters."""
+        return self.pool.stats()
+
+    def cache_stats(self):
+        """Return query cache hit/miss counters."""
+        return self.cache.stats()
 
     def insert_anomaly(self, timestamp, machine_id, anomaly_type, value=None, message=None):
-        """Insert an anomaly record."""
-        query = '''
-            INSERT INTO anomalies (timestamp, machine_id, anomaly_type, value, message) 
-            VALUES (%s, %s, %s, %s, %s)
-        '''
+        """Insert an anomaly record, or refresh it if that anomaly is already stored."""
+        query = self.backend.upsert_sql('anomalies', ['timestamp', 'machine_id', 'anomaly_type', 'value', 'message'],
+                                        ('machine_id', 'timestamp', 'anomaly_type'),
+                                        {'value': 'replace', 'message': 'replace'})
         params = (timestamp, machine_id, anomaly_type, value, message)
         return self.execute_query(query, params)
 
-    def get_anomalies(self, limit=5):
-        """Get recent anomalies - FIXED to get all anomalies if recent ones don't exist."""
-        query = '''
-            SELECT id, timestamp, machine_id, anomaly_type as type, value, message 
-            FROM anomalies 
-            ORDER BY timestamp DESC 
-            LIMIT %s
-        '''
-        result = self.execute_query(query, (limit,))
-        print(f"🔍 DBHelper: Found {len(result) if result else 0} anomalies")
+    def get_anomalies(self, limit=5, machine_ids=None):
+        """Get recent anomalies - FIXED to get all anomalies if recent ones don't exist.
+
+        ``machine_ids`` limits the result to those machines.
+        """
+        condition, params = machine_filter(machine_ids)
+        if condition is None:
+            return []
+        query = RECENT_ANOMALIES_QUERY.format(condition=condition)
+        result = self.execute_query(query, params + [limit], cache_ttl=CACHE_TTLS['anomalies'])
+        log.debug("🔍 DBHelper: Found %d anomalies", len(result) if result else 0)
         return result or []
 
-    def get_machine_readings(self, hours=24):
-        """Get machine readings - FIXED to handle older data."""
+    def _fetch_page(self, table, columns, limit, cursor=None, **filters):
+        """Fetch one newest-first page and the cursor of the page after it."""
+        where, params = page_filters(cursor=cursor, **filters)
+        query = PAGE_QUERY.format(columns=columns, table=table, where=where)
+        rows = self.execute_query(query, tuple(params) + (limit + 1,), name=f'{table}_page')
+        if rows is None:
+            return None, None
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['timestamp'], rows[-1]['id'])
+        return rows, next_cursor
+
+    def get_readings_page(self, limit=500, cursor=None, machine_id=None, start=None, end=None):
+        """Get one page of readings, newest first, keyset-paginated on (timestamp, id)."""
+        return self._fetch_page('machine_readings', READING_COLUMNS, limit, cursor,
+                                machine_id=machine_id, start=start, end=end)
+
+    def get_anomalies_page(self, limit=500, cursor=None, machine_id=None, anomaly_type=None, start=None, end=None):
+        """Get one page of anomalies, newest first, keyset-paginated on (timestamp, id)."""
+        return self._fetch_page('anomalies', ANOMALY_COLUMNS, limit, cursor,
+                                machine_id=machine_id, anomaly_type=anomaly_type, start=start, end=end)
+
+    def stream_query(self, query, params=None, batch_size=1000, name='stream'):
+        """Yield rows from an unbuffered server-side cursor, one batch in memory at a time."""
+        connection = self.pool.acquire()
+        cursor = None
+        exhausted = False
+        started = time.perf_counter()
+        try:
+            cursor = connection.cursor(dictionary=True, buffered=False)
+            cursor.execute(query, params or ())
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+            exhausted = True
+            cursor.close()
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started, query=name)
+            DB_QUERIES.inc(query=name, outcome='ok')
+        finally:
+            # An abandoned unbuffered result leaves the connection unusable, so drop it
+            self.pool.release(connection, discard=not exhausted)
+
+    def stream_readings(self, machine_id=None, start=None, end=None, batch_size=1000):
+        """Stream every matching reading, newest first."""
+        where, params = page_filters(machine_id=machine_id, start=start, end=end)
+        query = f"SELECT {READING_COLUMNS} FROM machine_readings {where} ORDER BY timestamp DESC, id DESC"
+        return self.stream_query(query, tuple(params), batch_size, name='stream_readings')
+
+    def stream_anomalies(self, machine_id=None, anomaly_type=None, start=None, end=None, batch_size=1000):
+        """Stream every matching anomaly, newest first."""
+        where, params = page_filters(machine_id=machine_id, anomaly_type=anomaly_type, start=start, end=end)
+        query = f"SELECT {ANOMALY_COLUMNS} FROM anomalies {where} ORDER BY timestamp DESC, id DESC"
+        return self.stream_query(query, tuple(params), batch_size, name='stream_anomalies')
+
+    def get_anomalies_since(self, last_id=0, limit=1000):
+        """Get anomalies with an id above ``last_id``, oldest first."""
+        return self.execute_query(ANOMALIES_SINCE_QUERY, (last_id, limit)) or []
+
+    def get_readings_since(self, last_id=0, limit=1000):
+        """Get readings with an id above ``last_id``, in insert order.
+
+        Keyed on the auto-increment id alone, so a late or clock-skewed
+        reading stamped before the newest one is still picked up.
+        """
+        return self.execute_query(READINGS_SINCE_QUERY, (last_id, limit)) or []
+
+    def get_high_water_marks(self):
+        """Get the newest anomaly id and reading id."""
+        anomaly = self.execute_query("SELECT MAX(id) as max_id FROM anomalies")
+        reading = self.execute_query("SELECT MAX(id) as max_id FROM machine_readings")
+        if anomaly is None or reading is None:
+            return None
+        return {
+            'anomaly_id': anomaly[0]['max_id'] if anomaly else None,
+            'reading_id': reading[0]['max_id'] if reading else None
+        }
+
+    def get_dashboard_rollups(self, hours=24):
+        """Get hourly per-machine rollups for the newest ``hours`` of data."""
+        latest = self.execute_query('SELECT MAX(bucket) as bucket FROM machine_rollup_hour',
+                                    cache_ttl=CACHE_TTLS['rollups'])
+        if not latest or latest[0]['bucket'] is None:
+            return []
+        newest = latest[0]['bucket']
+        if isinstance(newest, str):
+            newest = datetime.fromisoformat(newest)
+
+        # Each source (CSV file or the HTTP ingest) keeps its own rollup rows
+        return self.execute_query(DASHBOARD_ROLLUPS_QUERY, (newest - timedelta(hours=hours),), cache_ttl=CACHE_TTLS['rollups']) or []
+
+    def get_machine_readings(self, hours=24, machine_ids=None):
+        """Get machine readings - FIXED to handle older data.
+
+        ``machine_ids`` limits the result to those machines.
+        """
+        condition, params = machine_filter(machine_ids)
+        if condition is None:
+            return []
         # First try to get recent readings
-        query_recent = '''
-            SELECT timestamp, machine_id, temperature, units_produced, error_flag 
-            FROM machine_readings 
-            WHERE timestamp >= NOW() - INTERVAL %s HOUR 
-            ORDER BY timestamp DESC
-        '''
-        result = self.execute_query(query_recent, (hours,))
+        query_recent = RECENT_READINGS_QUERY.format(condition=condition)
+        # Floored to the cache TTL so calls within one TTL window share a cache entry
+        ttl = CACHE_TTLS['machine_readings']
+        cutoff = datetime.fromtimestamp(time.time() // ttl * ttl) - timedelta(hours=hours)
+        result = self.execute_query(query_recent, [cutoff] + params, cache_ttl=ttl)
         
         # If no recent data found, get the most recent available data
         if not result:
-            print(f"⚠️ No readings found in last {hours} hours, getting most recent data...")
-            query_latest = '''
-                SELECT timestamp, machine_id, temperature, units_produced, error_flag 
-                FROM machine_readings 
-                ORDER BY timestamp DESC 
-                LIMIT 50
-            '''
-            result = self.execute_query(query_latest)
+            log.debug("⚠️ No readings found in last %s hours, getting most recent data...", hours)
+            query_latest = LATEST_READINGS_QUERY.format(condition=condition)
+            result = self.execute_query(query_latest, params, cache_ttl=ttl)
         
-        print(f"🔍 DBHelper: Found {len(result) if result else 0} machine readings")
+        log.debug("🔍 DBHelper: Found %d machine readings", len(result) if result else 0)
         return result or []
 
     def get_machines(self):
-        """Get all machines - FIXED to get unique machines from readings if machines table is empty."""
-        # First try to get from machines table
-        query_machines = 'SELECT machine_id, machine_id as name, "Factory Floor" as location FROM machines'
-        result = self.execute_query(query_machines)
-        
-        # If no machines in table, get unique machines from readings
-        if not result:
-            print("⚠️ No machines found in machines table, extracting from readings...")
-            query_from_readings = '''
-                SELECT DISTINCT machine_id, machine_id as name, "Factory Floor" as location 
-                FROM machine_readings 
-                ORDER BY machine_id
-            '''
-            result = self.execute_query(query_from_readings)
-        
-        print(f"🔍 DBHelper: Found {len(result) if result else 0} machines")
+        """Get all machines from the machines registry, which every reading ingest keeps current."""
+        result = self._query_machines()
+        log.debug("🔍 DBHelper: Found %d machines", len(result) if result else 0)
         return result or []
 
+    def get_machine_heartbeats(self, timeout=HEARTBEAT_TIMEOUT):
+        """Get every machine with ``stale`` set if it has sent no readings for ``timeout`` seconds.
+
+        Returns None, unlike ``get_machines``, when the registry can not be read.
+        """
+        machines = self._query_machines()
+        if machines is None:
+            return None
+        cutoff = datetime.now() - timedelta(seconds=timeout)
+        return [
+            dict(machine, stale=machine['last_seen'] is None or machine['last_seen'] < cutoff)
+            for machine in machines
+        ]
+
+    def _query_machines(self):
+        query_machines = '''
+            SELECT machine_id, name, COALESCE(location, 'Factory Floor') as location, status, last_seen
+            FROM machines
+            ORDER BY machine_id
+        '''
+        return self.execute_query(query_machines, cache_ttl=CACHE_TTLS['machines'], name='get_machines')
+
+    def get_machine_lines(self):
+        """Map each registered machine to its line (the machines table's location)."""
+        result = self.execute_query("SELECT machine_id, location FROM machines", cache_ttl=CACHE_TTLS['machines'])
+        return {row['machine_id']: row['location'] for row in result or []}
+
     def debug_data(self):
         """Debug method to check what data exists."""
-        print("\n🔍 DEBUG: Checking database contents...")
+        log.info("🔍 DEBUG: Checking database contents...")
         
         # Check anomalies
         anomalies = self.execute_query("SELECT COUNT(*) as count FROM anomalies")
-        print(f"Anomalies count: {anomalies[0]['count'] if anomalies else 0}")
+        log.info("Anomalies count: %s", anomalies[0]['count'] if anomalies else 0)
         
         # Check machine_readings
         readings = self.execute_query("SELECT COUNT(*) as count FROM machine_readings")
-        print(f"Machine readings count: {readings[0]['count'] if readings else 0}")
+        log.info("Machine readings count: %s", readings[0]['count'] if readings else 0)
         
         # Check date range of readings
         date_range = self.execute_query("""
@@ -148,11 +434,11 @@ class DBHelper:
             FROM machine_readings
         """)
         if date_range and date_range[0]['earliest']:
-            print(f"Readings date range: {date_range[0]['earliest']} to {date_range[0]['latest']}")
+            log.info("Readings date range: %s to %s", date_range[0]['earliest'], date_range[0]['latest'])
         
-        # Check unique machines
-        unique_machines = self.execute_query("SELECT DISTINCT machine_id FROM machine_readings")
-        if unique_machines:
-            machines = [m['machine_id'] for m in unique_machines]
-            print(f"Unique machines: {machines}")
+        # Check registered machines
+        registered = self.get_machines()
+        if registered:
+            machines = [m['machine_id'] for m in registered]
+            log.info("Registered machines: %s", machines)
 
@@ -0,0 +1,110 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_READ_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+`?(\w+)`?', re.IGNORECASE)
+_WRITE_TABLES = re.compile(r'\b(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?)\s+`?(\w+)`?', re.IGNORECASE)
+
+
+def tables_read_by(query):
+    """Return the set of table names a SELECT reads from."""
+    return {name.lower() for name in _READ_TABLES.findall(query)}
+
+
+def tables_written_by(query):
+    """Return the set of table names a write statement modifies."""
+    return {name.lower() for name in _WRITE_TABLES.findall(query)}
+
+
+class QueryCache:
+    """Thread-safe read-through cache for query results.
+
+    Entries are keyed by (query, params), expire after a per-entry TTL and
+    are evicted least-recently-used once ``maxsize`` is reached. Each entry
+    remembers the tables it read so writes can invalidate it. Cached results
+    are shared between callers and must not be mutated.
+
+    A reader takes ``generation()`` before running its query and passes it
+    to ``set()``; if a write invalidated one of the query's tables in the
+    meantime the result may predate that write and is not stored.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires_at, tables, value)
+        self._generation = 0
+        self._invalidated_at = {}  # table -> generation of its last invalidation
+        self._cleared_at = 0  # generation of the last invalidate-everything
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_skips = 0
+
+    def get(self, key):
+        """Return (True, value) on a fresh hit, else (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[2]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def generation(self):
+        """Return the current invalidation generation, to pass to ``set()``."""
+        with self._lock:
+            return self._generation
+
+    def set(self, key, value, ttl, tables, generation=None):
+        """Store a result for ``ttl`` seconds, evicting the oldest entries if full.
+
+        With ``generation`` from before the query ran, the result is dropped
+        if any of ``tables`` was invalidated since.
+        """
+        with self._lock:
+            if generation is not None and (self._cleared_at > generation or any(
+                    self._invalidated_at.get(table, 0) > generation for table in tables)):
+                self.stale_skips += 1
+                return
+            self._entries[key] = (time.monotonic() + ttl, frozenset(tables), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tables=None):
+        """Drop entries that read any of ``tables`` (or everything if None)."""
+        with self._lock:
+            self._generation += 1
+            if tables is None:
+                self._cleared_at = self._generation
+                dropped = list(self._entries)
+            else:
+                tables = {table.lower() for table in tables}
+                for table in tables:
+                    self._invalidated_at[table] = self._generation
+                dropped = [key for key, entry in self._entries.items() if entry[1] & tables]
+            for key in dropped:
+                del self._entries[key]
+            self.invalidations += len(dropped)
+
+    def stats(self):
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_skips": self.stale_skips,
+            }
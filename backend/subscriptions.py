@@ -0,0 +1,55 @@
+"""
+Live-update subscription scopes.
+A client watches every machine, a list of machine IDs or one line (the
+machines table's location). Each distinct scope is a Socket.IO room, so the
+broadcaster builds one payload per watched scope rather than per client.
+"""
+
+ALL = 'all'
+MAX_SUBSCRIBED_MACHINES = 100
+
+
+def parse_scope(machines=None, line=None):
+    """Normalise a subscription request into a scope string.
+
+    ``machines`` is a list or comma-separated string of machine IDs; ``line``
+    names a line. Scopes look like 'all', 'machines=M1,M2' or 'line=Assembly'.
+    """
+    if line:
+        return f'line={str(line).strip()}'
+    if isinstance(machines, str):
+        machines = machines.split(',')
+    machine_ids = sorted({str(machine_id).strip() for machine_id in machines or ()} - {''})
+    if not machine_ids:
+        return ALL
+    if len(machine_ids) > MAX_SUBSCRIBED_MACHINES:
+        raise ValueError(f'At most {MAX_SUBSCRIBED_MACHINES} machines per subscription')
+    return 'machines=' + ','.join(machine_ids)
+
+
+def scope_machine_ids(scope, machine_lines):
+    """Return the machine IDs a scope covers, or None for every machine.
+
+    ``machine_lines`` maps machine IDs to their line, as returned by
+    ``DBHelper.get_machine_lines``.
+    """
+    if scope == ALL:
+        return None
+    kind, _, value = scope.partition('=')
+    if kind == 'line':
+        return frozenset(machine_id for machine_id, line in machine_lines.items() if line == value)
+    return frozenset(value.split(','))
+
+
+def group_by_machine(rows):
+    """Index rows by machine_id, keeping each machine's rows in their original order."""
+    groups = {}
+    for row in rows:
+        groups.setdefault(row['machine_id'], []).append(row)
+    return groups
+
+
+def rows_for(groups, machine_ids, sort_key):
+    """Collect the grouped rows of ``machine_ids``, ordered by ``sort_key``."""
+    selected = [row for machine_id in machine_ids for row in groups.get(machine_id, ())]
+    return sorted(selected, key=sort_key)
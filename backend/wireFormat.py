@@ -0,0 +1,115 @@
+from datetime import datetime, date
+from decimal import Decimal
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is optional; clients fall back to columnar JSON
+    msgpack = None
+
+# Wire formats a client can negotiate for 'liveupdate' payloads
+JSON = 'json'
+COLUMNAR = 'columnar'
+MSGPACK = 'msgpack'
+
+READING_FIELDS = ('id', 'timestamp', 'machine_id', 'temperature', 'units_produced', 'error_flag')
+ANOMALY_FIELDS = ('id', 'timestamp', 'machine_id', 'type', 'value', 'message')
+
+
+def negotiate(requested_format=None, requested_encoding=None):
+    """Pick the wire format for a client from its connect arguments."""
+    if requested_encoding == MSGPACK:
+        return MSGPACK if msgpack is not None else COLUMNAR
+    if requested_format == COLUMNAR:
+        return COLUMNAR
+    return JSON
+
+
+def to_epoch_ms(value):
+    """Convert a datetime to integer epoch milliseconds (None passes through)."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    if isinstance(value, date):
+        return int(datetime(value.year, value.month, value.day).timestamp() * 1000)
+    return value
+
+
+def _scalar(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return to_epoch_ms(value)
+    return value
+
+
+def encode_rows(rows, fields):
+    """Encode row dicts as one array per field.
+
+    Timestamps become epoch milliseconds and each distinct machine_id is
+    stored once in a dictionary table, with the column holding indices.
+    """
+    machines = {}
+    columns = {field: [] for field in fields}
+
+    for row in rows:
+        for field in fields:
+            value = row.get(field)
+            if field == 'machine_id':
+                value = machines.setdefault(value, len(machines))
+            else:
+                value = _scalar(value)
+            columns[field].append(value)
+
+    return {
+        "count": len(rows),
+        "columns": columns,
+        "dicts": {"machine_id": list(machines)}
+    }
+
+
+def encode_chart(chart):
+    """Drop the None gaps from Chart.js datasets.
+
+    Each dataset keeps its styling and carries ``index`` (positions into
+    ``labels``) and ``data`` (the values at those positions).
+    """
+    if chart is None:
+        return None
+
+    datasets = []
+    for dataset in chart["datasets"]:
+        compact = {key: value for key, value in dataset.items() if key != "data"}
+        points = [(i, _scalar(v)) for i, v in enumerate(dataset["data"]) if v is not None]
+        compact["index"] = [i for i, _ in points]
+        compact["data"] = [v for _, v in points]
+        datasets.append(compact)
+
+    return {"labels": chart["labels"], "datasets": datasets}
+
+
+def encode_payload(payload, fmt, serialize):
+    """Encode a live-update payload for one wire format.
+
+    ``serialize`` is the JSON-format serializer used for plain JSON clients.
+    MessagePack payloads are returned as bytes and sent as a binary attachment.
+    """
+    if fmt == JSON:
+        return serialize(payload)
+
+    columnar = {
+        "format": COLUMNAR,
+        "timestamp": to_epoch_ms(payload["timestamp"]),
+        "seq": payload["seq"],
+        "anomalies": encode_rows(payload["anomalies"], ANOMALY_FIELDS),
+        "readings": encode_rows(payload["readings"], READING_FIELDS),
+        "temperature_data": encode_chart(payload.get("temperature_data")),
+        "production_data": encode_chart(payload.get("production_data"))
+    }
+    for key in ("machine_count", "anomaly_count"):
+        if key in payload:
+            columnar[key] = payload[key]
+
+    if fmt == MSGPACK:
+        return msgpack.packb(columnar, use_bin_type=True)
+    return columnar
@@ -0,0 +1,102 @@
+"""
+Per-row ingest cost of the storage backends.
+Bulk-writes the same synthetic anomaly batch through DatabaseManager on a
+throwaway SQLite file and, with --mysql-database, on a scratch MySQL database
+that the benchmark creates and drops. It never writes to an existing database.
+
+    python benchmarks/bench_storage.py --rows 100000 --mysql-database anomaly_bench
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from database import DatabaseManager
+from storage import MySQLBackend, SQLiteBackend, Error
+
+
+def synthetic_anomalies(rows):
+    """Build ``rows`` anomaly tuples shaped like insert_anomalies_bulk input."""
+    start = datetime(2024, 1, 1)
+    return [
+        (start + timedelta(seconds=i), f'M{i % 50:03d}', 'High Temperature', 75.0 + i % 10,
+         'Temperature exceeded 75°C threshold')
+        for i in range(rows)
+    ]
+
+
+def bench_backend(backend, rows, batch_size):
+    """Return seconds spent bulk-inserting ``rows`` on an empty backend, or None if unreachable."""
+    db_manager = DatabaseManager(backend)
+    if not (db_manager.connection and db_manager.connection.is_connected()):
+        return None
+
+    try:
+        started = time.perf_counter()
+        written = db_manager.insert_anomalies_bulk(synthetic_anomalies(rows), batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        return elapsed if written == rows else None
+    finally:
+        db_manager.close()
+
+
+def bench_mysql(database, rows, batch_size):
+    """Benchmark MySQL on a scratch ``database`` created for the run and dropped afterwards.
+
+    Refuses a database that already exists, so a benchmark can never touch
+    real data. Returns None if the server is unreachable.
+    """
+    try:
+        server = MySQLBackend(database=None).connect()
+    except Error as err:
+        print(f"⚠️ MySQL not reachable: {err}")
+        return None
+
+    cursor = server.cursor()
+    try:
+        cursor.execute("SHOW DATABASES LIKE %s", (database,))
+        if cursor.fetchall():
+            raise SystemExit(f"❌ Database {database!r} already exists; pass a name for a new scratch database")
+        cursor.execute(f"CREATE DATABASE `{database}`")
+        try:
+            return bench_backend(MySQLBackend(database=database), rows, batch_size)
+        finally:
+            cursor.execute(f"DROP DATABASE `{database}`")
+    finally:
+        cursor.close()
+        server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-row ingest cost of the storage backends.')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--mysql-database', metavar='NAME',
+                        help='also benchmark MySQL in this new scratch database (created, then dropped)')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results['SQLite'] = bench_backend(SQLiteBackend(os.path.join(tmp_dir, 'bench.db')),
+                                          args.rows, args.batch_size)
+    if args.mysql_database:
+        results['MySQL'] = bench_mysql(args.mysql_database, args.rows, args.batch_size)
+
+    for name in [name for name, elapsed in results.items() if elapsed is None]:
+        print(f"⚠️ Skipping {name}: not reachable")
+        del results[name]
+
+    print(f"\n📊 Ingest cost for {args.rows} anomaly rows (batch size {args.batch_size}):")
+    for name, elapsed in results.items():
+        print(f"   {name:<8} {elapsed * 1e6 / args.rows:8.2f} µs/row  ({args.rows / elapsed:,.0f} rows/sec)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+Benchmark suite for the detection pipeline and dashboard backend.
+Generates seeded synthetic logs at each size and times CSV ingestion, the
+batch detector, DB bulk writes, chart pivoting and the Flask endpoints on an
+embedded SQLite database. Results are written as JSON; pass ``--baseline``
+with an earlier results file to fail on regressions.
+
+    python benchmarks/run_benchmarks.py --sizes 10k,1M,10M -o benchmark_results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in ('src', 'backend', 'data'):
+    path = os.path.join(repo_root, path)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import pandas as pd
+
+from csv_stream import iter_csv_chunks
+from database import DatabaseManager
+from detector import AnomalyDetector
+from manufacturing_log import write_csv
+from storage import SQLiteBackend
+from chartHelper import process_production_data, process_temperature_data
+
+DEFAULT_SIZES = '10k,1M,10M'
+CHUNK_ROWS = 100000
+ENDPOINTS = [
+    '/api/dashboard',
+    '/api/logs?limit=100',
+    '/api/anomalies?limit=100',
+    '/api/system/health',
+]
+
+
+def parse_size(text):
+    """Parse a row count such as 10000, 10k or 1M."""
+    text = text.strip()
+    scale = {'k': 1000, 'm': 1000000}.get(text[-1:].lower(), 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def result(benchmark, rows, seconds, **extra):
+    entry = {
+        'benchmark': benchmark,
+        'rows': rows,
+        'seconds': round(seconds, 6),
+        'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else None,
+    }
+    entry.update(extra)
+    print(f"⏱️ {benchmark:<28} {rows:>10} rows  {seconds:9.3f}s")
+    return entry
+
+
+def insert_readings(db_manager, chunk):
+    """Bulk-load one chunk of readings so the endpoints have data to serve."""
+    rows = [
+        (timestamp, machine_id, None if temperature != temperature else temperature,
+         None if units != units else units, int(error_flag))
+        for timestamp, machine_id, units, temperature, error_flag in chunk[
+            ['timestamp', 'machine_id', 'units_produced', 'temperature', 'error_flag']].itertuples(index=False, name=None)
+    ]
+    db_manager.cursor.executemany('''
+        INSERT INTO machine_readings (timestamp, machine_id, temperature, units_produced, error_flag)
+        VALUES (%s, %s, %s, %s, %s)
+    ''', rows)
+    db_manager.connection.commit()
+
+
+def reset_database(db_manager):
+    for table in ('anomalies', 'machine_readings', 'machine_rollup_minute', 'machine_rollup_hour'):
+        db_manager.cursor.execute(f"DELETE FROM {table}")
+    db_manager.connection.commit()
+
+
+def bench_size(rows, work_dir, db_manager, args):
+    """Run every pipeline benchmark at one data size and return their results."""
+    results = []
+    csv_path = os.path.join(work_dir, f'readings_{rows}.csv')
+    hours = -(-rows // args.machines) * args.interval / 3600
+
+    started = time.perf_counter()
+    generated = write_csv(csv_path, machines=args.machines, hours=hours, interval_seconds=args.interval,
+                          anomaly_rate=args.anomaly_rate, seed=args.seed)
+    results.append(result('generate.csv', generated, time.perf_counter() - started))
+
+    reset_database(db_manager)
+    detector = AnomalyDetector(None)
+    timings = dict.fromkeys(['csv.read_chunks', 'detector.detect_batch', 'db.insert_readings',
+                             'db.insert_anomalies_bulk', 'db.update_rollups', 'chart.pivot'], 0.0)
+    anomaly_count = 0
+
+    with open(csv_path, 'rb') as csv_file:
+        header = csv_file.readline()
+        chunks = iter_csv_chunks(csv_file, header, CHUNK_ROWS)
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            timings['csv.read_chunks'] += time.perf_counter() - started
+            if chunk is None:
+                break
+
+            started = time.perf_counter()
+            anomalies = detector.detect_batch(chunk)
+            timings['detector.detect_batch'] += time.perf_counter() - started
+            anomaly_count += len(anomalies)
+
+            started = time.perf_counter()
+            insert_readings(db_manager, chunk)
+            timings['db.insert_readings'] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            db_manager.insert_anomalies_bulk(anomalies, batch_size=args.batch_size)
+            timings['db.insert_anomalies_bulk'] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            db_manager.update_rollups(chunk, anomalies)
+            timings['db.update_rollups'] += time.perf_counter() - started
+
+            readings = chunk.assign(timestamp=pd.to_datetime(chunk['timestamp'])).to_dict('records')
+            started = time.perf_counter()
+            process_temperature_data(readings)
+            process_production_data(readings)
+            timings['chart.pivot'] += time.perf_counter() - started
+
+    for benchmark, seconds in timings.items():
+        extra = {'anomalies': anomaly_count} if benchmark == 'db.insert_anomalies_bulk' else {}
+        results.append(result(benchmark, generated, seconds, **extra))
+
+    results.extend(bench_endpoints(generated, args.repeat))
+    os.remove(csv_path)
+    return results
+
+
+def bench_endpoints(rows, repeat):
+    """Time each Flask endpoint through the test client: one cold request, then warm ones."""
+    import app as dashboard_app
+
+    dashboard_app.db.cache.invalidate()
+    client = dashboard_app.app.test_client()
+    results = []
+    for endpoint in ENDPOINTS:
+        latencies = []
+        for _ in range(repeat + 1):
+            started = time.perf_counter()
+            response = client.get(endpoint)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                print(f"⚠️ {endpoint} returned {response.status_code}")
+        warm = sorted(latencies[1:]) or latencies
+        results.append(result(f'flask GET {endpoint}', rows, latencies[0],
+                              cold_ms=round(latencies[0] * 1000, 3),
+                              warm_p50_ms=round(warm[len(warm) // 2] * 1000, 3),
+                              warm_max_ms=round(warm[-1] * 1000, 3)))
+    return results
+
+
+def compare_to_baseline(results, baseline_path, tolerance):
+    """Print benchmarks slower than the baseline by more than ``tolerance``; return them."""
+    with open(baseline_path) as f:
+        baseline = {(r['benchmark'], r['rows']): r for r in json.load(f)['results']}
+
+    regressions = []
+    for entry in results:
+        previous = baseline.get((entry['benchmark'], entry['rows']))
+        if previous and previous['seconds'] > 0 and entry['seconds'] > previous['seconds'] * (1 + tolerance):
+            slowdown = entry['seconds'] / previous['seconds']
+            regressions.append({'benchmark': entry['benchmark'], 'rows': entry['rows'], 'slowdown': round(slowdown, 2)})
+            print(f"❌ Regression: {entry['benchmark']} at {entry['rows']} rows is {slowdown:.2f}x slower")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the anomaly pipeline and dashboard backend.')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='comma-separated row counts, e.g. 10k,1M,10M')
+    parser.add_argument('--machines', type=int, default=50)
+    parser.add_argument('--interval', type=int, default=60, help='seconds between readings of a machine')
+    parser.add_argument('--anomaly-rate', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5, help='warm requests per endpoint')
+    parser.add_argument('-o', '--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', metavar='PATH', help='earlier results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown against the baseline')
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix='intellifactory_bench_') as work_dir:
+        # The dashboard app reads its backend from the environment when first imported
+        db_path = os.path.join(work_dir, 'bench.db')
+        os.environ['STORAGE_BACKEND'] = 'sqlite'
+        os.environ['SQLITE_PATH'] = db_path
+
+        db_manager = DatabaseManager(SQLiteBackend(db_path))
+        try:
+            for rows in sizes:
+                print(f"\n📦 Benchmarking {rows} rows")
+                results.extend(bench_size(rows, work_dir, db_manager, args))
+        finally:
+            db_manager.close()
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'parameters': {
+            'sizes': sizes, 'machines': args.machines, 'interval': args.interval,
+            'anomaly_rate': args.anomaly_rate, 'seed': args.seed, 'chunk_rows': CHUNK_ROWS,
+            'batch_size': args.batch_size, 'backend': 'sqlite',
+        },
+        'results': results,
+    }
+
+    regressions = compare_to_baseline(results, args.baseline, args.tolerance) if args.baseline else []
+    report['regressions'] = regressions
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Wrote {len(results)} results to {args.output}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
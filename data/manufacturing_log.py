@@ -1,14 +1,108 @@
+"""
+Seeded synthetic manufacturing log generator.
+Produces readings for a fleet of machines sampled at a fixed interval, with
+optional injected anomalies, and writes them as CSV in bounded-memory blocks.
+
+    python data/manufacturing_log.py --machines 50 --hours 24 --interval 60 -o logs.csv
+"""
+
+import argparse
+from datetime import datetime
+
+import numpy as np
 import pandas as pd
-data = {
-    'timstamp': [
-        '2025-06-30 08:00', '2025-06-30 09:00', '2025-06-30 10:00',
-        '2025-06-30 11:00', '2025-06-30 12:00', '2025-06-30 08:00',
-        '2025-06-30 09:00', '2025-06-30 10:00', '2025-06-30 11:00', '2025-06-30 12:00'
-    ],
-    'machine_id': ['M1','M1','M1','M1','M1','M2','M2','M2','M2','M2'],
-    'units_produced': [120,125,45,130,115,110,105,None,100,95],
-    'temperature': [67.5,68.0,69.0,75.8,65.0,66.0,67.0,68.0,69.0,67.5],
-    'error_flag': [0,0,0,1,0,0,0,0,1,0]
-}
-df = pd.DataFrame(data)
-df.to_csv("manufacturing_logs.csv", index=False)
+
+COLUMNS = ['timestamp', 'machine_id', 'units_produced', 'temperature', 'error_flag']
+
+# Time steps generated per block; fixed so output does not depend on chunking
+BLOCK_STEPS = 10000
+
+# Injected anomaly kinds, picked uniformly among injected rows
+ANOMALY_KINDS = ('high_temperature', 'low_production', 'error_flag', 'missing_units')
+
+
+def machine_ids(machines):
+    return [f'M{i + 1}' for i in range(machines)]
+
+
+def total_rows(machines, hours, interval_seconds):
+    return machines * steps_for(hours, interval_seconds)
+
+
+def steps_for(hours, interval_seconds):
+    return max(1, int(hours * 3600 // interval_seconds))
+
+
+def iter_readings(machines=2, hours=5, interval_seconds=3600, anomaly_rate=0.05, seed=42,
+                  start=datetime(2025, 6, 30, 8, 0)):
+    """Yield reading DataFrames in time order, one block of time steps at a time.
+
+    Every machine reports once per ``interval_seconds`` for ``hours``. A
+    fraction ``anomaly_rate`` of rows gets an injected anomaly (temperature
+    above 75, production below 50, error flag, or missing units). The same
+    arguments always produce the same data.
+    """
+    ids = np.array(machine_ids(machines), dtype=object)
+    steps = steps_for(hours, interval_seconds)
+    setup = np.random.default_rng([seed, 0])
+    base_temperature = setup.normal(67.0, 1.5, machines)
+    base_units = setup.normal(115.0, 8.0, machines)
+
+    for block, first_step in enumerate(range(0, steps, BLOCK_STEPS)):
+        rng = np.random.default_rng([seed, block + 1])
+        block_steps = min(BLOCK_STEPS, steps - first_step)
+        n = block_steps * machines
+
+        offsets = (first_step + np.repeat(np.arange(block_steps), machines)) * interval_seconds
+        timestamps = pd.Timestamp(start) + pd.to_timedelta(offsets, unit='s')
+        machine = np.tile(np.arange(machines), block_steps)
+
+        temperature = np.round(base_temperature[machine] + rng.normal(0.0, 1.5, n), 1)
+        units = np.round(base_units[machine] + rng.normal(0.0, 5.0, n)).clip(55, None)
+        error_flag = np.zeros(n, dtype=np.int64)
+
+        injected = np.flatnonzero(rng.random(n) < anomaly_rate)
+        kinds = rng.integers(0, len(ANOMALY_KINDS), len(injected))
+        hot = injected[kinds == 0]
+        temperature[hot] = np.round(rng.uniform(76.0, 95.0, len(hot)), 1)
+        low = injected[kinds == 1]
+        units[low] = np.round(rng.uniform(10.0, 49.0, len(low)))
+        error_flag[injected[kinds == 2]] = 1
+        units[injected[kinds == 3]] = np.nan
+
+        yield pd.DataFrame({
+            'timestamp': timestamps.strftime('%Y-%m-%d %H:%M:%S'),
+            'machine_id': ids[machine],
+            'units_produced': units,
+            'temperature': temperature,
+            'error_flag': error_flag,
+        }, columns=COLUMNS)
+
+
+def generate_readings(**kwargs):
+    """Return all generated readings as one DataFrame (see ``iter_readings``)."""
+    return pd.concat(iter_readings(**kwargs), ignore_index=True)
+
+
+def write_csv(path, **kwargs):
+    """Write generated readings to ``path`` block by block; returns the row count."""
+    rows = 0
+    for i, block in enumerate(iter_readings(**kwargs)):
+        block.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        rows += len(block)
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic manufacturing log CSV.')
+    parser.add_argument('-o', '--output', default='manufacturing_logs.csv')
+    parser.add_argument('--machines', type=int, default=2)
+    parser.add_argument('--hours', type=float, default=5)
+    parser.add_argument('--interval', type=int, default=3600, help='seconds between readings of a machine')
+    parser.add_argument('--anomaly-rate', type=float, default=0.05, help='fraction of rows with an injected anomaly')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rows = write_csv(args.output, machines=args.machines, hours=args.hours, interval_seconds=args.interval,
+                     anomaly_rate=args.anomaly_rate, seed=args.seed)
+    print(f"✅ Wrote {rows} readings to {args.output}")
@@ -0,0 +1,185 @@
+"""
+Parquet archive tier for historical machine readings.
+Readings older than the retention window are moved out of machine_readings
+into Parquet files partitioned by day and machine
+(``<archive>/date=YYYY-MM-DD/machine_id=M1/part-<id>-0.parquet``) and then
+deleted from the database in batches. ``read_archive`` queries those files
+with column projection, partition pruning and row-group predicate pushdown
+over memory-mapped reads, so history stays available for trend analysis
+without keeping it in the hot table.
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+except ImportError:  # The archive is optional; everything else runs without pyarrow
+    pa = ds = pafs = None
+
+# What reading the archive raises when pyarrow is missing or a file is corrupt or half written
+ARCHIVE_READ_ERRORS = (RuntimeError, OSError) + ((pa.ArrowException,) if pa is not None else ())
+
+from storage import Error
+from events import publish
+from export import EXPORT_COLUMNS, arrow_schema, rows_frame
+from log import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_ARCHIVE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'archive'))
+DEFAULT_RETENTION_DAYS = 90
+DEFAULT_BATCH_ROWS = 50000
+DELETE_BATCH_ROWS = 1000
+
+READING_COLUMNS = EXPORT_COLUMNS['machine_readings']
+
+# The oldest readings past the cutoff, one batch at a time
+ARCHIVE_BATCH_QUERY = f'''
+    SELECT {', '.join(READING_COLUMNS)} FROM machine_readings
+    WHERE timestamp < %s ORDER BY timestamp, id LIMIT %s
+'''
+
+
+def archive_dir():
+    """The archive root, from ARCHIVE_DIR or data/archive next to the SQLite database."""
+    return os.environ.get('ARCHIVE_DIR', DEFAULT_ARCHIVE_DIR)
+
+
+def _require_pyarrow():
+    if ds is None:
+        raise RuntimeError("The Parquet archive needs pyarrow (pip install pyarrow)")
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([('date', pa.date32()), ('machine_id', pa.string())]), flavor='hive')
+
+
+def _archive_schema():
+    return arrow_schema('machine_readings').append(pa.field('date', pa.date32()))
+
+
+def archive_readings(db, retention_days=DEFAULT_RETENTION_DAYS, path=None, batch_rows=DEFAULT_BATCH_ROWS,
+                     now=None):
+    """Move readings older than ``retention_days`` into the Parquet archive.
+
+    Works oldest first, ``batch_rows`` at a time: each batch is written to
+    its partitions before its rows are deleted and committed, so a crash
+    never loses readings. Files are named after the first and last id of
+    their batch. A re-run after a crash selects the same first reading
+    again and removes the files of the unfinished attempt before writing,
+    so its readings are not archived twice even if ``batch_rows`` changed.
+    Files of other batches are never touched. Returns the number of
+    readings archived.
+    """
+    _require_pyarrow()
+    path = path or archive_dir()
+    cutoff = (now or datetime.now()) - timedelta(days=retention_days)
+    started = time.perf_counter()
+    archived = 0
+
+    try:
+        while True:
+            db.cursor.execute(ARCHIVE_BATCH_QUERY, (cutoff, batch_rows))
+            rows = db.cursor.fetchall()
+            if not rows:
+                break
+            _write_batch(rows, path)
+            _delete_batch(db, [row[0] for row in rows])
+            db.connection.commit()
+            archived += len(rows)
+            log.debug("📦 Archived %d readings so far", archived)
+            if len(rows) < batch_rows:
+                break
+    except Error as err:
+        log.error("❌ Error archiving machine readings: %s", err)
+        db.connection.rollback()
+
+    if archived:
+        publish('machine_readings', rows=archived)
+    elapsed = time.perf_counter() - started
+    log.info("✅ Archived %s readings older than %s to %s in %.2fs",
+             f"{archived:,}", f"{cutoff:%Y-%m-%d %H:%M}", path, elapsed)
+    return archived
+
+
+def _write_batch(rows, path):
+    df = rows_frame(rows, READING_COLUMNS)
+    df['date'] = df['timestamp'].dt.date
+    removed = _remove_unfinished(path, rows[0][0], df['date'].iloc[0])
+    if removed:
+        log.warning("⚠️ Removed %d part files of an unfinished archive batch starting at id %s", removed, rows[0][0])
+    table = pa.Table.from_pandas(df, schema=_archive_schema(), preserve_index=False)
+    # Partition directories already exist after the first batch; files are only
+    # replaced when they carry this batch's own name
+    ds.write_dataset(table, path, format='parquet', partitioning=_partitioning(),
+                     basename_template=f'part-{rows[0][0]}-{rows[-1][0]}-{{i}}.parquet',
+                     existing_data_behavior='overwrite_or_ignore')
+
+
+def _remove_unfinished(path, first_id, first_date):
+    """Delete part files an earlier, uncommitted attempt wrote for the batch starting at ``first_id``.
+
+    A committed batch's first reading is gone from the hot table, so only an
+    attempt that crashed before its delete committed can have used this
+    first id. Its readings are all on or after ``first_date``.
+    """
+    if not os.path.isdir(path):
+        return 0
+    prefix = f'part-{first_id}-'
+    removed = 0
+    for partition in os.listdir(path):
+        if not partition.startswith('date=') or partition < f'date={first_date.isoformat()}':
+            continue
+        for root, _, files in os.walk(os.path.join(path, partition)):
+            for name in files:
+                if name.startswith(prefix):
+                    os.remove(os.path.join(root, name))
+                    removed += 1
+    return removed
+
+
+def _delete_batch(db, ids):
+    for i in range(0, len(ids), DELETE_BATCH_ROWS):
+        chunk = ids[i:i + DELETE_BATCH_ROWS]
+        db.cursor.execute(f"DELETE FROM machine_readings WHERE id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+
+
+def archive_filter(start=None, end=None, machine_ids=None):
+    """Dataset filter for ``start`` (inclusive) to ``end`` (exclusive) and ``machine_ids``.
+
+    The date and machine_id terms prune whole partitions; the timestamp terms
+    are checked against row-group statistics before any data is read.
+    """
+    conditions = []
+    if start:
+        conditions.append(ds.field('date') >= start.date())
+        conditions.append(ds.field('timestamp') >= pa.scalar(start, pa.timestamp('us')))
+    if end:
+        conditions.append(ds.field('date') <= end.date())
+        conditions.append(ds.field('timestamp') < pa.scalar(end, pa.timestamp('us')))
+    if machine_ids:
+        conditions.append(ds.field('machine_id').isin(list(machine_ids)))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_archive(start=None, end=None, machine_ids=None, columns=None, path=None):
+    """Read archived readings as a pyarrow Table, reading only ``columns`` (default all).
+
+    Call ``.to_pandas()`` for analysis or ``.to_pylist()`` for row dicts.
+    """
+    _require_pyarrow()
+    path = os.path.abspath(path or archive_dir())
+    columns = list(columns or READING_COLUMNS)
+    if not os.path.isdir(path):
+        return _archive_schema().empty_table().select(columns)
+
+    dataset = ds.dataset(path, format='parquet', partitioning=_partitioning(),
+                         filesystem=pafs.LocalFileSystem(use_mmap=True))
+    return dataset.to_table(columns=columns, filter=archive_filter(start, end, machine_ids))
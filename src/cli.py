@@ -1,12 +1,18 @@
-import pandas as pd
-from src.database import DatabaseManager
-from src.main import run_anomaly_detection
+import argparse
+from datetime import datetime
+from database import DatabaseManager
+from export import DEFAULT_CHUNK_ROWS, FORMATS, export_table
+from archive import DEFAULT_BATCH_ROWS, DEFAULT_RETENTION_DAYS, archive_readings
+from main import run_anomaly_detection
+from parallel import run_parallel_detection
+
+ANOMALIES_BY_MACHINE_QUERY = "SELECT * FROM anomalies WHERE machine_id = %s ORDER BY timestamp DESC"
 
 def show_menu():
     print("\n🏭 Anomaly Detector CLI")
     print("1. View all anomalies")
     print("2. Search anomalies by machine")
-    print("3. Export anomalies to CSV")
+    print("3. Export anomalies or readings (CSV, gzip CSV, Parquet)")
     print("4. Clear all anomalies") 
     print("5. Run anomaly detection on a new file")
     print("0. Exit")
@@ -25,24 +31,37 @@ def main():
                 
         elif choice == '2':
             machine = input("Enter machine ID: ").strip()
-            db.cursor.execute("SELECT * FROM anomalies WHERE machine_id = %s", (machine,))
+            db.cursor.execute(ANOMALIES_BY_MACHINE_QUERY, (machine,))
             for i in db.cursor.fetchall():
                 print(i)
                 
         elif choice == '3':
-            anomalies = db.get_recent_anomalies()
-            df = pd.DataFrame(anomalies, columns=['machine_id', 'timestamp', 'anomaly_type', 'value', 'description'])
-            df.to_csv('anomalies_export.csv', index=False)
-            print("✅ Exported to anomalies_export.csv")
+            table = input("Export anomalies or readings? (Enter for anomalies): ").strip() or 'anomalies'
+            path = input(f"Output file (.csv, .csv.gz or .parquet, Enter for {table}_export.csv): ").strip()
+            machines = input("Machine IDs, comma separated (Enter for all): ").strip()
+            try:
+                start = parse_time(input("From (YYYY-MM-DD[ HH:MM], Enter for the beginning): "))
+                end = parse_time(input("Until (YYYY-MM-DD[ HH:MM], Enter for now): "))
+                export_table(db.backend, table, path or f'{table}_export.csv', start=start, end=end,
+                             machine_ids=[m.strip() for m in machines.split(',') if m.strip()])
+            except (ValueError, RuntimeError) as e:
+                print(f"❌ Export failed: {e}")
             
         elif choice == '4':
             db.cursor.execute("DELETE FROM anomalies")
             db.connection.commit()
-            print("✅ All anomalies cleared.")
+            # Without watermarks the next run re-detects every file from the top
+            db.clear_watermarks()
+            print("✅ All anomalies cleared; files will be re-detected in full on the next run.")
             
         elif choice == '5':
             file_path = input("Enter path to new CSV/log file: ").strip()
-            run_anomaly_detection(file_path)
+            workers = input("Worker processes (Enter for 1): ").strip()
+            full = input("Re-detect the whole file instead of only new rows? (y/N): ").strip().lower() == 'y'
+            if workers.isdigit() and int(workers) > 1:
+                run_parallel_detection(file_path, int(workers), full=full)
+            else:
+                run_anomaly_detection(file_path, full=full)
             
         elif choice == '0':
             db.close()
@@ -52,5 +71,56 @@ def main():
         else:
             print("❌ Invalid choice. Try again.")
 
+def parse_time(value):
+    value = value.strip()
+    return datetime.fromisoformat(value) if value else None
+
+def export_command(argv=None):
+    parser = argparse.ArgumentParser(prog='cli.py export',
+                                     description='Stream anomalies or machine readings to CSV or Parquet.')
+    parser.add_argument('table', choices=['anomalies', 'readings'])
+    parser.add_argument('-o', '--output', help='output file; .csv, .csv.gz or .parquet (default <table>_export.csv)')
+    parser.add_argument('--format', choices=FORMATS, help='output format (default: from the file extension)')
+    parser.add_argument('--start', type=datetime.fromisoformat, help='first timestamp to include (ISO 8601)')
+    parser.add_argument('--end', type=datetime.fromisoformat, help='timestamp to stop before (ISO 8601)')
+    parser.add_argument('--machine', action='append', dest='machines', metavar='MACHINE_ID',
+                        help='only this machine; repeat for several')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                        help='rows fetched and written per chunk')
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager()
+    try:
+        export_table(db.backend, args.table, args.output or f'{args.table}_export.csv', args.format,
+                     args.start, args.end, args.machines, args.chunk_rows)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ Export failed: {e}")
+    finally:
+        db.close()
+
+def archive_command(argv=None):
+    parser = argparse.ArgumentParser(prog='cli.py archive',
+                                     description='Move old machine readings into the Parquet archive.')
+    parser.add_argument('--retention-days', type=int, default=DEFAULT_RETENTION_DAYS,
+                        help='keep readings newer than this many days in the database')
+    parser.add_argument('--archive-dir', help='archive root (default: ARCHIVE_DIR or data/archive)')
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS,
+                        help='readings written and deleted per batch')
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager()
+    try:
+        archive_readings(db, args.retention_days, args.archive_dir, args.batch_rows)
+    except RuntimeError as e:
+        print(f"❌ Archive failed: {e}")
+    finally:
+        db.close()
+
 if __name__ == '__main__':
-    main()
+    import sys
+    if sys.argv[1:2] == ['export']:
+        export_command(sys.argv[2:])
+    elif sys.argv[1:2] == ['archive']:
+        archive_command(sys.argv[2:])
+    else:
+        main()
@@ -0,0 +1,128 @@
+"""
+Chunked CSV reading with byte-offset watermarks.
+Lets large log files be processed with flat memory, resumed after an
+interruption, and re-run incrementally as they grow.
+"""
+
+import hashlib
+import io
+import os
+from itertools import islice
+
+import pandas as pd
+
+from log import get_logger
+
+log = get_logger(__name__)
+
+
+def iter_csv_chunks(file_obj, header, chunk_rows):
+    """Yield DataFrames of up to ``chunk_rows`` rows from a binary file object.
+
+    Reading starts at the file's current position; ``header`` is the raw
+    header line, re-used to parse every chunk. After each yield,
+    ``file_obj.tell()`` is the byte offset of the first unread row. A final
+    line with no newline may still be being written, so it is left unread
+    and reading stops at the start of it.
+    """
+    while True:
+        lines = list(islice(file_obj, chunk_rows))
+        partial = bool(lines) and not lines[-1].endswith(b'\n')
+        if partial:
+            file_obj.seek(-len(lines.pop()), io.SEEK_CUR)
+        if lines:
+            chunk = drop_unparseable_timestamps(pd.read_csv(io.BytesIO(header + b''.join(lines))))
+            if len(chunk):
+                yield chunk
+        if partial or not lines:
+            return
+
+
+def drop_unparseable_timestamps(readings):
+    """Drop and log readings whose timestamp cannot be parsed.
+
+    Such rows can not be placed in time, and once stored they would break
+    every later read of the table, so they never reach detection or the
+    database.
+    """
+    if 'timestamp' not in readings.columns:
+        return readings
+    bad = pd.to_datetime(readings['timestamp'], errors='coerce', format='ISO8601').isna()
+    if bad.any():
+        log.warning("⚠️ Skipping %d rows with unparseable timestamps, e.g. %s",
+                    int(bad.sum()), readings.loc[bad, 'timestamp'].head(3).tolist())
+        readings = readings[~bad]
+    return readings
+
+
+def read_complete_lines(file_obj):
+    """Read the rest of ``file_obj`` up to its last newline.
+
+    Any partial final line is left unread, so ``file_obj.tell()`` is the end
+    of the last complete line, the offset a watermark may safely advance to.
+    """
+    data = file_obj.read()
+    end = data.rfind(b'\n') + 1
+    if end < len(data):
+        file_obj.seek(end - len(data), io.SEEK_CUR)
+    return data[:end]
+
+
+def source_id(csv_file_path):
+    """Return the key a file's detection watermark is stored under."""
+    return os.path.abspath(csv_file_path)
+
+
+def header_hash(header):
+    return hashlib.sha1(header).hexdigest()
+
+
+def watermark_offset(csv_file_path, header, watermark):
+    """Return the byte offset to resume a file from, or None if it must be read from the start.
+
+    A watermark only applies while the file keeps its header and has not
+    shrunk below the recorded offset; a replaced or truncated file starts over.
+    """
+    if not watermark:
+        return None
+    if watermark['header_hash'] != header_hash(header):
+        log.warning("⚠️ File header changed since the last run, detecting from the start.")
+        return None
+    if watermark['byte_offset'] > os.path.getsize(csv_file_path):
+        log.warning("⚠️ File is shorter than its watermark, detecting from the start.")
+        return None
+    return watermark['byte_offset']
+
+
+def start_position(db_manager, csv_file_path, header, full=False):
+    """Return (byte offset, rows already processed) for a run over a file.
+
+    Incremental runs continue from the file's watermark. A full run reads the
+    whole file again and its anomalies are upserted over the existing ones.
+    Whenever a run starts at the top of the file (offset ``len(header)``),
+    its first rollup write must pass ``reset=True`` so the file's earlier
+    counts are replaced rather than added to; other sources keep theirs.
+    """
+    if full:
+        log.info("🔁 Full re-detection: rebuilding this file's rollups, anomalies are upserted in place.")
+        return len(header), 0
+
+    watermark = db_manager.get_watermark(source_id(csv_file_path))
+    offset = watermark_offset(csv_file_path, header, watermark)
+    if offset is None:
+        return len(header), 0
+    log.info("⏩ Skipping %d rows already processed", watermark['rows_processed'])
+    return offset, watermark['rows_processed']
+
+
+def watermark_for(header, offset, rows, readings):
+    """Return the (header_hash, byte_offset, rows_processed, last_timestamp) a watermark records."""
+    newest = pd.NaT
+    if readings is not None and 'timestamp' in readings.columns:
+        newest = pd.to_datetime(readings['timestamp'], errors='coerce', format='ISO8601').max()
+    return header_hash(header), offset, rows, None if pd.isna(newest) else newest.to_pydatetime()
+
+
+def advance_watermark(db_manager, csv_file_path, header, offset, rows, readings):
+    """Record that a file has been processed up to ``offset`` (``rows`` rows in total)."""
+    return db_manager.save_watermark(source_id(csv_file_path), *watermark_for(header, offset, rows, readings))
@@ -1,126 +1,180 @@
 """
 Database connection and management for Manufacturing Anomaly Detection System.
-Handles MySQL connections, table creation, and basic database operations.
+Handles MySQL or embedded SQLite connections, table creation, and basic database operations.
 """
 
-import mysql.connector
-from mysql.connector import Error
-from datetime import datetime
+from datetime import datetime, timedelta
+from rollups import ROLLUP_TABLES, ROLLUP_COLUMNS, ROLLUP_MERGE, aggregate_rollups
+from storage import Error, get_backend
+from log import get_logger
+from events import publish
+from migrations import migrate
+from archive import ARCHIVE_READ_ERRORS, read_archive
+import json
+import math
+import time
+import pandas as pd
+
+# Anomalies are unique per machine, instant and type; re-detection upserts them
+ANOMALY_INSERT_COLUMNS = ['timestamp', 'machine_id', 'anomaly_type', 'value', 'message']
+ANOMALY_KEYS = ('machine_id', 'timestamp', 'anomaly_type')
+
+# The machines registry row written for every machine in an ingested batch
+MACHINE_COLUMNS = ['machine_id', 'name', 'status', 'first_seen', 'last_seen', 'last_reading_at',
+                   'last_temperature', 'last_units_produced', 'last_error_flag']
+# A manually set maintenance status survives new readings, and the last_* fields
+# only follow a reading at least as new as the stored one (last_reading_at goes
+# last, since MySQL applies the assignments in order)
+MACHINE_MERGE = {
+    'status': ('unless', 'maintenance'),
+    'last_seen': 'replace',
+    'last_temperature': ('newer', 'last_reading_at'),
+    'last_units_produced': ('newer', 'last_reading_at'),
+    'last_error_flag': ('newer', 'last_reading_at'),
+    'last_reading_at': ('newer', 'last_reading_at'),
+}
+
+# Seconds without readings before a machine counts as stale
+HEARTBEAT_TIMEOUT = 300
+
+WATERMARK_COLUMNS = ['source', 'header_hash', 'byte_offset', 'rows_processed', 'last_timestamp', 'updated_at']
+
+# Rollup source of readings pushed to POST /api/readings; CSV runs use the file path
+API_SOURCE = 'api'
+
+ROLLUP_KEYS = ('machine_id', 'bucket', 'source')
+
+log = get_logger(__name__)
 
 class DatabaseManager:
-    def __init__(self):
-        """Initialize database manager with connection parameters."""
+    def __init__(self, backend=None):
+        """Initialize database manager on a storage backend (MySQL unless configured otherwise)."""
+        self.backend = backend or get_backend()
         self.connection = None
         self.cursor = None
         self.connect()
         
         if self.connection and self.connection.is_connected():
             self.create_tables()
-            print("✅ Database Manager initialized successfully!")
+            log.info("✅ Database Manager initialized successfully!")
 
     def connect(self):
-        """Establish connection to MySQL database."""
-        try:
-            self.connection = mysql.connector.connect(
-                host='localhost',
-                database='project', 
-                user='root',
-                password='123456',
-                charset='utf8mb4',
-                use_unicode=True
-            )
+        """Establish connection to the configured database."""
+        try:
+            self.connection = self.backend.connect()
             
             if self.connection.is_connected():
                 self.cursor = self.connection.cursor(buffered=True)
-                print("✅ Successfully connected to MySQL database!")
+                log.info("✅ Successfully connected to %s database!", self.backend.name)
             else:
-                print("❌ Failed to establish connection to MySQL!")
+                log.error("❌ Failed to establish connection to %s!", self.backend.name)
                 self.connection = None
                 
         except Error as err:
-            print(f"❌ Error connecting to MySQL: {err}")
+            log.error("❌ Error connecting to %s: %s", self.backend.name, err)
             self.connection = None
             self.cursor = None
 
     def create_tables(self):
-        """Create all necessary tables if they don't exist."""
-        tables = {
-            'anomalies': '''
-                CREATE TABLE IF NOT EXISTS anomalies (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    timestamp DATETIME NOT NULL,
-                    machine_id VARCHAR(50) NOT NULL,
-                    anomaly_type VARCHAR(100) NOT NULL,
-                    value DECIMAL(10,2),
-                    message TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    INDEX idx_timestamp (timestamp),
-                    INDEX idx_machine_id (machine_id),
-                    INDEX idx_type (anomaly_type)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-            ''',
-            
-            'machine_readings': '''
-                CREATE TABLE IF NOT EXISTS machine_readings (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    timestamp DATETIME NOT NULL,
-                    machine_id VARCHAR(50) NOT NULL,
-                    temperature DECIMAL(5,2),
-                    units_produced INT,
-                    error_flag BOOLEAN DEFAULT FALSE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    INDEX idx_timestamp (timestamp),
-                    INDEX idx_machine_id (machine_id)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-            ''',
-            
-            'machines': '''
-                CREATE TABLE IF NOT EXISTS machines (
-                    machine_id VARCHAR(50) PRIMARY KEY,
-                    name VARCHAR(100) NOT NULL,
-                    location VARCHAR(100),
-                    status ENUM('online', 'offline', 'maintenance') DEFAULT 'online',
-                    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-            '''
-        }
-        
+        """Create all necessary tables if they don't exist, then apply pending migrations."""
         try:
-            for table_name, create_sql in tables.items():
-                self.cursor.execute(create_sql)
+            for table_name, statements in self.backend.table_definitions().items():
+                for create_sql in statements:
+                    self.cursor.execute(create_sql)
                 self.connection.commit()
-                print(f"✅ Table '{table_name}' ready")
+                log.debug("✅ Table '%s' ready", table_name)
                 
         except Error as err:
-            print(f"❌ Error creating tables: {err}")
+            log.error("❌ Error creating tables: %s", err)
+            return
+
+        migrate(self.connection, self.cursor, self.backend)
 
     def insert_anomaly(self, timestamp, machine_id, anomaly_type, value=None, message=None):
         """Insert a new anomaly record."""
         if not self.connection or not self.connection.is_connected():
-            print("❌ Database not connected. Attempting to reconnect...")
+            log.warning("❌ Database not connected. Attempting to reconnect...")
             self.connect()
             
         if not self.connection or not self.connection.is_connected():
-            print("❌ Failed to reconnect. Cannot insert anomaly.")
+            log.error("❌ Failed to reconnect. Cannot insert anomaly.")
             return False
 
-        insert_sql = '''
-            INSERT INTO anomalies (timestamp, machine_id, anomaly_type, value, message) 
-            VALUES (%s, %s, %s, %s, %s)
-        '''
-        
         try:
-            self.cursor.execute(insert_sql, (timestamp, machine_id, anomaly_type, str(value), message))
+            self.cursor.execute(self._anomaly_upsert_sql(), (timestamp, machine_id, anomaly_type, str(value), message))
             self.connection.commit()
-            print(f"✅ Anomaly inserted: {anomaly_type} for {machine_id} at {timestamp}")
+            publish('anomalies', rows=1)
+            log.debug("✅ Anomaly inserted: %s for %s at %s", anomaly_type, machine_id, timestamp)
             return True
             
         except Error as err:
-            print(f"❌ Error inserting anomaly: {err}")
+            log.error("❌ Error inserting anomaly: %s", err)
             self.connection.rollback()
             return False
 
+    def insert_anomalies_bulk(self, rows, batch_size=1000):
+        """Upsert many anomalies with multi-row INSERTs, committing once per batch.
+
+        ``rows`` is an anomaly DataFrame from ``AnomalyDetector.detect_batch``
+        or an iterable of (timestamp, machine_id, anomaly_type, value, message)
+        tuples. Anomalies are keyed on (machine_id, timestamp, anomaly_type),
+        so writing one again updates it instead of adding a duplicate.
+        Returns the number of rows written.
+        """
+        if not self.connection or not self.connection.is_connected():
+            log.warning("❌ Database not connected. Attempting to reconnect...")
+            self.connect()
+
+        if not self.connection or not self.connection.is_connected():
+            log.error("❌ Failed to reconnect. Cannot insert anomalies.")
+            return 0
+
+        insert_sql = self._anomaly_upsert_sql()
+
+        if hasattr(rows, 'itertuples'):
+            # One canonical timestamp per instant, so the unique key sees duplicates
+            rows = rows.assign(timestamp=_canonical_timestamps(rows['timestamp']))
+            unparseable = rows['timestamp'].isna()
+            if unparseable.any():
+                log.error("❌ Rejected %d anomalies with unparseable timestamps (machines %s)",
+                          int(unparseable.sum()), sorted(set(rows.loc[unparseable, 'machine_id'].astype(str))))
+                rows = rows[~unparseable]
+            rows = rows[['timestamp', 'machine_id', 'anomaly_type', 'value', 'description']].itertuples(index=False, name=None)
+
+        started = time.perf_counter()
+        inserted = 0
+        batch = []
+
+        try:
+            for timestamp, machine_id, anomaly_type, value, message in rows:
+                batch.append((timestamp, machine_id, anomaly_type, _db_value(value), message))
+                if len(batch) >= batch_size:
+                    inserted += self._write_anomaly_batch(insert_sql, batch)
+                    batch = []
+            if batch:
+                inserted += self._write_anomaly_batch(insert_sql, batch)
+
+        except Error as err:
+            log.error("❌ Error bulk inserting anomalies: %s", err)
+            self.connection.rollback()
+
+        if inserted:
+            publish('anomalies', rows=inserted)
+        elapsed = time.perf_counter() - started
+        rate = inserted / elapsed if elapsed > 0 else 0
+        log.info("✅ Bulk inserted %d anomalies in %.2fs (%.0f rows/sec)", inserted, elapsed, rate)
+        return inserted
+
+    def _anomaly_upsert_sql(self):
+        return self.backend.upsert_sql('anomalies', ANOMALY_INSERT_COLUMNS, ANOMALY_KEYS,
+                                       {'value': 'replace', 'message': 'replace'})
+
+    def _write_anomaly_batch(self, insert_sql, batch):
+        """Write one batch of anomaly rows in a single transaction."""
+        self.cursor.executemany(insert_sql, batch)
+        self.connection.commit()
+        return len(batch)
+
     def insert_machine_reading(self, timestamp, machine_id, temperature=None, units_produced=None, error_flag=False):
         """Insert a new machine reading."""
         insert_sql = '''
@@ -129,12 +183,126 @@ class DatabaseManager:
         '''
         
         try:
-            self.cursor.execute(insert_sql, (timestamp, machine_id, temperature, units_produced, error_flag))
-            self.connection.commit()
+            row = (timestamp, machine_id, temperature, units_produced, error_flag)
+            self._write_readings_batch(insert_sql, [row])
+            publish('machine_readings', rows=1)
+            publish('machines')
             return True
             
         except Error as err:
-            print(f"❌ Error inserting machine reading: {err}")
+            log.error("❌ Error inserting machine reading: %s", err)
+            self.connection.rollback()
+            return False
+
+    def insert_readings_bulk(self, rows, batch_size=1000):
+        """Insert many machine readings with multi-row INSERTs, committing once per batch.
+
+        ``rows`` is an iterable of (timestamp, machine_id, temperature,
+        units_produced, error_flag) tuples. Each batch also updates the
+        machines registry. Returns the number of rows written.
+        """
+        insert_sql = '''
+            INSERT INTO machine_readings (timestamp, machine_id, temperature, units_produced, error_flag)
+            VALUES (%s, %s, %s, %s, %s)
+        '''
+        inserted = 0
+        batch = []
+
+        try:
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    inserted += self._write_readings_batch(insert_sql, batch)
+                    batch = []
+            if batch:
+                inserted += self._write_readings_batch(insert_sql, batch)
+
+        except Error as err:
+            log.error("❌ Error bulk inserting machine readings: %s", err)
+            self.connection.rollback()
+        if inserted:
+            publish('machine_readings', rows=inserted)
+            publish('machines')
+        return inserted
+
+    def _write_readings_batch(self, insert_sql, batch):
+        """Write one batch of readings and its machines' registry rows in a single transaction."""
+        self.cursor.executemany(insert_sql, batch)
+        upsert_sql = self.backend.upsert_sql('machines', MACHINE_COLUMNS, ('machine_id',), MACHINE_MERGE)
+        self.cursor.executemany(upsert_sql, _machine_rows(batch))
+        self.connection.commit()
+        return len(batch)
+
+    def register_machines(self, readings):
+        """Upsert the machines registry from a DataFrame of readings, such as a CSV chunk.
+
+        Readings pushed through ``insert_readings_bulk`` are registered as
+        they are inserted; detection runs over files call this per chunk.
+        Returns False on a database error.
+        """
+        rows = _machine_rows(_newest_readings(readings))
+        if not rows:
+            return True
+        try:
+            upsert_sql = self.backend.upsert_sql('machines', MACHINE_COLUMNS, ('machine_id',), MACHINE_MERGE)
+            self.cursor.executemany(upsert_sql, rows)
+            self.connection.commit()
+            publish('machines')
+            return True
+        except Error as err:
+            log.error("❌ Error updating the machines registry: %s", err)
+            self.connection.rollback()
+            return False
+
+    def update_rollups(self, readings, anomalies=None, source=API_SOURCE, reset=False, watermark=None):
+        """Fold a batch of readings and its anomalies into the rollup tables under ``source``.
+
+        See ``write_rollups`` for ``reset`` and ``watermark``.
+        """
+        rollups = ((table_name, aggregate_rollups(readings, anomalies, freq))
+                   for table_name, freq in ROLLUP_TABLES.items())
+        return self.write_rollups(rollups, source, reset, watermark)
+
+    def write_rollups(self, rollups, source=API_SOURCE, reset=False, watermark=None):
+        """Merge aggregated rollups into the rollup tables in a single transaction.
+
+        ``rollups`` yields (table name, frame from ``aggregate_rollups``)
+        pairs. With ``reset`` the source's existing rollups are deleted first,
+        for a run that re-reads the source from the start. ``watermark`` is
+        (header_hash, byte_offset, rows_processed, last_timestamp): the
+        source's watermark is advanced in the same transaction, so rows are
+        never counted in the rollups without the watermark moving past them.
+        Returns False, with nothing written, on a database error.
+        """
+        try:
+            if reset:
+                for table_name in ROLLUP_TABLES:
+                    self.cursor.execute(f"DELETE FROM {table_name} WHERE source = %s", (source,))
+
+            for table_name, rollup in rollups:
+                if rollup.empty:
+                    continue
+                upsert_sql = self.backend.upsert_sql(table_name, ROLLUP_COLUMNS + ['source'], ROLLUP_KEYS,
+                                                     ROLLUP_MERGE)
+                rows = [
+                    (str(machine_id), bucket.to_pydatetime(), int(reading_count), int(temperature_count),
+                     _db_value(temperature_min), _db_value(temperature_max), _db_value(temperature_sum) or 0,
+                     int(units_sum), int(error_count), int(anomaly_count), source)
+                    for machine_id, bucket, reading_count, temperature_count, temperature_min,
+                        temperature_max, temperature_sum, units_sum, error_count, anomaly_count
+                    in rollup.itertuples(index=False, name=None)
+                ]
+                self.cursor.executemany(upsert_sql, rows)
+
+            if watermark:
+                self._write_watermark(source, *watermark)
+            self.connection.commit()
+            for table_name in ROLLUP_TABLES:
+                publish(table_name)
+            return True
+
+        except Error as err:
+            log.error("❌ Error updating rollups: %s", err)
             self.connection.rollback()
             return False
 
@@ -155,46 +323,192 @@ class DatabaseManager:
             return [dict(zip(columns, row)) for row in results]
             
         except Error as err:
-            print(f"❌ Error fetching anomalies: {err}")
+            log.error("❌ Error fetching anomalies: %s", err)
             return []
 
-    def get_machine_readings(self, hours=24):
-        """Fetch recent machine readings."""
+    def get_machine_readings(self, hours=24, include_archive=False):
+        """Fetch recent machine readings.
+
+        With ``include_archive`` the window also covers readings already moved
+        to the Parquet archive (see archive.py). If the archive can not be
+        read (no pyarrow, a corrupt file) only the database's readings are
+        returned, with a warning.
+        """
+        since = datetime.now() - timedelta(hours=hours)
         try:
             query = '''
                 SELECT timestamp, machine_id, temperature, units_produced, error_flag 
                 FROM machine_readings 
-                WHERE timestamp >= NOW() - INTERVAL %s HOUR 
+                WHERE timestamp >= %s 
                 ORDER BY timestamp DESC
             '''
-            self.cursor.execute(query, (hours,))
+            self.cursor.execute(query, (since,))
             results = self.cursor.fetchall()
             
             columns = ['timestamp', 'machine_id', 'temperature', 'units_produced', 'error_flag']
-            return [dict(zip(columns, row)) for row in results]
+            readings = [dict(zip(columns, row)) for row in results]
+            if include_archive:
+                try:
+                    archived = read_archive(start=since, columns=columns).to_pylist()
+                except ARCHIVE_READ_ERRORS as err:
+                    log.warning("⚠️ Archived readings left out: %s", err)
+                else:
+                    readings += archived
+                    readings.sort(key=lambda reading: reading['timestamp'], reverse=True)
+            return readings
             
         except Error as err:
-            print(f"❌ Error fetching machine readings: {err}")
+            log.error("❌ Error fetching machine readings: %s", err)
             return []
 
     def get_machines(self):
         """Get all registered machines."""
         try:
-            query = 'SELECT machine_id, name, location, status FROM machines'
+            query = 'SELECT machine_id, name, location, status, last_seen FROM machines ORDER BY machine_id'
             self.cursor.execute(query)
             results = self.cursor.fetchall()
             
-            columns = ['machine_id', 'name', 'location', 'status']
+            columns = ['machine_id', 'name', 'location', 'status', 'last_seen']
             return [dict(zip(columns, row)) for row in results]
             
         except Error as err:
-            print(f"❌ Error fetching machines: {err}")
+            log.error("❌ Error fetching machines: %s", err)
             return []
 
+    def get_stale_machines(self, timeout=HEARTBEAT_TIMEOUT):
+        """Get machines with no readings for more than ``timeout`` seconds, longest silent first."""
+        try:
+            query = '''
+                SELECT machine_id, name, location, status, last_seen, last_reading_at
+                FROM machines
+                WHERE last_seen < %s
+                ORDER BY last_seen
+            '''
+            self.cursor.execute(query, (datetime.now() - timedelta(seconds=timeout),))
+            results = self.cursor.fetchall()
+
+            columns = ['machine_id', 'name', 'location', 'status', 'last_seen', 'last_reading_at']
+            return [dict(zip(columns, row)) for row in results]
+
+        except Error as err:
+            log.error("❌ Error fetching stale machines: %s", err)
+            return []
+
+    def get_machine_thresholds(self):
+        """Get per-machine rule thresholds as {machine_id: {rule_name: threshold}}."""
+        try:
+            self.cursor.execute('SELECT machine_id, thresholds FROM machines WHERE thresholds IS NOT NULL')
+            results = self.cursor.fetchall()
+        except Error as err:
+            log.warning("⚠️ Could not load machine thresholds, using rule defaults: %s", err)
+            return {}
+
+        thresholds = {}
+        for machine_id, raw in results:
+            try:
+                thresholds[str(machine_id)] = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+            except ValueError:
+                log.warning("⚠️ Ignoring malformed thresholds for machine %s", machine_id)
+        return thresholds
+
+    def get_watermark(self, source):
+        """Get how far detection has got into an input source, or None if never run."""
+        try:
+            self.cursor.execute('''
+                SELECT header_hash, byte_offset, rows_processed, last_timestamp 
+                FROM detection_watermarks 
+                WHERE source = %s
+            ''', (source,))
+            row = self.cursor.fetchone()
+        except Error as err:
+            log.error("❌ Error fetching watermark: %s", err)
+            return None
+
+        if row is None:
+            return None
+        return dict(zip(['header_hash', 'byte_offset', 'rows_processed', 'last_timestamp'], row))
+
+    def save_watermark(self, source, header_hash, byte_offset, rows_processed, last_timestamp=None):
+        """Record that detection has processed ``source`` up to ``byte_offset``."""
+        try:
+            self._write_watermark(source, header_hash, byte_offset, rows_processed, last_timestamp)
+            self.connection.commit()
+            return True
+        except Error as err:
+            log.error("❌ Error saving watermark: %s", err)
+            self.connection.rollback()
+            return False
+
+    def _write_watermark(self, source, header_hash, byte_offset, rows_processed, last_timestamp=None):
+        upsert_sql = self.backend.upsert_sql('detection_watermarks', WATERMARK_COLUMNS, ('source',),
+                                             {column: 'replace' for column in WATERMARK_COLUMNS[1:]})
+        self.cursor.execute(upsert_sql, (source, header_hash, byte_offset, rows_processed,
+                                         last_timestamp, datetime.now().replace(microsecond=0)))
+
+    def clear_watermarks(self):
+        """Forget how far detection has got into every source, so the next runs read them from the start."""
+        try:
+            self.cursor.execute("DELETE FROM detection_watermarks")
+            self.connection.commit()
+            return True
+        except Error as err:
+            log.error("❌ Error clearing watermarks: %s", err)
+            self.connection.rollback()
+            return False
+
     def close(self):
         """Close database connections."""
         if self.cursor:
             self.cursor.close()
         if self.connection and self.connection.is_connected():
             self.connection.close()
-            print("✅ MySQL connection closed.")
+            log.info("✅ %s connection closed.", self.backend.name)
+
+
+def _machine_rows(readings):
+    """One registry row per machine in ``readings``, carrying its newest reading."""
+    latest = {}
+    for reading in readings:
+        current = latest.get(reading[1])
+        if current is None or reading[0] >= current[0]:
+            latest[reading[1]] = reading
+    seen = datetime.now().replace(microsecond=0)
+    # Sorted so concurrent writers lock machine rows in the same order
+    return [
+        (machine_id, machine_id, 'online', seen, seen, timestamp, temperature, units_produced, error_flag)
+        for machine_id, (timestamp, _, temperature, units_produced, error_flag) in sorted(latest.items())
+    ]
+
+
+def _newest_readings(readings):
+    """The newest reading of each machine in a DataFrame, as reading tuples."""
+    frame = pd.DataFrame({
+        'timestamp': pd.to_datetime(readings['timestamp'], errors='coerce', format='ISO8601'),
+        'machine_id': readings['machine_id'],
+    })
+    for column in ('temperature', 'units_produced', 'error_flag'):
+        frame[column] = pd.to_numeric(readings[column], errors='coerce') if column in readings.columns else math.nan
+    newest = frame.dropna(subset=['timestamp', 'machine_id']).sort_values('timestamp', kind='stable')
+    return [
+        (timestamp.to_pydatetime(), str(machine_id), _db_value(temperature),
+         None if pd.isna(units_produced) else int(units_produced), int(error_flag == 1))
+        for timestamp, machine_id, temperature, units_produced, error_flag
+        in newest.groupby('machine_id', sort=False).tail(1).itertuples(index=False, name=None)
+    ]
+
+
+def _db_value(value):
+    """Convert a numeric anomaly value to something the database accepts."""
+    if value is None:
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def _canonical_timestamps(timestamps):
+    """Parse anomaly timestamps to datetimes; unparseable values become None."""
+    parsed = pd.to_datetime(timestamps, errors='coerce', format='ISO8601')
+    return [None if stamp is pd.NaT else stamp.to_pydatetime() for stamp in parsed]
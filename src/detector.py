@@ -1,53 +1,68 @@
-from database import DatabaseManager
+import os
+import time
+import pandas as pd
+from metrics import counter, histogram
+from log import get_logger
+from rules import RESULT_COLUMNS, DEFAULT_RULES, RuleSet, column, load_rules, with_machine_thresholds
+
+log = get_logger(__name__)
+
+DETECTOR_ROWS = counter('detector_rows_total', 'Readings evaluated by the batch detector.')
+DETECTOR_ANOMALIES = counter('detector_anomalies_total', 'Anomalies found by the batch detector.', ['anomaly_type'])
+DETECTOR_BATCH_SECONDS = histogram('detector_batch_seconds', 'Time to evaluate one batch of readings.')
+
 
 class AnomalyDetector:
     """Anomaly detection logic for manufacturing data."""
-    
-    def __init__(self, db_manager):
+
+    def __init__(self, db_manager, rules_path=None):
+        """Compile the anomaly rules once for this detector.
+
+        Rules come from ``rules_path`` (or the ANOMALY_RULES environment
+        variable) when set, otherwise the built-in defaults; per-machine
+        thresholds stored in the machines table are merged on top.
+        """
         self.db_manager = db_manager
+        rules_path = rules_path or os.environ.get('ANOMALY_RULES')
+        rules = load_rules(rules_path) if rules_path else DEFAULT_RULES
+        if db_manager is not None and db_manager.connection:
+            rules = with_machine_thresholds(rules, db_manager.get_machine_thresholds())
+        self.rules = RuleSet(rules)
+
+    def detect_batch(self, df):
+        """Detect anomalies over a whole DataFrame using column masks.
+
+        Returns a columnar DataFrame with one row per anomaly and the columns
+        machine_id, timestamp, anomaly_type, value, description and severity,
+        ordered the same way a row-by-row scan would emit them.
+        """
+        if df is None or len(df) == 0:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+
+        n = len(df)
+        timestamp = column(df, 'timestamp', n)
+
+        has_timestamp = timestamp.notna().to_numpy()
+        if timestamp.dtype == object:
+            has_timestamp = has_timestamp & (timestamp.astype(str) != '').to_numpy()
+        skipped = n - int(has_timestamp.sum())
+        if skipped:
+            log.warning("⚠️ Warning: %d record(s) missing timestamp were skipped", skipped)
+
+        started = time.perf_counter()
+        anomalies = self.rules.evaluate(df, has_timestamp)
+        DETECTOR_BATCH_SECONDS.observe(time.perf_counter() - started)
+        DETECTOR_ROWS.inc(n)
+        for anomaly_type, count in anomalies['anomaly_type'].value_counts().items():
+            DETECTOR_ANOMALIES.inc(int(count), anomaly_type=anomaly_type)
+        return anomalies
 
     def detect_anomalies(self, record):
         """Detect anomalies in a single record."""
-        machine_id = record.get('machine_id')
-        timestamp = record.get('timestamp')
-        units_produced = record.get('units_produced')
-        temperature = record.get('temperature')
-        error_flag = record.get('error_flag')
-        
-        anomalies_found = []
-        
-        if not timestamp:
-            print(f"⚠️ Warning: Record missing timestamp: {record}")
-            return anomalies_found
-
-        # Low production anomaly
-        if units_produced is not None and units_produced < 50:
-            anomalies_found.append({
-                'machine_id': machine_id,
-                'timestamp': timestamp,
-                'anomaly_type': 'low_production',
-                'value': units_produced,
-                'description': f'Units produced ({units_produced}) below threshold (50).'
-            })
-
-        # High temperature anomaly  
-        if temperature is not None and temperature > 75:
-            anomalies_found.append({
-                'machine_id': machine_id,
-                'timestamp': timestamp,
-                'anomaly_type': 'high_temperature',
-                'value': temperature,
-                'description': f'Temperature ({temperature}) above 75 degrees.'
-            })
-
-        # Error flag anomaly
-        if error_flag == 1:
-            anomalies_found.append({
-                'machine_id': machine_id,
-                'timestamp': timestamp,
-                'anomaly_type': 'error_flag_raised',
-                'value': error_flag,
-                'description': 'Error flag raised.'
-            })
-
-        return anomalies_found
+        if not record.get('timestamp'):
+            log.warning("⚠️ Warning: Record missing timestamp: %s", record)
+            return []
+
+        anomalies = self.detect_batch(pd.DataFrame([record]))
+        return anomalies.to_dict('records')
+
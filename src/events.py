@@ -0,0 +1,104 @@
+"""
+In-process change notifications.
+Write paths publish the name of each table they changed; subscribers such as
+the live-update broadcaster and the dashboard query cache react to those
+events instead of polling the database. Callbacks run on the publishing
+thread, so they must be quick and thread-safe.
+"""
+
+import queue
+import threading
+import time
+
+from metrics import counter
+from log import get_logger
+
+log = get_logger(__name__)
+
+EVENTS_PUBLISHED = counter('events_published_total', 'In-process change notifications, by topic.', ['topic'])
+
+_subscribers = []  # (topics or None for every topic, callback)
+_lock = threading.Lock()
+
+
+def subscribe(callback, *topics):
+    """Call ``callback(topic, **details)`` on every publish to ``topics`` (every topic if none given)."""
+    with _lock:
+        _subscribers.append((frozenset(topics) or None, callback))
+    return callback
+
+
+def unsubscribe(callback):
+    with _lock:
+        _subscribers[:] = [entry for entry in _subscribers if entry[1] is not callback]
+
+
+def publish(topic, **details):
+    """Notify subscribers that ``topic`` (a table name) changed."""
+    EVENTS_PUBLISHED.inc(topic=topic)
+    with _lock:
+        callbacks = [callback for topics, callback in _subscribers if topics is None or topic in topics]
+    for callback in callbacks:
+        try:
+            callback(topic, **details)
+        except Exception as e:
+            log.error("❌ Event subscriber failed on %s: %s", topic, e)
+
+
+class Debouncer:
+    """Coalesce a burst of events into one action.
+
+    ``due()`` becomes true once events have stopped for ``quiet`` seconds, or
+    ``max_delay`` seconds after the first event of a burst that keeps going,
+    and then resets. A consumer thread can block in ``wait()`` instead of
+    polling ``due()``; ``touch()`` wakes it through a thread-safe queue.
+    """
+
+    def __init__(self, quiet=0.25, max_delay=1.0):
+        self.quiet = quiet
+        self.max_delay = max_delay
+        self._first = None
+        self._last = None
+        self._lock = threading.Lock()
+        self._wakeups = queue.Queue(maxsize=1)
+
+    def touch(self, *args, **kwargs):
+        """Record an event; the signature lets it be subscribed directly."""
+        now = time.monotonic()
+        with self._lock:
+            if self._first is None:
+                self._first = now
+            self._last = now
+        try:
+            self._wakeups.put_nowait(None)
+        except queue.Full:  # A wakeup is already pending
+            pass
+
+    def due(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._first is None:
+                return False
+            if now - self._last >= self.quiet or now - self._first >= self.max_delay:
+                self._first = self._last = None
+                return True
+            return False
+
+    def wait(self, timeout):
+        """Block until ``due()`` (returns True) or until ``timeout`` seconds pass with nothing due (False)."""
+        deadline = time.monotonic() + timeout
+        while not self.due():
+            now = time.monotonic()
+            with self._lock:
+                pending = self._first is not None
+                if pending:  # A burst settles within max_delay, even past the deadline
+                    remaining = min(self._last + self.quiet, self._first + self.max_delay) - now
+            if not pending:
+                remaining = deadline - now
+                if remaining <= 0:
+                    return False
+            try:
+                self._wakeups.get(timeout=max(remaining, 0.001))
+            except queue.Empty:
+                pass
+        return True
@@ -0,0 +1,172 @@
+"""
+Streaming export of anomalies and machine readings.
+Rows are read from an unbuffered server-side cursor in fixed-size chunks and
+appended to CSV (optionally gzip-compressed) or Parquet as they arrive, so
+memory stays flat however many rows match.
+"""
+
+import gzip
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional; CSV only needs pandas
+    pa = pq = None
+
+from log import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_CHUNK_ROWS = 50000
+
+EXPORT_COLUMNS = {
+    'anomalies': ['id', 'timestamp', 'machine_id', 'anomaly_type', 'value', 'message'],
+    'machine_readings': ['id', 'timestamp', 'machine_id', 'temperature', 'units_produced', 'error_flag'],
+}
+TABLE_ALIASES = {'readings': 'machine_readings'}
+
+CSV = 'csv'
+CSV_GZIP = 'csv.gz'
+PARQUET = 'parquet'
+FORMATS = (CSV, CSV_GZIP, PARQUET)
+
+# Column dtypes shared by every chunk, so CSV and Parquet output stays consistent
+FLOAT_COLUMNS = ('value', 'temperature')
+INT_COLUMNS = {'id': 'Int64', 'units_produced': 'Int64', 'error_flag': 'Int8'}
+
+
+def format_for(path, fmt=None):
+    """Pick the output format from ``fmt`` or the file extension."""
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+        return fmt
+    if path.endswith('.parquet'):
+        return PARQUET
+    if path.endswith('.gz'):
+        return CSV_GZIP
+    return CSV
+
+
+def export_query(table, start=None, end=None, machine_ids=None):
+    """Build the SELECT for an export; ``start`` is inclusive and ``end`` exclusive."""
+    clauses = []
+    params = []
+    if start:
+        clauses.append('timestamp >= %s')
+        params.append(start)
+    if end:
+        clauses.append('timestamp < %s')
+        params.append(end)
+    if machine_ids:
+        clauses.append(f"machine_id IN ({', '.join(['%s'] * len(machine_ids))})")
+        params.extend(machine_ids)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    return f"SELECT {', '.join(EXPORT_COLUMNS[table])} FROM {table} {where} ORDER BY timestamp, id", params
+
+
+def export_table(backend, table, path, fmt=None, start=None, end=None, machine_ids=None,
+                 chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Stream every matching row of ``table`` to ``path``; returns the number of rows written.
+
+    ``table`` is 'anomalies' or 'machine_readings' (or 'readings'). The export
+    uses its own connection on ``backend``, since an unbuffered result keeps
+    the connection busy until it has been read to the end.
+    """
+    table = TABLE_ALIASES.get(table, table)
+    if table not in EXPORT_COLUMNS:
+        raise ValueError(f"Unknown table {table!r}; expected anomalies or machine_readings")
+    fmt = format_for(path, fmt)
+    if fmt == PARQUET and pq is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+
+    columns = EXPORT_COLUMNS[table]
+    query, params = export_query(table, start, end, machine_ids)
+    started = time.perf_counter()
+    written = 0
+
+    connection = backend.connect()
+    cursor = connection.cursor(buffered=False)
+    writer = _open_writer(path, fmt, table)
+    try:
+        cursor.execute(query, tuple(params))
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            writer.write(rows_frame(rows, columns))
+            written += len(rows)
+            log.debug("📦 Exported %d %s rows so far", written, table)
+    finally:
+        writer.close()
+        cursor.close()
+        connection.close()
+
+    elapsed = time.perf_counter() - started
+    rate = written / elapsed if elapsed > 0 else 0
+    print(f"✅ Exported {written:,} {table} rows to {path} in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+    return written
+
+
+def rows_frame(rows, columns):
+    """Turn one chunk of row tuples into a DataFrame with stable dtypes."""
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+    for name in FLOAT_COLUMNS:
+        if name in df:
+            df[name] = pd.to_numeric(df[name], errors='coerce').astype('float64')
+    for name, dtype in INT_COLUMNS.items():
+        if name in df:
+            df[name] = pd.to_numeric(df[name], errors='coerce').astype(dtype)
+    return df
+
+
+def arrow_schema(table):
+    types = {
+        'id': pa.int64(),
+        'timestamp': pa.timestamp('us'),
+        'machine_id': pa.string(),
+        'anomaly_type': pa.string(),
+        'value': pa.float64(),
+        'message': pa.string(),
+        'temperature': pa.float64(),
+        'units_produced': pa.int64(),
+        'error_flag': pa.int8(),
+    }
+    return pa.schema([(name, types[name]) for name in EXPORT_COLUMNS[table]])
+
+
+class _CsvWriter:
+    def __init__(self, path, compress):
+        self.file = gzip.open(path, 'wt', newline='') if compress else open(path, 'w', newline='')
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    """Appends each chunk as a row group, so the file is never held in memory."""
+
+    def __init__(self, path, table):
+        self.schema = arrow_schema(table)
+        self.writer = pq.ParquetWriter(path, self.schema, compression='snappy')
+
+    def write(self, df):
+        self.writer.write_table(pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        self.writer.close()
+
+
+def _open_writer(path, fmt, table):
+    if fmt == PARQUET:
+        return _ParquetWriter(path, table)
+    return _CsvWriter(path, compress=fmt == CSV_GZIP)
@@ -0,0 +1,295 @@
+"""
+HTTP ingest of machine readings.
+Pushed batches are validated cheaply on the request thread and handed to a
+bounded in-memory queue; a background writer drains it in size- or
+time-triggered batches, bulk-inserting the readings and running anomaly
+detection on each batch. A batch the database rejects is retried and stays
+counted against the queue meanwhile, so an outage turns into a full queue,
+which is reported back to the caller instead of growing without bound.
+Readings already written are never inserted again: if only their anomalies
+or rollups failed, the retry repeats detection alone.
+"""
+
+import atexit
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from database import DatabaseManager
+from detector import AnomalyDetector
+from metrics import counter, gauge, histogram
+from log import RunSummary, get_logger
+
+log = get_logger(__name__)
+
+READING_COLUMNS = ['timestamp', 'machine_id', 'temperature', 'units_produced', 'error_flag']
+MAX_REQUEST_ROWS = 10000
+MAX_REQUEST_BYTES = 4 * 1024 * 1024
+MAX_QUEUED_ROWS = 100000
+BATCH_ROWS = 2000
+MAX_BATCH_DELAY = 0.5  # seconds a reading may wait for its batch to fill
+WRITE_RETRY_DELAYS = (0.5, 1, 2, 4)  # seconds before each retry of a batch the database rejected
+MAX_REPORTED_ERRORS = 10
+SUMMARY_SECONDS = 60
+
+INGEST_ROWS = counter('ingest_rows_total',
+                      'Pushed readings by result (accepted, rejected, written, failed, undetected).', ['result'])
+INGEST_QUEUED_ROWS = gauge('ingest_queued_rows', 'Readings waiting for the background writer.')
+INGEST_BATCH_SECONDS = histogram('ingest_batch_seconds', 'Time to write and detect one ingest batch.')
+
+
+class InvalidReadings(ValueError):
+    """Raised when a pushed batch fails validation; ``errors`` lists what was wrong."""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def parse_readings(body, content_type=''):
+    """Parse and validate a pushed batch into reading tuples.
+
+    ``body`` is either a JSON array of reading objects (optionally wrapped as
+    ``{"readings": [...]}``) or, for an ``application/x-ndjson`` content type,
+    one object per line. Each object needs ``timestamp`` (ISO 8601) and
+    ``machine_id``; ``temperature``, ``units_produced`` and ``error_flag`` are
+    optional. The whole batch is rejected if any row is invalid.
+    """
+    try:
+        text = body.decode('utf-8') if isinstance(body, bytes) else body
+        if 'ndjson' in (content_type or ''):
+            items = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            items = json.loads(text)
+            if isinstance(items, dict):
+                items = items.get('readings')
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise InvalidReadings([f'body is not valid JSON: {e}'])
+
+    if not isinstance(items, list):
+        raise InvalidReadings(['expected a list of readings'])
+    if not items:
+        raise InvalidReadings(['no readings in request'])
+    if len(items) > MAX_REQUEST_ROWS:
+        raise InvalidReadings([f'at most {MAX_REQUEST_ROWS} readings per request, got {len(items)}'])
+
+    rows = []
+    errors = []
+    for i, item in enumerate(items):
+        try:
+            rows.append(_validate(item))
+        except ValueError as e:
+            errors.append(f'reading {i}: {e}')
+            if len(errors) >= MAX_REPORTED_ERRORS:
+                break
+    if errors:
+        raise InvalidReadings(errors)
+    return rows
+
+
+def _validate(item):
+    if not isinstance(item, dict):
+        raise ValueError('not an object')
+
+    machine_id = item.get('machine_id')
+    if not isinstance(machine_id, str) or not 0 < len(machine_id) <= 50:
+        raise ValueError('machine_id must be a string of 1-50 characters')
+
+    try:
+        timestamp = datetime.fromisoformat(item['timestamp'])
+    except KeyError:
+        raise ValueError('missing timestamp')
+    except (TypeError, ValueError):
+        raise ValueError(f"timestamp {item['timestamp']!r} is not ISO 8601")
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+    temperature = item.get('temperature')
+    if temperature is not None and (isinstance(temperature, bool) or not isinstance(temperature, (int, float))):
+        raise ValueError('temperature must be a number')
+
+    units_produced = item.get('units_produced')
+    if units_produced is not None and (isinstance(units_produced, bool) or not isinstance(units_produced, int)):
+        raise ValueError('units_produced must be an integer')
+
+    error_flag = item.get('error_flag') or 0
+    if error_flag not in (0, 1):
+        raise ValueError('error_flag must be 0, 1 or a boolean')
+
+    return (timestamp, machine_id, temperature, units_produced, int(error_flag))
+
+
+class ReadingWriter:
+    """Background writer draining a bounded queue of readings in batches.
+
+    A batch is written once ``batch_rows`` readings are queued or the oldest
+    has waited ``max_delay`` seconds. ``submit`` never blocks: it returns
+    False when the batch would not fit in ``max_queued_rows``, which also
+    counts the batch being written. A batch the database rejects is retried
+    after each of ``retry_delays`` before it is dropped.
+    """
+
+    def __init__(self, rules_path=None, max_queued_rows=MAX_QUEUED_ROWS, batch_rows=BATCH_ROWS,
+                 max_delay=MAX_BATCH_DELAY, db_factory=DatabaseManager, retry_delays=WRITE_RETRY_DELAYS):
+        self.rules_path = rules_path
+        self.max_queued_rows = max_queued_rows
+        self.batch_rows = batch_rows
+        self.max_delay = max_delay
+        self.db_factory = db_factory
+        self.retry_delays = retry_delays
+        self._pending = deque()
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+    @property
+    def queued(self):
+        return len(self._pending) + self._in_flight
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the writer thread; returns False if already running."""
+        if self.running:
+            return False
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='reading-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        return True
+
+    def stop(self, timeout=10):
+        """Write whatever is still queued, then stop the writer thread."""
+        if not self.running:
+            return False
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join(timeout)
+        return True
+
+    def submit(self, rows):
+        """Queue validated reading tuples; returns False if the queue is full."""
+        with self._condition:
+            if len(self._pending) + self._in_flight + len(rows) > self.max_queued_rows:
+                INGEST_ROWS.inc(len(rows), result='rejected')
+                return False
+            self._pending.extend(rows)
+            INGEST_QUEUED_ROWS.set(self.queued)
+            self._condition.notify()
+        INGEST_ROWS.inc(len(rows), result='accepted')
+        return True
+
+    def _next_batch(self):
+        """Wait for a full batch or the batch delay, then take up to ``batch_rows`` readings."""
+        with self._condition:
+            while not self._pending and not self._stopping:
+                self._condition.wait()
+            deadline = time.monotonic() + self.max_delay
+            while len(self._pending) < self.batch_rows and not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            count = min(len(self._pending), self.batch_rows)
+            batch = [self._pending.popleft() for _ in range(count)]
+            self._in_flight = count
+            return batch
+
+    def _run(self):
+        db_manager = self.db_factory()
+        detector = AnomalyDetector(db_manager, self.rules_path)
+        summary = RunSummary(log, 'Reading ingest')
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch:
+                    self._write_with_retries(db_manager, detector, batch, summary)
+                elif self._stopping:
+                    break
+                if time.perf_counter() - summary.started >= SUMMARY_SECONDS:
+                    if summary.counts:
+                        summary.log()
+                    summary = RunSummary(log, 'Reading ingest')
+        finally:
+            if summary.counts:
+                summary.log()
+            db_manager.close()
+
+    def _write_with_retries(self, db_manager, detector, batch, summary):
+        """Write a batch, retrying while the database rejects it; it stays counted as queued until done."""
+        written = False
+        try:
+            for delay in (*self.retry_delays, None):
+                batch, written = self._write(db_manager, detector, batch, summary, written)
+                if not batch:
+                    return
+                if delay is None:
+                    break
+                if written:
+                    log.warning("⚠️ Could not store anomalies for %d pushed readings, retrying in %ss",
+                                len(batch), delay)
+                else:
+                    log.warning("⚠️ Could not write %d pushed readings, retrying in %ss", len(batch), delay)
+                time.sleep(delay)
+            if written:
+                log.error("❌ Anomalies and rollups lost for %d written readings after %d attempts",
+                          len(batch), len(self.retry_delays) + 1)
+                INGEST_ROWS.inc(len(batch), result='undetected')
+                summary.add(undetected=len(batch))
+            else:
+                log.error("❌ Database unavailable, dropped %d pushed readings after %d attempts",
+                          len(batch), len(self.retry_delays) + 1)
+                INGEST_ROWS.inc(len(batch), result='failed')
+                summary.add(failed=len(batch))
+        finally:
+            with self._condition:
+                self._in_flight = 0
+                INGEST_QUEUED_ROWS.set(self.queued)
+
+    def _write(self, db_manager, detector, batch, summary, written=False):
+        """Insert one batch of readings and detect anomalies in it.
+
+        Returns (readings left to retry, whether they are already written).
+        With ``written`` the readings are in the database and only their
+        anomalies and rollups are stored.
+        """
+        started = time.perf_counter()
+        if not (db_manager.connection and db_manager.connection.is_connected()):
+            db_manager.connect()
+        if not (db_manager.connection and db_manager.connection.is_connected()):
+            return batch, written
+
+        if not written:
+            inserted = db_manager.insert_readings_bulk(batch, batch_size=len(batch))
+            if inserted < len(batch):
+                return batch[inserted:], False
+            INGEST_ROWS.inc(inserted, result='written')
+            summary.add(rows=inserted, batches=1)
+
+        # Anomalies are upserted and the rollups commit as a whole, so this step is safe to repeat
+        try:
+            readings = pd.DataFrame(batch, columns=READING_COLUMNS)
+            found = detector.detect_batch(readings)
+            anomalies = db_manager.insert_anomalies_bulk(found)
+            if anomalies < len(found):
+                log.error("❌ Only %d of %d anomalies in pushed readings were written", anomalies, len(found))
+                return batch, True
+            if not db_manager.update_rollups(readings, found):
+                log.error("❌ Rollups for %d pushed readings were not written", len(batch))
+                return batch, True
+        except Exception as e:
+            log.error("❌ Error detecting anomalies in pushed readings: %s", e)
+            return batch, True
+
+        INGEST_BATCH_SECONDS.observe(time.perf_counter() - started)
+        summary.add(anomalies=anomalies)
+        log.debug("📥 Wrote %d pushed readings, %d anomalies", len(batch), anomalies)
+        return [], True
@@ -0,0 +1,162 @@
+"""
+Non-blocking logging for hot paths.
+Records are handed to a bounded queue and written by a background thread, so
+callers never wait on console I/O. Repeats of the same message are
+rate-limited, and RunSummary replaces per-row chatter with one line per run.
+
+Set LOG_LEVEL (DEBUG, INFO, WARNING, ...) and LOG_FORMAT=json to change the
+output; per-row and per-tick detail is logged at DEBUG.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+ROOT_LOGGER = 'intellifactory'
+QUEUE_SIZE = 10000
+REPEAT_INTERVAL = 10.0  # seconds a repeated message stays suppressed
+MAX_TRACKED_MESSAGES = 1000
+
+_lock = threading.Lock()
+_state = {'pid': None, 'queue': None, 'listener': None, 'dropped': 0}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        return json.dumps(entry, default=str)
+
+
+class RepeatFilter(logging.Filter):
+    """Let an identical message through at most once per ``interval`` seconds.
+
+    Messages are keyed by logger, level and formatted text; the next copy
+    that gets through reports how many were suppressed in between.
+    """
+
+    def __init__(self, interval=REPEAT_INTERVAL):
+        super().__init__()
+        self.interval = interval
+        self._seen = {}  # key -> [last emitted at, suppressed count]
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Forget every message seen; used in forked workers, where the lock may be held."""
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.levelno, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen and now - seen[0] < self.interval:
+                seen[1] += 1
+                return False
+            suppressed = seen[1] if seen else 0
+            self._seen[key] = [now, 0]
+            if len(self._seen) > MAX_TRACKED_MESSAGES:
+                self._seen = {k: v for k, v in self._seen.items() if now - v[0] < self.interval}
+        if suppressed:
+            record.msg = f'{record.msg} (repeated {suppressed} more times)'
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the writer falls behind."""
+
+    def enqueue(self, record):
+        if _state['pid'] != os.getpid():
+            _start()  # forked worker: the parent's writer thread did not come along
+        try:
+            _state['queue'].put_nowait(record)
+        except queue.Full:
+            _state['dropped'] += 1
+
+
+def _start():
+    """Create the queue and writer thread for this process."""
+    with _lock:
+        if _state['pid'] == os.getpid():
+            return
+        stream = logging.StreamHandler(sys.stdout)
+        if os.environ.get('LOG_FORMAT', '').lower() == 'json':
+            stream.setFormatter(JsonFormatter())
+        else:
+            stream.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(name)s: %(message)s', '%H:%M:%S'))
+
+        _state['queue'] = queue.Queue(QUEUE_SIZE)
+        _state['listener'] = logging.handlers.QueueListener(_state['queue'], stream)
+        _state['listener'].start()
+        _state['pid'] = os.getpid()
+
+
+def configure(level=None):
+    """Attach the queue handler to the package logger; safe to call repeatedly."""
+    root = logging.getLogger(ROOT_LOGGER)
+    if not root.handlers:
+        handler = DroppingQueueHandler(None)
+        repeats = RepeatFilter()
+        handler.addFilter(repeats)
+        os.register_at_fork(after_in_child=repeats.reset)
+        root.addHandler(handler)
+        root.propagate = False
+        atexit.register(flush)
+    root.setLevel(level or os.environ.get('LOG_LEVEL', 'INFO').upper())
+    _start()
+    return root
+
+
+def get_logger(name):
+    """Return a logger under the package root, configuring output on first use."""
+    if not logging.getLogger(ROOT_LOGGER).handlers:
+        configure()
+    return logging.getLogger(f'{ROOT_LOGGER}.{name.rsplit(".", 1)[-1]}')
+
+
+def flush():
+    """Block until every queued record has been written.
+
+    Call before a worker process exits; process pools skip atexit handlers.
+    """
+    listener = _state['listener']
+    if listener is None or _state['pid'] != os.getpid():
+        return
+    listener.stop()
+    if _state['dropped']:
+        print(f"⚠️ Logging queue was full, dropped {_state['dropped']} records", flush=True)
+        _state['dropped'] = 0
+    listener.start()
+
+
+class RunSummary:
+    """Accumulate counts over a run and log them as one summary line."""
+
+    def __init__(self, logger, name):
+        self.logger = logger
+        self.name = name
+        self.counts = {}
+        self.started = time.perf_counter()
+
+    def add(self, **counts):
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+
+    def log(self, level=logging.INFO):
+        elapsed = time.perf_counter() - self.started
+        parts = ' '.join(f'{key}={value}' for key, value in self.counts.items())
+        self.logger.log(level, '📊 %s: %s elapsed=%.2fs', self.name, parts, elapsed,
+                        extra={'fields': dict(self.counts, run=self.name, elapsed=round(elapsed, 3))})
+        return elapsed
@@ -1,12 +1,27 @@
+import argparse
+import io
+import time
 import pandas as pd
 from database import DatabaseManager
 from detector import AnomalyDetector
+from csv_stream import (iter_csv_chunks, read_complete_lines, drop_unparseable_timestamps, start_position,
+                        watermark_for, source_id)
+from streaming_detector import StreamingDetector
+from parallel import run_parallel_detection
 
-def run_anomaly_detection(csv_file_path):
-    """Run anomaly detection on CSV data."""
+DEFAULT_CHUNK_ROWS = 100000
+
+def run_anomaly_detection(csv_file_path, rules_path=None, full=False):
+    """Run anomaly detection on the rows of a CSV file not processed yet.
+
+    Only rows past the file's watermark are read, and anomalies are upserted
+    on (machine_id, timestamp, anomaly_type), so re-running over a growing or
+    overlapping file neither repeats work nor creates duplicates, and the
+    anomalies table is never emptied. ``full`` re-detects the whole file.
+    """
     try:
-        df = pd.read_csv(csv_file_path)
-    except Exception as e:
+        csv_file = open(csv_file_path, 'rb')
+    except OSError as e:
         print(f"❌ Error reading CSV file: {e}")
         return
 
@@ -14,42 +29,153 @@ def run_anomaly_detection(csv_file_path):
     
     if db_manager.connection and db_manager.connection.is_connected():
         try:
-            # Clear old anomalies
-            db_manager.cursor.execute("DELETE FROM anomalies")
-            db_manager.connection.commit()
-            print("✅ Cleared old anomalies from the database.")
+            header = csv_file.readline()
+            offset, rows_done = start_position(db_manager, csv_file_path, header, full)
+            csv_file.seek(offset)
+            try:
+                df = drop_unparseable_timestamps(pd.read_csv(io.BytesIO(header + read_complete_lines(csv_file))))
+            except Exception as e:
+                print(f"❌ Error reading CSV file: {e}")
+                return
+
+            if df.empty:
+                print("✅ No new rows since the last run.")
+                return
             
-            detector = AnomalyDetector(db_manager)
+            detector = AnomalyDetector(db_manager, rules_path)
             
-            for _, row in df.iterrows():
-                record = row.to_dict()
-                anomalies = detector.detect_anomalies(record)
-                
-                for anomaly in anomalies:
-                    db_manager.insert_anomaly(
-                        anomaly['timestamp'],
-                        anomaly['machine_id'], 
-                        anomaly['anomaly_type'],
-                        anomaly['value'],
-                        anomaly['description']
-                    )
+            anomalies = detector.detect_batch(df)
+            
+            written = db_manager.insert_anomalies_bulk(anomalies)
+            if written < len(anomalies):
+                print("❌ Anomalies were not fully written; the watermark was not advanced.")
+                return
+            if not db_manager.register_machines(df):
+                print("❌ Machines registry was not updated; the watermark was not advanced.")
+                return
+            # Rollups and the watermark commit together, so a retry never counts rows twice
+            watermark = watermark_for(header, csv_file.tell(), rows_done + len(df), df)
+            if not db_manager.update_rollups(df, anomalies, source_id(csv_file_path),
+                                             reset=offset == len(header), watermark=watermark):
+                print("❌ Rollups were not written; the watermark was not advanced.")
+                return
             
-            # Show all anomalies in database
-            print("\n🔍 All anomalies in database:")
-            all_anomalies = db_manager.get_recent_anomalies()
-            for anomaly in all_anomalies:
+            # Show the most recent anomalies in database
+            print("\n🔍 Recent anomalies in database:")
+            for anomaly in db_manager.get_recent_anomalies():
                 print(anomaly)
                 
-            print(f"\n📊 Total anomalies detected: {len(all_anomalies)}")
+            print(f"\n📊 Processed {len(df)} new rows, anomalies detected: {written}")
             
         except Exception as e:
             print(f"❌ Error during anomaly detection: {e}")
         finally:
+            csv_file.close()
             db_manager.close()
     else:
         print("❌ Database connection failed.")
+        csv_file.close()
+
+def run_streaming_detection(csv_file_path, chunk_rows=DEFAULT_CHUNK_ROWS, resume=False, adaptive_state=None,
+                            rules_path=None, full=False):
+    """Run anomaly detection on CSV data one chunk at a time.
+
+    Each chunk is detected and written before the next is read, so memory
+    stays flat regardless of file size. Every chunk's rollups are committed
+    in one transaction with the file's byte-offset watermark, so an
+    interrupted run continues after the last committed chunk instead of
+    starting over or counting rows twice. Like ``run_anomaly_detection``, a
+    run starts from the watermark unless ``full`` is set; ``resume`` is
+    kept for callers of the old checkpoint files and changes nothing.
+
+    With ``adaptive_state`` set, the adaptive StreamingDetector also runs
+    on every chunk and its per-machine state is loaded from and saved to
+    that file, so a restart picks up the learned baselines.
+    """
+    try:
+        csv_file = open(csv_file_path, 'rb')
+    except OSError as e:
+        print(f"❌ Error reading CSV file: {e}")
+        return
+
+    db_manager = DatabaseManager()
+
+    if not (db_manager.connection and db_manager.connection.is_connected()):
+        print("❌ Database connection failed.")
+        csv_file.close()
+        return
+
+    try:
+        header = csv_file.readline()
+        offset, total_rows = start_position(db_manager, csv_file_path, header, full)
+        csv_file.seek(offset)
+        reset = offset == len(header)
+        total_anomalies = 0
+
+        detector = AnomalyDetector(db_manager, rules_path)
+        adaptive = None
+        if adaptive_state:
+            adaptive = StreamingDetector()
+            if adaptive.load(adaptive_state):
+                print(f"✅ Restored adaptive detector state for {len(adaptive.states)} machines")
+        started = time.perf_counter()
+
+        for chunk in iter_csv_chunks(csv_file, header, chunk_rows):
+            anomalies = detector.detect_batch(chunk)
+            if adaptive:
+                anomalies = pd.concat([anomalies, adaptive.process(chunk)], ignore_index=True)
+            written = db_manager.insert_anomalies_bulk(anomalies)
+            if written < len(anomalies):
+                print("❌ Chunk was not fully written; stopping so it is retried on resume.")
+                return
+
+            if not db_manager.register_machines(chunk):
+                print("❌ Machines registry was not updated; stopping so the chunk is retried on resume.")
+                return
+            total_rows += len(chunk)
+            watermark = watermark_for(header, csv_file.tell(), total_rows, chunk)
+            if not db_manager.update_rollups(chunk, anomalies, source_id(csv_file_path), reset=reset,
+                                             watermark=watermark):
+                print("❌ Chunk rollups were not written; stopping so it is retried on resume.")
+                return
+            reset = False
+            total_anomalies += written
+            if adaptive:
+                adaptive.save(adaptive_state)
+            print(f"📦 Processed {total_rows} rows, {total_anomalies} anomalies so far")
+
+        elapsed = time.perf_counter() - started
+        print(f"\n📊 Streamed to row {total_rows} in {elapsed:.2f}s, anomalies detected this run: {total_anomalies}")
+
+    except Exception as e:
+        print(f"❌ Error during anomaly detection: {e}")
+    finally:
+        csv_file.close()
+        db_manager.close()
 
 if __name__ == '__main__':
-    csv_file_path = r'data/manufacturing_logs.csv'
+    parser = argparse.ArgumentParser(description='Run anomaly detection on a manufacturing log CSV.')
+    parser.add_argument('csv_file_path', nargs='?', default=r'data/manufacturing_logs.csv')
+    parser.add_argument('--chunk-rows', type=int, default=0,
+                        help='stream the file in chunks of this many rows (0 loads it whole)')
+    parser.add_argument('--resume', action='store_true',
+                        help='stream the file; every run continues from its last committed chunk')
+    parser.add_argument('--adaptive-state', metavar='PATH',
+                        help='also run adaptive z-score/drift/spike detection, keeping its state in PATH')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='detect in parallel on this many processes, sharded by machine_id')
+    parser.add_argument('--rules', metavar='PATH',
+                        help='JSON rule definitions to use instead of the built-in thresholds')
+    parser.add_argument('--full', action='store_true',
+                        help='re-detect the whole file instead of only rows added since the last run')
+    args = parser.parse_args()
+
+    csv_file_path = args.csv_file_path
     print(f"📁 Reading CSV file: {csv_file_path}")
-    run_anomaly_detection(csv_file_path)
+    if args.workers > 1:
+        run_parallel_detection(csv_file_path, args.workers, args.chunk_rows or DEFAULT_CHUNK_ROWS, args.rules, args.full)
+    elif args.chunk_rows or args.resume or args.adaptive_state:
+        run_streaming_detection(csv_file_path, args.chunk_rows or DEFAULT_CHUNK_ROWS, args.resume,
+                                args.adaptive_state, args.rules, args.full)
+    else:
+        run_anomaly_detection(csv_file_path, args.rules, args.full)
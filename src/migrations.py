@@ -0,0 +1,186 @@
+"""
+Versioned schema migrations.
+``create_tables`` builds the current schema for a new database; migrations
+bring a database created by an older version up to it in place. Each
+migration runs once, in order, and is recorded in schema_migrations. Every
+step checks the catalog first, so a migration is a no-op on a database that
+already has the change, and is safe to re-run if it was interrupted (MySQL
+DDL is not transactional).
+"""
+
+from storage import Error
+from rollups import ROLLUP_TABLES, ROLLUP_COLUMNS
+from log import get_logger
+
+log = get_logger(__name__)
+
+SCHEMA_MIGRATIONS_SQL = '''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+READING_COVER = ('temperature', 'units_produced', 'error_flag')
+
+
+def add_index(cursor, backend, table, name, columns, unique=False):
+    if not backend.index_exists(cursor, table, name):
+        cursor.execute(backend.create_index_sql(table, name, columns, unique))
+        log.info("✅ Added index %s on %s (%s)", name, table, ', '.join(columns))
+
+
+def drop_index(cursor, backend, table, name):
+    if backend.index_exists(cursor, table, name):
+        cursor.execute(backend.drop_index_sql(table, name))
+        log.info("✅ Dropped index %s on %s", name, table)
+
+
+def anomaly_unique_key(cursor, backend):
+    """Key anomalies on (machine_id, timestamp, anomaly_type) so re-detection can upsert.
+
+    Duplicates left by older full re-runs are removed first, keeping the
+    newest copy of each anomaly.
+    """
+    if not backend.index_exists(cursor, 'anomalies', 'uq_anomaly'):
+        cursor.execute('''
+            DELETE FROM anomalies WHERE id NOT IN (
+                SELECT id FROM (
+                    SELECT MAX(id) AS id FROM anomalies GROUP BY machine_id, timestamp, anomaly_type
+                ) AS newest
+            )
+        ''')
+        if cursor.rowcount:
+            log.info("🧹 Removed %d duplicate anomalies", cursor.rowcount)
+        add_index(cursor, backend, 'anomalies', 'uq_anomaly', ('machine_id', 'timestamp', 'anomaly_type'), unique=True)
+    # Earlier SQLite databases named the same key differently
+    drop_index(cursor, backend, 'anomalies', 'uq_anomalies_key')
+
+
+def machine_thresholds(cursor, backend):
+    """Add the per-machine rule thresholds column."""
+    if not backend.column_exists(cursor, 'machines', 'thresholds'):
+        column_type = 'JSON' if backend.name == 'MySQL' else 'TEXT'
+        cursor.execute(f"ALTER TABLE machines ADD COLUMN thresholds {column_type}")
+        log.info("✅ Added machines.thresholds")
+
+
+def hot_query_indexes(cursor, backend):
+    """Replace single-column indexes with composite and covering ones for the hot reads.
+
+    Reads filter on machine and time together and sort by timestamp, so the
+    readings indexes lead with (machine_id, timestamp) or timestamp and carry
+    every column those queries select (the primary key rides along in both
+    engines). uq_anomaly already leads with (machine_id, timestamp), which
+    makes the anomalies machine_id index redundant; type filters get
+    (anomaly_type, timestamp).
+    """
+    add_index(cursor, backend, 'machine_readings', 'idx_readings_machine_time',
+              ('machine_id', 'timestamp') + READING_COVER)
+    add_index(cursor, backend, 'machine_readings', 'idx_readings_time',
+              ('timestamp', 'machine_id') + READING_COVER)
+    add_index(cursor, backend, 'anomalies', 'idx_anomalies_type_time', ('anomaly_type', 'timestamp'))
+
+    # Old MySQL and SQLite names of the indexes these supersede
+    for name in ('idx_timestamp', 'idx_machine_id', 'idx_readings_timestamp', 'idx_readings_machine_id'):
+        drop_index(cursor, backend, 'machine_readings', name)
+    for name in ('idx_machine_id', 'idx_type', 'idx_anomalies_machine_id', 'idx_anomalies_type'):
+        drop_index(cursor, backend, 'anomalies', name)
+
+
+REGISTRY_COLUMNS = [
+    ('first_seen', 'TIMESTAMP NULL'),
+    ('last_reading_at', 'DATETIME NULL'),
+    ('last_temperature', 'DECIMAL(5,2)'),
+    ('last_units_produced', 'INT'),
+    ('last_error_flag', 'BOOLEAN'),
+]
+
+
+def machine_registry(cursor, backend):
+    """Turn machines into a registry maintained by ingest, seeded from existing readings.
+
+    Adds the first-seen and latest-reading columns, then registers every
+    machine that already has readings, so listing machines no longer needs
+    a DISTINCT scan of machine_readings.
+    """
+    for column, column_type in REGISTRY_COLUMNS:
+        if not backend.column_exists(cursor, 'machines', column):
+            cursor.execute(f"ALTER TABLE machines ADD COLUMN {column} {column_type}")
+            log.info("✅ Added machines.%s", column)
+
+    cursor.execute('''
+        INSERT INTO machines (machine_id, name, first_seen, last_seen, last_reading_at)
+        SELECT machine_id, machine_id, MIN(timestamp), MAX(timestamp), MAX(timestamp)
+        FROM machine_readings
+        WHERE machine_id NOT IN (SELECT machine_id FROM machines)
+        GROUP BY machine_id
+    ''')
+    if cursor.rowcount > 0:
+        log.info("✅ Registered %d machines from existing readings", cursor.rowcount)
+
+
+def rollup_sources(cursor, backend):
+    """Key rollup rows by input source as well as (machine_id, bucket).
+
+    A full re-detection of one file then replaces only that file's counts.
+    Rows written before this migration keep source '', which no later run
+    replaces. SQLite can not change a primary key in place, so its tables
+    are rebuilt.
+    """
+    for table in ROLLUP_TABLES:
+        if backend.column_exists(cursor, table, 'source'):
+            continue
+        if backend.name == 'MySQL':
+            cursor.execute(f'''
+                ALTER TABLE {table}
+                ADD COLUMN source VARCHAR(255) NOT NULL DEFAULT '',
+                DROP PRIMARY KEY,
+                ADD PRIMARY KEY (machine_id, bucket, source)
+            ''')
+        else:
+            create_table, *create_indexes = backend.table_definitions()[table]
+            cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+            cursor.execute(create_table)
+            columns = ', '.join(ROLLUP_COLUMNS)
+            cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {table}_old")
+            cursor.execute(f"DROP TABLE {table}_old")
+            for statement in create_indexes:
+                cursor.execute(statement)
+        log.info("✅ Keyed %s by source", table)
+
+
+# (version, name, step); append new migrations, never reorder or edit applied ones
+MIGRATIONS = [
+    (1, 'anomaly_unique_key', anomaly_unique_key),
+    (2, 'machine_thresholds', machine_thresholds),
+    (3, 'hot_query_indexes', hot_query_indexes),
+    (4, 'machine_registry', machine_registry),
+    (5, 'rollup_sources', rollup_sources),
+]
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate(connection, cursor, backend):
+    """Apply every pending migration in order; returns the names applied."""
+    applied = []
+    try:
+        cursor.execute(SCHEMA_MIGRATIONS_SQL)
+        done = applied_versions(cursor)
+        for version, name, step in MIGRATIONS:
+            if version in done:
+                continue
+            step(cursor, backend)
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            connection.commit()
+            applied.append(name)
+            log.info("✅ Applied migration %d: %s", version, name)
+    except Error as err:
+        log.error("❌ Migration failed: %s", err)
+        connection.rollback()
+    return applied
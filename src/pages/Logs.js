@@ -6,6 +6,7 @@ import ErrorBanner from '../components/ErrorBanner';
 
 const Logs = () => {
   const [logs, setLogs] = useState([]);
+  const [hasMore, setHasMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const isMounted = useRef(true);
@@ -23,6 +24,7 @@ const Logs = () => {
       
       if (isMounted.current) {
         setLogs(logsData.logs || []);
+        setHasMore(Boolean(logsData.hasMore));
       }
     } catch (err) {
       console.error('❌ Error fetching logs:', err);
@@ -65,7 +67,8 @@ const Logs = () => {
             View detailed machine readings and performance data
           </p>
           <div className="mt-2 text-xs text-gray-500 dark:text-gray-400">
-            📊 Showing {logs.length} machine readings • ✅ Real-time connection active
+            📊 Showing {logs.length} {hasMore ? 'most recent ' : ''}machine readings
+            {hasMore ? ' (more exist; export them for the full history)' : ''} • ✅ Real-time connection active
           </div>
         </div>
 
@@ -0,0 +1,199 @@
+"""
+Multi-core anomaly detection sharded by machine_id.
+The input is partitioned so each machine lands in exactly one shard, then every
+shard is detected by its own worker process and DB connection. Workers upsert
+their anomalies and hand their rollups back, so the parent commits the rollups
+and the watermark together once every shard has succeeded.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from database import DatabaseManager
+from detector import AnomalyDetector
+from csv_stream import iter_csv_chunks, start_position, watermark_for, source_id
+from rollups import ROLLUP_TABLES, aggregate_rollups, merge_rollups
+from log import get_logger, flush as flush_logs
+
+log = get_logger(__name__)
+
+DEFAULT_CHUNK_ROWS = 100000
+
+
+def shard_for(machine_id, workers):
+    """Return the stable shard index of a machine."""
+    return zlib.crc32(str(machine_id).encode('utf-8')) % workers
+
+
+def partition_csv(csv_file_path, shard_dir, workers, chunk_rows=DEFAULT_CHUNK_ROWS, offset=None):
+    """Split a CSV into one file per shard, streaming it chunk by chunk.
+
+    Reading starts at byte ``offset`` when given (just past the header
+    otherwise). Returns the shard file paths that received at least one row,
+    the byte offset reading stopped at, the row count and the newest readings
+    chunk (for the watermark). Rows without a machine_id belong to no shard;
+    they are counted in the row count but skipped, with a warning.
+    """
+    shard_paths = [os.path.join(shard_dir, f'shard_{i}.csv') for i in range(workers)]
+    shard_ids = {}
+    written = set()
+    row_count = 0
+    skipped = 0
+    last_chunk = None
+
+    with open(csv_file_path, 'rb') as csv_file:
+        header = csv_file.readline()
+        if offset:
+            csv_file.seek(offset)
+        for chunk in iter_csv_chunks(csv_file, header, chunk_rows):
+            row_count += len(chunk)
+            last_chunk = chunk
+            known = chunk['machine_id'].notna()
+            skipped += int((~known).sum())
+            chunk = chunk[known]
+            for machine_id in chunk['machine_id'].unique():
+                if machine_id not in shard_ids:
+                    shard_ids[machine_id] = shard_for(machine_id, workers)
+            shards = chunk['machine_id'].map(shard_ids)
+
+            for shard, rows in chunk.groupby(shards, sort=False):
+                path = shard_paths[shard]
+                rows.to_csv(path, mode='a', header=path not in written, index=False)
+                written.add(path)
+        end_offset = csv_file.tell()
+
+    if skipped:
+        log.warning("⚠️ Skipped %d rows of %s without a machine_id", skipped, csv_file_path)
+
+    return [path for path in shard_paths if path in written], end_offset, row_count, last_chunk
+
+
+def detect_shard(shard_path, chunk_rows=DEFAULT_CHUNK_ROWS, rules_path=None):
+    """Worker entry point: detect one shard and bulk-write its anomalies, return its summary.
+
+    The shard's rollups are returned in the summary, {table name: frame},
+    rather than written, so a failed shard never leaves counts behind.
+    """
+    started = time.perf_counter()
+    summary = {'shard': os.path.basename(shard_path), 'rows': 0, 'anomalies': 0,
+               'by_type': Counter(), 'error': None}
+    rollups = {table_name: [] for table_name in ROLLUP_TABLES}
+
+    db_manager = DatabaseManager()
+    if not (db_manager.connection and db_manager.connection.is_connected()):
+        summary['error'] = "Database connection failed."
+        return summary
+
+    try:
+        detector = AnomalyDetector(db_manager, rules_path)
+        with open(shard_path, 'rb') as shard_file:
+            header = shard_file.readline()
+            for chunk in iter_csv_chunks(shard_file, header, chunk_rows):
+                anomalies = detector.detect_batch(chunk)
+                written = db_manager.insert_anomalies_bulk(anomalies)
+                summary['anomalies'] += written
+                if written < len(anomalies):
+                    summary['error'] = "Anomalies were not fully written."
+                    break
+                if not db_manager.register_machines(chunk):
+                    summary['error'] = "Machines registry was not updated."
+                    break
+                for table_name, freq in ROLLUP_TABLES.items():
+                    rollups[table_name].append(aggregate_rollups(chunk, anomalies, freq))
+                summary['rows'] += len(chunk)
+                summary['by_type'].update(anomalies['anomaly_type'])
+    except Exception as e:
+        summary['error'] = str(e)
+    finally:
+        db_manager.close()
+        flush_logs()
+
+    summary['rollups'] = {table_name: merge_rollups(frames) for table_name, frames in rollups.items()}
+    summary['elapsed'] = time.perf_counter() - started
+    return summary
+
+
+def merge_summaries(summaries):
+    """Combine per-shard summaries into one run summary."""
+    merged = {'shards': len(summaries), 'rows': 0, 'anomalies': 0,
+              'by_type': Counter(), 'errors': []}
+    for summary in summaries:
+        merged['rows'] += summary['rows']
+        merged['anomalies'] += summary['anomalies']
+        merged['by_type'].update(summary['by_type'])
+        if summary['error']:
+            merged['errors'].append(f"{summary['shard']}: {summary['error']}")
+    return merged
+
+
+def run_parallel_detection(csv_file_path, workers=None, chunk_rows=DEFAULT_CHUNK_ROWS, rules_path=None, full=False):
+    """Run anomaly detection across a process pool, one shard of machines per task.
+
+    Like ``run_anomaly_detection``, only rows past the file's watermark are
+    partitioned unless ``full`` is set. Once every shard has succeeded, the
+    rollups and the watermark are written in one transaction; if any shard
+    fails neither is, and a retry re-detects the same rows.
+    """
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    shard_dir = tempfile.mkdtemp(prefix='anomaly_shards_')
+    source = source_id(csv_file_path)
+
+    try:
+        db_manager = DatabaseManager()
+        if not (db_manager.connection and db_manager.connection.is_connected()):
+            print("❌ Database connection failed.")
+            return None
+        try:
+            with open(csv_file_path, 'rb') as csv_file:
+                header = csv_file.readline()
+            offset, rows_done = start_position(db_manager, csv_file_path, header, full)
+            shard_paths, end_offset, rows, last_chunk = partition_csv(csv_file_path, shard_dir, workers,
+                                                                      chunk_rows, offset)
+        except Exception as e:
+            print(f"❌ Error reading CSV file: {e}")
+            return None
+        finally:
+            db_manager.close()
+        if not rows:
+            print("✅ No new rows since the last run.")
+            return merge_summaries([])
+        print(f"🔀 Partitioned {rows} new rows of {csv_file_path} into {len(shard_paths)} shards")
+
+        summaries = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(detect_shard, path, chunk_rows, rules_path) for path in shard_paths]
+            for future in as_completed(futures):
+                summary = future.result()
+                summaries.append(summary)
+                print(f"✅ {summary['shard']}: {summary['rows']} rows, {summary['anomalies']} anomalies "
+                      f"in {summary.get('elapsed', 0):.2f}s")
+
+        merged = merge_summaries(summaries)
+        # Anomaly upserts make a retry safe; the additive rollups only go in once every shard is in
+        if not merged['errors']:
+            rollups = ((table_name, merge_rollups(summary['rollups'][table_name] for summary in summaries))
+                       for table_name in ROLLUP_TABLES)
+            watermark = watermark_for(header, end_offset, rows_done + rows, last_chunk)
+            db_manager = DatabaseManager()
+            try:
+                if not db_manager.write_rollups(rollups, source, reset=offset == len(header), watermark=watermark):
+                    merged['errors'].append("Rollups were not written; the watermark was not advanced.")
+            finally:
+                db_manager.close()
+
+        elapsed = time.perf_counter() - started
+        rate = merged['rows'] / elapsed if elapsed > 0 else 0
+        print(f"\n📊 {merged['rows']} rows on {workers} workers in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+        print(f"📊 Total anomalies detected: {merged['anomalies']} {dict(merged['by_type'])}")
+        for error in merged['errors']:
+            print(f"❌ {error}")
+        return merged
+
+    finally:
+        shutil.rmtree(shard_dir, ignore_errors=True)
@@ -0,0 +1,84 @@
+"""
+Opt-in sampling profiler for ad-hoc investigation of a running process.
+A daemon thread snapshots every thread's stack at a fixed interval and counts
+identical stacks, so the cost is bounded by the sample rate rather than by
+how much code runs. Output is collapsed-stack text for flame graph tools.
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Sample all thread stacks every ``interval`` seconds while running."""
+
+    def __init__(self, interval=0.01, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = Counter()
+        self.sample_count = 0
+        self.started_at = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start sampling; returns False if already running."""
+        if self.running:
+            return False
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop sampling; returns False if it was not running."""
+        if not self.running:
+            return False
+        self._stop.set()
+        self._thread.join()
+        return True
+
+    def reset(self):
+        with self._lock:
+            self.samples.clear()
+            self.sample_count = 0
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            stacks = [self._stack(frame) for thread_id, frame in sys._current_frames().items()
+                      if thread_id != own_id]
+            with self._lock:
+                self.samples.update(stacks)
+                self.sample_count += 1
+
+    def _stack(self, frame):
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f'{code.co_name} ({code.co_filename.rsplit("/", 1)[-1]}:{frame.f_lineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def collapsed(self, limit=None):
+        """Return 'frame;frame;frame count' lines, most frequent stacks first."""
+        with self._lock:
+            top = self.samples.most_common(limit)
+        return '\n'.join(f'{stack} {count}' for stack, count in top) + '\n'
+
+    def status(self):
+        return {
+            'running': self.running,
+            'interval': self.interval,
+            'samples': self.sample_count,
+            'distinct_stacks': len(self.samples),
+            'started_at': self.started_at,
+        }
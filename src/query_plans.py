@@ -0,0 +1,90 @@
+"""
+EXPLAIN check for the hot read queries.
+Runs each query below through the backend's EXPLAIN and reports any that
+read a table with a full scan, so an index regression fails loudly instead
+of showing up as a slow dashboard. The queries are imported from the CLI,
+DBHelper, export and archive modules that run them, so the check follows
+any change to them.
+
+    python query_plans.py    # exits 1 if any hot query does a full scan
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# DBHelper lives with the dashboard backend
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from dbHelper import (ANOMALIES_SINCE_QUERY, ANOMALY_COLUMNS, DASHBOARD_ROLLUPS_QUERY, LATEST_READINGS_QUERY,
+                      PAGE_QUERY, READING_COLUMNS, READINGS_SINCE_QUERY, RECENT_ANOMALIES_QUERY,
+                      RECENT_READINGS_QUERY, encode_cursor, machine_filter, page_filters)
+from archive import ARCHIVE_BATCH_QUERY
+from cli import ANOMALIES_BY_MACHINE_QUERY
+from export import export_query
+
+SINCE = datetime(2025, 1, 1)
+UNTIL = datetime(2025, 2, 1)
+
+
+def _page(table, columns, **filters):
+    """The keyset page query DBHelper runs for ``filters``."""
+    where, params = page_filters(**filters)
+    return PAGE_QUERY.format(columns=columns, table=table, where=where), tuple(params) + (501,)
+
+
+def _export(table, start, end, machine_ids):
+    """The SELECT an export of ``table`` runs."""
+    query, params = export_query(table, start, end, machine_ids)
+    return query, tuple(params)
+
+
+# (name, query, params)
+HOT_QUERIES = [
+    ('cli_anomalies_by_machine', ANOMALIES_BY_MACHINE_QUERY, ('M1',)),
+    ('recent_anomalies', RECENT_ANOMALIES_QUERY.format(condition=machine_filter(None)[0]), (10,)),
+    ('recent_anomalies_for_machines',
+     RECENT_ANOMALIES_QUERY.format(condition=machine_filter(['M1', 'M2'])[0]), ('M1', 'M2', 10)),
+    ('anomalies_since', ANOMALIES_SINCE_QUERY, (0, 1000)),
+    ('anomalies_page_by_machine',
+     *_page('anomalies', ANOMALY_COLUMNS, machine_id='M1', cursor=encode_cursor(UNTIL, 100))),
+    ('anomalies_page_by_type',
+     *_page('anomalies', ANOMALY_COLUMNS, anomaly_type='high_temperature', start=SINCE)),
+    ('machine_readings_recent', RECENT_READINGS_QUERY.format(condition=machine_filter(None)[0]), (SINCE,)),
+    ('machine_readings_recent_for_machines',
+     RECENT_READINGS_QUERY.format(condition=machine_filter(['M1', 'M2'])[0]), (SINCE, 'M1', 'M2')),
+    ('machine_readings_latest_for_machines',
+     LATEST_READINGS_QUERY.format(condition=machine_filter(['M1', 'M2'])[0]), ('M1', 'M2')),
+    ('readings_since', READINGS_SINCE_QUERY, (0, 1000)),
+    ('readings_page_by_machine', *_page('machine_readings', READING_COLUMNS, machine_id='M1', start=SINCE)),
+    ('export_readings', *_export('machine_readings', SINCE, UNTIL, ['M1'])),
+    ('archive_batch', ARCHIVE_BATCH_QUERY, (SINCE, 50000)),
+    ('dashboard_rollups', DASHBOARD_ROLLUPS_QUERY, (SINCE,)),
+]
+
+def check_query_plans(cursor, backend, queries=HOT_QUERIES):
+    """Return [(query name, [fully scanned tables])] for every hot query whose plan has a full scan."""
+    problems = []
+    for name, query, params in queries:
+        tables = backend.full_scans(cursor, query, params)
+        if tables:
+            problems.append((name, tables))
+    return problems
+
+
+if __name__ == '__main__':
+    from database import DatabaseManager
+
+    db = DatabaseManager()
+    if not (db.connection and db.connection.is_connected()):
+        print("❌ Database connection failed.")
+        sys.exit(2)
+    try:
+        problems = check_query_plans(db.cursor, db.backend)
+    finally:
+        db.close()
+
+    for name, tables in problems:
+        print(f"❌ {name}: full scan of {', '.join(tables)}")
+    if problems:
+        sys.exit(1)
+    print(f"✅ All {len(HOT_QUERIES)} hot queries use an index")
@@ -0,0 +1,89 @@
+"""
+Per-machine rollup aggregation for the dashboard.
+Folds batches of readings and anomalies into minute and hour buckets that are
+merged into the rollup tables, so the dashboard never scans raw readings.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Rollup table -> pandas bucket frequency
+ROLLUP_TABLES = {
+    'machine_rollup_minute': 'min',
+    'machine_rollup_hour': 'h',
+}
+
+ROLLUP_COLUMNS = [
+    'machine_id', 'bucket', 'reading_count', 'temperature_count',
+    'temperature_min', 'temperature_max', 'temperature_sum',
+    'units_produced_sum', 'error_count', 'anomaly_count'
+]
+
+# How each rollup column merges into an existing (machine_id, bucket) row
+ROLLUP_MERGE = {
+    'reading_count': 'sum',
+    'temperature_count': 'sum',
+    'temperature_min': 'min',
+    'temperature_max': 'max',
+    'temperature_sum': 'sum',
+    'units_produced_sum': 'sum',
+    'error_count': 'sum',
+    'anomaly_count': 'sum',
+}
+
+
+def aggregate_rollups(readings, anomalies, freq):
+    """Aggregate one batch of readings and anomalies into per-machine buckets.
+
+    Returns a DataFrame with ROLLUP_COLUMNS, one row per (machine_id, bucket).
+    Rows without a parseable timestamp are ignored.
+    """
+    if readings is None or len(readings) == 0:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+
+    frame = pd.DataFrame({
+        'machine_id': readings['machine_id'].to_numpy(),
+        'bucket': pd.to_datetime(readings['timestamp'], errors='coerce', format='ISO8601').dt.floor(freq).to_numpy(),
+        'temperature': _numeric(readings, 'temperature'),
+        'units_produced': _numeric(readings, 'units_produced'),
+        'error_flag': _numeric(readings, 'error_flag'),
+    })
+    frame = frame[frame['bucket'].notna() & frame['machine_id'].notna()]
+    frame['is_error'] = (frame['error_flag'] == 1).astype(np.int64)
+
+    rollup = frame.groupby(['machine_id', 'bucket'], sort=False).agg(
+        reading_count=('bucket', 'size'),
+        temperature_count=('temperature', 'count'),
+        temperature_min=('temperature', 'min'),
+        temperature_max=('temperature', 'max'),
+        temperature_sum=('temperature', 'sum'),
+        units_produced_sum=('units_produced', 'sum'),
+        error_count=('is_error', 'sum'),
+    )
+
+    rollup['anomaly_count'] = 0
+    if anomalies is not None and len(anomalies):
+        anomaly_buckets = pd.to_datetime(anomalies['timestamp'], errors='coerce', format='ISO8601').dt.floor(freq)
+        counts = pd.DataFrame({
+            'machine_id': anomalies['machine_id'].to_numpy(),
+            'bucket': anomaly_buckets.to_numpy(),
+        }).dropna().groupby(['machine_id', 'bucket']).size()
+        rollup['anomaly_count'] = counts.reindex(rollup.index, fill_value=0).to_numpy()
+
+    return rollup.reset_index()[ROLLUP_COLUMNS]
+
+
+def merge_rollups(rollups):
+    """Merge frames from ``aggregate_rollups`` into one, a row per (machine_id, bucket)."""
+    rollups = [rollup for rollup in rollups if not rollup.empty]
+    if not rollups:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    merged = pd.concat(rollups, ignore_index=True).groupby(['machine_id', 'bucket'], sort=False).agg(ROLLUP_MERGE)
+    return merged.reset_index()[ROLLUP_COLUMNS]
+
+
+def _numeric(df, name):
+    """Return a column as a float array, all-NaN if it is missing."""
+    if name not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float)
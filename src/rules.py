@@ -0,0 +1,230 @@
+"""
+Configurable anomaly rules for the batch detector.
+Rules (metric, operator, threshold, severity, per-machine overrides) come from
+defaults, a JSON config file or the machines table, and are compiled once into
+vectorized column comparisons with a per-machine threshold lookup array.
+"""
+
+import json
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+from log import get_logger
+
+log = get_logger(__name__)
+
+ANOMALY_COLUMNS = ['machine_id', 'timestamp', 'anomaly_type', 'value', 'description']
+RESULT_COLUMNS = ANOMALY_COLUMNS + ['severity']
+
+OPERATORS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+    '!=': np.not_equal,
+}
+
+SEVERITIES = ('info', 'warning', 'critical')
+
+_PLACEHOLDER = re.compile(r'(\{value\}|\{threshold\})')
+
+
+class Rule:
+    """One threshold rule: flag ``metric <operator> threshold``.
+
+    ``overrides`` maps machine_id -> threshold for machines whose model or
+    line needs a different limit. ``description`` may use ``{value}`` and
+    ``{threshold}``.
+    """
+
+    def __init__(self, name, metric, operator, threshold, severity='warning', description=None, overrides=None):
+        if operator not in OPERATORS:
+            raise ValueError(f"Rule {name}: unknown operator {operator!r}")
+        if severity not in SEVERITIES:
+            raise ValueError(f"Rule {name}: unknown severity {severity!r}")
+        self.name = name
+        self.metric = metric
+        self.operator = operator
+        self.threshold = float(threshold)
+        self.severity = severity
+        self.description = description or f'{metric} ({{value}}) {operator} {{threshold}}.'
+        self.overrides = {str(machine_id): float(value) for machine_id, value in (overrides or {}).items()}
+
+    @classmethod
+    def from_dict(cls, definition):
+        try:
+            return cls(definition['name'], definition['metric'], definition['operator'], definition['threshold'],
+                       definition.get('severity', 'warning'), definition.get('description'),
+                       definition.get('overrides'))
+        except KeyError as e:
+            raise ValueError(f"Rule definition is missing {e}: {definition}") from e
+
+
+DEFAULT_RULES = [
+    Rule('low_production', 'units_produced', '<', 50, 'warning',
+         'Units produced ({value}) below threshold ({threshold}).'),
+    Rule('high_temperature', 'temperature', '>', 75, 'critical',
+         'Temperature ({value}) above {threshold} degrees.'),
+    Rule('error_flag_raised', 'error_flag', '==', 1, 'critical',
+         'Error flag raised.'),
+]
+
+
+def load_rules(path):
+    """Load rule definitions from a JSON file of the form {"rules": [...]}."""
+    with open(path) as f:
+        config = json.load(f)
+    return [Rule.from_dict(definition) for definition in config.get('rules', [])]
+
+
+def with_machine_thresholds(rules, machine_thresholds):
+    """Return copies of ``rules`` with per-machine thresholds merged into their overrides.
+
+    ``machine_thresholds`` maps machine_id -> {rule_name: threshold}, as kept
+    in the machines table; those values win over the config file. Values
+    that are not a finite number are skipped with a warning, so one bad row
+    does not stop detection.
+    """
+    valid = {}
+    for machine_id, thresholds in machine_thresholds.items():
+        if isinstance(thresholds, dict):
+            valid[machine_id] = thresholds
+        else:
+            log.warning("⚠️ Ignoring thresholds for machine %s: expected an object, got %r", machine_id, thresholds)
+
+    merged = []
+    for rule in rules:
+        overrides = dict(rule.overrides)
+        for machine_id, thresholds in valid.items():
+            if rule.name not in thresholds:
+                continue
+            threshold = _number(thresholds[rule.name])
+            if threshold is None:
+                log.warning("⚠️ Ignoring %s threshold for machine %s: %r is not a number",
+                            rule.name, machine_id, thresholds[rule.name])
+                continue
+            overrides[str(machine_id)] = threshold
+        merged.append(Rule(rule.name, rule.metric, rule.operator, rule.threshold,
+                           rule.severity, rule.description, overrides))
+    return merged
+
+
+def _number(value):
+    """Return ``value`` as a finite float, or None if it is not one."""
+    if isinstance(value, bool):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+class RuleSet:
+    """Rules compiled for vectorized evaluation over a DataFrame of readings."""
+
+    def __init__(self, rules=None):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.metrics = list(dict.fromkeys(rule.metric for rule in self.rules))
+        self._compiled = [
+            (rule, OPERATORS[rule.operator], _template(rule.description),
+             pd.Series(rule.overrides, dtype=float) if rule.overrides else None)
+            for rule in self.rules
+        ]
+
+    def evaluate(self, df, valid=None):
+        """Evaluate every rule over ``df`` and return one row per anomaly.
+
+        Each metric column is converted once and shared by all of its rules;
+        each rule is a single vectorized comparison against either a constant
+        or a per-row threshold gathered from a per-machine lookup array.
+        Rows where ``valid`` is False are ignored. The result is ordered by
+        source row, then rule order, like a row-by-row scan.
+        """
+        if df is None or len(df) == 0:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+
+        n = len(df)
+        machine_id = column(df, 'machine_id', n)
+        timestamp = column(df, 'timestamp', n)
+        values = {metric: pd.to_numeric(column(df, metric, n), errors='coerce') for metric in self.metrics}
+        arrays = {metric: series.to_numpy(dtype=float, na_value=np.nan) for metric, series in values.items()}
+        if valid is None:
+            valid = np.ones(n, dtype=bool)
+
+        codes, machines = None, None
+        frames = []
+        for rule, compare, template, overrides in self._compiled:
+            metric = arrays[rule.metric]
+            if overrides is None:
+                thresholds = rule.threshold
+            else:
+                if codes is None:
+                    codes, uniques = pd.factorize(machine_id)
+                    machines = pd.Index(pd.Series(uniques, dtype=object).astype(str))
+                thresholds = _lookup(overrides, machines, rule.threshold)[codes]
+
+            mask = compare(metric, thresholds) & valid & ~np.isnan(metric)
+            if not mask.any():
+                continue
+
+            rows = np.flatnonzero(mask)
+            hit_values = values[rule.metric].iloc[rows]
+            hit_thresholds = thresholds[rows] if overrides is not None else np.full(len(rows), rule.threshold)
+            frames.append(pd.DataFrame({
+                'machine_id': machine_id.iloc[rows].to_numpy(),
+                'timestamp': timestamp.iloc[rows].to_numpy(),
+                'anomaly_type': rule.name,
+                'value': hit_values.to_numpy(),
+                'description': _render(template, hit_values, hit_thresholds),
+                'severity': rule.severity,
+            }, index=rows))
+
+        if not frames:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+
+        # Stable sort on the source row keeps rule order within each record
+        anomalies = pd.concat(frames).sort_index(kind='mergesort')
+        return anomalies.reset_index(drop=True)
+
+
+def column(df, name, n):
+    """Return a column as a positional Series, or all-missing if absent."""
+    if name in df.columns:
+        return df[name].reset_index(drop=True)
+    return pd.Series([None] * n, dtype=object)
+
+
+def _lookup(overrides, machines, default):
+    """Build a threshold array indexed by factorized machine code.
+
+    The extra trailing slot holds the default, so code -1 (missing
+    machine_id) falls back to it.
+    """
+    lookup = np.full(len(machines) + 1, default)
+    positions = machines.get_indexer(overrides.index)
+    found = positions >= 0
+    lookup[positions[found]] = overrides.to_numpy()[found]
+    return lookup
+
+
+def _template(description):
+    return [part for part in _PLACEHOLDER.split(description) if part]
+
+
+def _render(template, values, thresholds):
+    """Fill a split description template for every hit at once."""
+    text = pd.Series('', index=range(len(values)), dtype=object)
+    for part in template:
+        if part == '{value}':
+            text = text + values.astype(str).to_numpy()
+        elif part == '{threshold}':
+            labels = {t: f'{t:g}' for t in np.unique(thresholds)}
+            text = text + pd.Series(thresholds).map(labels).to_numpy()
+        else:
+            text = text + part
+    return text.to_numpy()
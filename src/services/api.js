@@ -59,6 +59,9 @@ const API_URL = process.env.REACT_APP_API_URL || 'https://intellifactory-1.onren
 
 // const API_BASE_URL = process.env.REACT_APP_API_BASE_URL || 'http://localhost:5000';
 
+// Most readings the logs page loads before it stops paging
+const MAX_LOG_ROWS = 5000;
+
 const api = axios.create({
   baseURL: API_URL,  // ← FIXED: Changed from API_BASE_URL to API_URL
   timeout: 30000,
@@ -97,21 +100,32 @@ export const apiService = {
   //   }
   // },
 
+  // Pages through next_cursor up to MAX_LOG_ROWS; hasMore tells the caller rows were left out
   getLogs: async () => {
   try {
-    const response = await fetch(`${API_URL}/api/logs`, {
-      method: 'GET',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-    });
-    
-    if (!response.ok) {
-      throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-    }
+    let logs = [];
+    let params = new URLSearchParams();
+    let data;
+    do {
+      const response = await fetch(`${API_URL}/api/logs?${params}`, {
+        method: 'GET',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+      });
+      
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+      }
+      
+      data = await response.json();
+      logs = logs.concat(data.logs || []);
+      // Later pages keep the time window the first one used
+      params = new URLSearchParams({ cursor: data.next_cursor || '' });
+      if (data.start) params.set('start', data.start);
+    } while (data.next_cursor && logs.length < MAX_LOG_ROWS);
     
-    const data = await response.json();
-    return data;
+    return { ...data, logs, hasMore: Boolean(data.next_cursor) };
   } catch (error) {
     throw new Error(`Failed to fetch logs data: ${error.message}`);
   }
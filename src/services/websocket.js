@@ -125,6 +125,17 @@ class WebSocketService {
     }
   }
 
+  // Watch only some machines ({ machines: ['M1', 'M2'] }) or a line ({ line: 'Assembly' }); {} watches all
+  subscribe(scope = {}, callback) {
+    if (!this.socket) return;
+    this.socket.emit('subscribe', scope, (ack) => {
+      if (ack && ack.error) {
+        console.error('❌ Subscription rejected:', ack.error);
+      }
+      if (callback) callback(ack);
+    });
+  }
+
   // Manual reconnect method
   reconnect() {
     console.log('🔄 Manual reconnect requested');
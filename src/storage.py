@@ -0,0 +1,499 @@
+"""
+Pluggable storage backends for DatabaseManager and DBHelper.
+MySQL is the default server backend; SQLite is an embedded backend for edge
+cells that run detection and the dashboard on the line PC with no DB server.
+"""
+
+import os
+import re
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+from rollups import ROLLUP_TABLES
+
+try:
+    import mysql.connector
+    from mysql.connector import Error as MySQLError
+except ImportError:  # SQLite-only installs do not need the MySQL driver
+    mysql = None
+
+    class MySQLError(Exception):
+        pass
+
+# Catch this in helpers so they work the same on either backend
+Error = (MySQLError, sqlite3.Error)
+
+# MySQL full scans estimated below this many rows are not reported
+MIN_SCAN_ROWS = 1000
+
+# 'SCAN anomalies' (or 'SCAN TABLE anomalies' on older SQLite), but not 'SCAN ... USING INDEX'
+_SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+DEFAULT_SQLITE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'intellifactory.db'))
+
+
+class StorageBackend:
+    """Interface the DB helpers use to open connections and speak a SQL dialect.
+
+    All SQL in the helpers uses ``%s`` placeholders; backends that need a
+    different paramstyle translate it on their cursors.
+    """
+
+    name = None
+
+    def connect(self):
+        """Open a new connection offering the mysql-connector calls the helpers use."""
+        raise NotImplementedError
+
+    def table_definitions(self):
+        """Return {table_name: [DDL statements]} for the full schema."""
+        raise NotImplementedError
+
+    def upsert_sql(self, table, columns, keys, merge):
+        """Build an INSERT that merges into an existing row on a key conflict.
+
+        ``merge`` maps column -> 'sum' | 'min' | 'max' | 'replace', describing
+        how the incoming value combines with the stored one, or to
+        ('newer', other) to replace it only when the incoming ``other`` column
+        is at least the stored one, or ('unless', value) to replace it unless
+        the stored value is ``value``. Assignments may apply in order (MySQL
+        does), so list a column compared by ('newer', ...) after the others.
+        """
+        raise NotImplementedError
+
+    def index_exists(self, cursor, table, index):
+        """Return True if ``table`` has an index called ``index``."""
+        raise NotImplementedError
+
+    def column_exists(self, cursor, table, column):
+        raise NotImplementedError
+
+    def create_index_sql(self, table, name, columns, unique=False):
+        raise NotImplementedError
+
+    def drop_index_sql(self, table, name):
+        raise NotImplementedError
+
+    def full_scans(self, cursor, query, params=None):
+        """EXPLAIN ``query`` and return the tables its plan reads with a full table scan."""
+        raise NotImplementedError
+
+
+class MySQLBackend(StorageBackend):
+    name = 'MySQL'
+
+    def __init__(self, **config):
+        self.config = {
+            'host': 'localhost',
+            'database': 'project',
+            'user': 'root',
+            'password': '123456',
+            'charset': 'utf8mb4',
+            'use_unicode': True
+        }
+        self.config.update(config)
+
+    def connect(self):
+        if mysql is None:
+            raise MySQLError("mysql-connector-python is not installed")
+        return mysql.connector.connect(**self.config)
+
+    def table_definitions(self):
+        tables = {
+            'anomalies': ['''
+                CREATE TABLE IF NOT EXISTS anomalies (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    timestamp DATETIME NOT NULL,
+                    machine_id VARCHAR(50) NOT NULL,
+                    anomaly_type VARCHAR(100) NOT NULL,
+                    value DECIMAL(10,2),
+                    message TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE KEY uq_anomaly (machine_id, timestamp, anomaly_type),
+                    INDEX idx_timestamp (timestamp),
+                    INDEX idx_anomalies_type_time (anomaly_type, timestamp)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            '''],
+
+            'machine_readings': ['''
+                CREATE TABLE IF NOT EXISTS machine_readings (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    timestamp DATETIME NOT NULL,
+                    machine_id VARCHAR(50) NOT NULL,
+                    temperature DECIMAL(5,2),
+                    units_produced INT,
+                    error_flag BOOLEAN DEFAULT FALSE,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    INDEX idx_readings_time (timestamp, machine_id, temperature, units_produced, error_flag),
+                    INDEX idx_readings_machine_time (machine_id, timestamp, temperature, units_produced, error_flag)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            '''],
+
+            'machines': ['''
+                CREATE TABLE IF NOT EXISTS machines (
+                    machine_id VARCHAR(50) PRIMARY KEY,
+                    name VARCHAR(100) NOT NULL,
+                    location VARCHAR(100),
+                    status ENUM('online', 'offline', 'maintenance') DEFAULT 'online',
+                    thresholds JSON,
+                    first_seen TIMESTAMP NULL,
+                    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    last_reading_at DATETIME NULL,
+                    last_temperature DECIMAL(5,2),
+                    last_units_produced INT,
+                    last_error_flag BOOLEAN,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            '''],
+
+            # How far into each input file detection has got
+            'detection_watermarks': ['''
+                CREATE TABLE IF NOT EXISTS detection_watermarks (
+                    source VARCHAR(255) PRIMARY KEY,
+                    header_hash CHAR(40) NOT NULL,
+                    byte_offset BIGINT NOT NULL DEFAULT 0,
+                    rows_processed BIGINT NOT NULL DEFAULT 0,
+                    last_timestamp DATETIME,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            ''']
+        }
+
+        # Per-machine minute and hour rollups read by the dashboard, kept per
+        # input source so re-detecting one file only replaces its own counts
+        for table_name in ROLLUP_TABLES:
+            tables[table_name] = [f'''
+                CREATE TABLE IF NOT EXISTS {table_name} (
+                    machine_id VARCHAR(50) NOT NULL,
+                    bucket DATETIME NOT NULL,
+                    reading_count INT NOT NULL DEFAULT 0,
+                    temperature_count INT NOT NULL DEFAULT 0,
+                    temperature_min DECIMAL(5,2),
+                    temperature_max DECIMAL(5,2),
+                    temperature_sum DECIMAL(16,2) NOT NULL DEFAULT 0,
+                    units_produced_sum BIGINT NOT NULL DEFAULT 0,
+                    error_count INT NOT NULL DEFAULT 0,
+                    anomaly_count INT NOT NULL DEFAULT 0,
+                    source VARCHAR(255) NOT NULL DEFAULT '',
+                    PRIMARY KEY (machine_id, bucket, source),
+                    INDEX idx_bucket (bucket)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            ''']
+
+        return tables
+
+    def upsert_sql(self, table, columns, keys, merge):
+        updates = {
+            'sum': '{c} = {c} + VALUES({c})',
+            'min': '{c} = LEAST(COALESCE({c}, VALUES({c})), COALESCE(VALUES({c}), {c}))',
+            'max': '{c} = GREATEST(COALESCE({c}, VALUES({c})), COALESCE(VALUES({c}), {c}))',
+            'replace': '{c} = VALUES({c})',
+            'newer': '{c} = IF(VALUES({a}) >= {a} OR {a} IS NULL, VALUES({c}), {c})',
+            'unless': "{c} = IF({c} = '{a}', {c}, VALUES({c}))",
+        }
+        return f'''
+            INSERT INTO {table} ({', '.join(columns)})
+            VALUES ({', '.join(['%s'] * len(columns))})
+            ON DUPLICATE KEY UPDATE
+                {', '.join(_merge_assignments(updates, merge))}
+        '''
+
+    def index_exists(self, cursor, table, index):
+        cursor.execute('''
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        ''', (table, index))
+        return cursor.fetchone()[0] > 0
+
+    def column_exists(self, cursor, table, column):
+        cursor.execute('''
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        ''', (table, column))
+        return cursor.fetchone()[0] > 0
+
+    def create_index_sql(self, table, name, columns, unique=False):
+        return f"ALTER TABLE {table} ADD {'UNIQUE ' if unique else ''}INDEX {name} ({', '.join(columns)})"
+
+    def drop_index_sql(self, table, name):
+        return f"ALTER TABLE {table} DROP INDEX {name}"
+
+    def full_scans(self, cursor, query, params=None, min_rows=MIN_SCAN_ROWS):
+        """Tables EXPLAIN reports with access type ALL.
+
+        Scans estimated at under ``min_rows`` rows are ignored: on a near-empty
+        development table MySQL picks a scan however good the indexes are.
+        """
+        cursor.execute('EXPLAIN ' + query, params or ())
+        names = [column[0] for column in cursor.description]
+        plan = [dict(zip(names, row)) for row in cursor.fetchall()]
+        return [step['table'] for step in plan if step['type'] == 'ALL' and (step['rows'] or 0) >= min_rows]
+
+
+class SQLiteBackend(StorageBackend):
+    """Embedded single-file backend running in WAL mode."""
+
+    name = 'SQLite'
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH):
+        self.path = path
+
+    def connect(self):
+        return SQLiteConnection(self.path)
+
+    def table_definitions(self):
+        tables = {
+            'anomalies': [
+                '''
+                CREATE TABLE IF NOT EXISTS anomalies (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp DATETIME NOT NULL,
+                    machine_id VARCHAR(50) NOT NULL,
+                    anomaly_type VARCHAR(100) NOT NULL,
+                    value DECIMAL(10,2),
+                    message TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                ''',
+                'CREATE INDEX IF NOT EXISTS idx_anomalies_timestamp ON anomalies (timestamp)',
+                'CREATE INDEX IF NOT EXISTS idx_anomalies_type_time ON anomalies (anomaly_type, timestamp)',
+                # The unique key uq_anomaly is added by a migration, which first
+                # removes duplicates an older database may hold
+            ],
+
+            'machine_readings': [
+                '''
+                CREATE TABLE IF NOT EXISTS machine_readings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp DATETIME NOT NULL,
+                    machine_id VARCHAR(50) NOT NULL,
+                    temperature DECIMAL(5,2),
+                    units_produced INT,
+                    error_flag BOOLEAN DEFAULT FALSE,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                ''',
+                '''
+                CREATE INDEX IF NOT EXISTS idx_readings_time
+                ON machine_readings (timestamp, machine_id, temperature, units_produced, error_flag)
+                ''',
+                '''
+                CREATE INDEX IF NOT EXISTS idx_readings_machine_time
+                ON machine_readings (machine_id, timestamp, temperature, units_produced, error_flag)
+                ''',
+            ],
+
+            # SQLite has no ON UPDATE; writers set last_seen explicitly
+            'machines': ['''
+                CREATE TABLE IF NOT EXISTS machines (
+                    machine_id VARCHAR(50) PRIMARY KEY,
+                    name VARCHAR(100) NOT NULL,
+                    location VARCHAR(100),
+                    status VARCHAR(20) DEFAULT 'online' CHECK (status IN ('online', 'offline', 'maintenance')),
+                    thresholds TEXT,
+                    first_seen TIMESTAMP,
+                    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_reading_at DATETIME,
+                    last_temperature DECIMAL(5,2),
+                    last_units_produced INT,
+                    last_error_flag BOOLEAN,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            '''],
+
+            'detection_watermarks': ['''
+                CREATE TABLE IF NOT EXISTS detection_watermarks (
+                    source VARCHAR(255) PRIMARY KEY,
+                    header_hash CHAR(40) NOT NULL,
+                    byte_offset BIGINT NOT NULL DEFAULT 0,
+                    rows_processed BIGINT NOT NULL DEFAULT 0,
+                    last_timestamp DATETIME,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''']
+        }
+
+        for table_name in ROLLUP_TABLES:
+            tables[table_name] = [
+                f'''
+                CREATE TABLE IF NOT EXISTS {table_name} (
+                    machine_id VARCHAR(50) NOT NULL,
+                    bucket DATETIME NOT NULL,
+                    reading_count INT NOT NULL DEFAULT 0,
+                    temperature_count INT NOT NULL DEFAULT 0,
+                    temperature_min DECIMAL(5,2),
+                    temperature_max DECIMAL(5,2),
+                    temperature_sum DECIMAL(16,2) NOT NULL DEFAULT 0,
+                    units_produced_sum BIGINT NOT NULL DEFAULT 0,
+                    error_count INT NOT NULL DEFAULT 0,
+                    anomaly_count INT NOT NULL DEFAULT 0,
+                    source VARCHAR(255) NOT NULL DEFAULT '',
+                    PRIMARY KEY (machine_id, bucket, source)
+                )
+                ''',
+                f'CREATE INDEX IF NOT EXISTS idx_{table_name}_bucket ON {table_name} (bucket)',
+            ]
+
+        return tables
+
+    def upsert_sql(self, table, columns, keys, merge):
+        updates = {
+            'sum': '{c} = {c} + excluded.{c}',
+            'min': '{c} = MIN(COALESCE({c}, excluded.{c}), COALESCE(excluded.{c}, {c}))',
+            'max': '{c} = MAX(COALESCE({c}, excluded.{c}), COALESCE(excluded.{c}, {c}))',
+            'replace': '{c} = excluded.{c}',
+            'newer': '{c} = CASE WHEN excluded.{a} >= {a} OR {a} IS NULL THEN excluded.{c} ELSE {c} END',
+            'unless': "{c} = CASE WHEN {c} = '{a}' THEN {c} ELSE excluded.{c} END",
+        }
+        return f'''
+            INSERT INTO {table} ({', '.join(columns)})
+            VALUES ({', '.join(['%s'] * len(columns))})
+            ON CONFLICT ({', '.join(keys)}) DO UPDATE SET
+                {', '.join(_merge_assignments(updates, merge))}
+        '''
+
+    def index_exists(self, cursor, table, index):
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND tbl_name = %s AND name = %s",
+                       (table, index))
+        return cursor.fetchone()[0] > 0
+
+    def column_exists(self, cursor, table, column):
+        cursor.execute(f"PRAGMA table_info({table})")
+        return any(row[1] == column for row in cursor.fetchall())
+
+    def create_index_sql(self, table, name, columns, unique=False):
+        return f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+
+    def drop_index_sql(self, table, name):
+        return f"DROP INDEX IF EXISTS {name}"
+
+    def full_scans(self, cursor, query, params=None):
+        """Tables EXPLAIN QUERY PLAN reads with a bare SCAN (no index)."""
+        cursor.execute('EXPLAIN QUERY PLAN ' + query, params or ())
+        scans = (_SQLITE_SCAN.match(row[3]) for row in cursor.fetchall())
+        return [scan.group(1) for scan in scans if scan]
+
+
+def _merge_assignments(updates, merge):
+    """Format each column's merge mode, plain or (mode, argument), as a SET assignment."""
+    for column, how in merge.items():
+        how, argument = how if isinstance(how, tuple) else (how, None)
+        yield updates[how].format(c=column, a=argument)
+
+
+def get_backend():
+    """Return the backend selected by STORAGE_BACKEND (mysql or sqlite)."""
+    if os.environ.get('STORAGE_BACKEND', 'mysql').lower() == 'sqlite':
+        return SQLiteBackend(os.environ.get('SQLITE_PATH', DEFAULT_SQLITE_PATH))
+    return MySQLBackend()
+
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value.decode('utf-8'))
+
+
+# Return DATETIME/TIMESTAMP columns as datetime objects, as mysql-connector does
+sqlite3.register_converter('DATETIME', _parse_datetime)
+sqlite3.register_converter('TIMESTAMP', _parse_datetime)
+
+
+@lru_cache(maxsize=512)
+def _translate(sql):
+    """Convert %s placeholders to SQLite's ? paramstyle."""
+    return sql.replace('%s', '?')
+
+
+def _adapt(value):
+    if isinstance(value, datetime):
+        return value.isoformat(' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if type(value).__module__ == 'numpy':
+        return value.item()
+    return value
+
+
+def _adapt_params(params):
+    return tuple(_adapt(value) for value in params or ())
+
+
+class SQLiteConnection:
+    """sqlite3 connection exposing the subset of mysql-connector's API the helpers use."""
+
+    def __init__(self, path):
+        self._connection = sqlite3.connect(
+            path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,  # handed between threads by the pool, never shared at once
+            cached_statements=256
+        )
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute('PRAGMA busy_timeout=5000')
+        self._open = True
+
+    def is_connected(self):
+        return self._open
+
+    def cursor(self, dictionary=False, buffered=True):
+        return SQLiteCursor(self._connection.cursor(), dictionary)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        if self._open:
+            self._connection.close()
+            self._open = False
+
+
+class SQLiteCursor:
+    """sqlite3 cursor that accepts %s placeholders and can return dict rows."""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    def execute(self, sql, params=None):
+        self._cursor.execute(_translate(sql), _adapt_params(params))
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(_translate(sql), (_adapt_params(params) for params in seq_of_params))
+
+    def _rows(self, rows):
+        if not self._dictionary:
+            return rows
+        names = [column[0] for column in self._cursor.description]
+        return [dict(zip(names, row)) for row in rows]
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return self._rows([row])[0] if row is not None else None
+
+    def fetchall(self):
+        return self._rows(self._cursor.fetchall())
+
+    def fetchmany(self, size=1):
+        return self._rows(self._cursor.fetchmany(size))
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
@@ -0,0 +1,204 @@
+"""
+Adaptive, stateful anomaly detection for live reading streams.
+Keeps a small fixed-size state per machine and metric, updated in constant time
+per reading, and can save/restore that state so restarts do not replay history.
+"""
+
+import json
+import math
+import os
+
+import pandas as pd
+
+from log import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_METRICS = ('temperature', 'units_produced')
+
+
+class MetricState:
+    """Running statistics for one metric of one machine."""
+
+    __slots__ = ('count', 'mean', 'var', 'fast', 'slow',
+                 'last_value', 'last_time', 'rate_mean', 'rate_var')
+
+    def __init__(self, count=0, mean=0.0, var=0.0, fast=0.0, slow=0.0,
+                 last_value=None, last_time=None, rate_mean=0.0, rate_var=0.0):
+        self.count = count
+        self.mean = mean
+        self.var = var
+        self.fast = fast
+        self.slow = slow
+        self.last_value = last_value
+        self.last_time = last_time
+        self.rate_mean = rate_mean
+        self.rate_var = rate_var
+
+    def to_list(self):
+        return [getattr(self, name) for name in self.__slots__]
+
+    @classmethod
+    def from_list(cls, values):
+        return cls(*values)
+
+
+class StreamingDetector:
+    """Per-machine rolling z-score, EWMA drift and rate-of-change detection.
+
+    ``alpha`` sets the memory of the exponentially weighted mean/variance used
+    for z-scores (roughly a window of 2/alpha readings); drift compares a fast
+    EWMA (``fast_alpha``) with a slow one (``alpha``). Nothing is flagged until
+    a machine has ``warmup`` readings for the metric.
+    """
+
+    def __init__(self, metrics=DEFAULT_METRICS, alpha=0.05, fast_alpha=0.3,
+                 z_threshold=3.0, drift_threshold=2.0, spike_threshold=4.0, warmup=20):
+        self.metrics = tuple(metrics)
+        self.alpha = alpha
+        self.fast_alpha = fast_alpha
+        self.z_threshold = z_threshold
+        self.drift_threshold = drift_threshold
+        self.spike_threshold = spike_threshold
+        self.warmup = warmup
+        self.states = {}  # str(machine_id) -> tuple of MetricState, one per metric
+
+    def update(self, machine_id, timestamp, values):
+        """Fold one reading into the machine's state and return any anomalies.
+
+        ``timestamp`` is the original timestamp value reported back with each
+        anomaly; ``values`` maps metric name to reading. Time for the rate of
+        change is taken from ``pd.Timestamp(timestamp)``.
+        """
+        seconds = pd.Timestamp(timestamp).timestamp()
+        return self._update(machine_id, timestamp, seconds, values)
+
+    def process(self, df):
+        """Run a DataFrame of readings through the detector in row order.
+
+        Returns an anomaly DataFrame shaped like ``AnomalyDetector.detect_batch``.
+        """
+        columns = ['machine_id', 'timestamp', 'anomaly_type', 'value', 'description']
+        if df is None or len(df) == 0:
+            return pd.DataFrame(columns=columns)
+
+        times = pd.to_datetime(df['timestamp'], errors='coerce', format='ISO8601')
+        seconds = (times - pd.Timestamp(0)).dt.total_seconds()
+        metric_values = [pd.to_numeric(df[m], errors='coerce').to_numpy() if m in df.columns
+                         else [math.nan] * len(df) for m in self.metrics]
+
+        anomalies = []
+        for i, (machine_id, timestamp, second) in enumerate(zip(df['machine_id'], df['timestamp'], seconds)):
+            if math.isnan(second):
+                continue
+            values = {m: metric_values[j][i] for j, m in enumerate(self.metrics)}
+            anomalies.extend(self._update(machine_id, timestamp, second, values))
+
+        return pd.DataFrame(anomalies, columns=columns)
+
+    def _update(self, machine_id, timestamp, seconds, values):
+        # Keyed by str so state restored from JSON matches ids read as numbers
+        key = str(machine_id)
+        states = self.states.get(key)
+        if states is None:
+            states = self.states[key] = tuple(MetricState() for _ in self.metrics)
+
+        anomalies = []
+        for metric, state in zip(self.metrics, states):
+            value = values.get(metric)
+            if value is None or value != value:  # missing or NaN
+                continue
+            value = float(value)
+
+            if state.count >= self.warmup:
+                anomalies.extend(self._score(machine_id, timestamp, metric, state, value, seconds))
+
+            self._fold(state, value, seconds)
+
+        return anomalies
+
+    def _score(self, machine_id, timestamp, metric, state, value, seconds):
+        found = []
+        std = math.sqrt(state.var)
+
+        # Rolling z-score against the exponentially weighted mean/variance
+        if std > 0:
+            z = (value - state.mean) / std
+            if abs(z) > self.z_threshold:
+                found.append(_anomaly(machine_id, timestamp, f'{metric}_zscore', value,
+                                      f'{metric} ({value}) is {z:+.1f} std devs from its rolling mean ({state.mean:.2f}).'))
+
+            # EWMA drift: the fast average has pulled away from the slow one
+            drift = (state.fast - state.slow) / std
+            if abs(drift) > self.drift_threshold:
+                found.append(_anomaly(machine_id, timestamp, f'{metric}_drift', value,
+                                      f'{metric} is drifting ({drift:+.1f} std devs, fast EWMA {state.fast:.2f} vs slow {state.slow:.2f}).'))
+
+        # Rate-of-change spike against the typical rate for this machine
+        rate_std = math.sqrt(state.rate_var)
+        if rate_std > 0 and state.last_time is not None and seconds > state.last_time:
+            rate = (value - state.last_value) / (seconds - state.last_time)
+            if abs(rate - state.rate_mean) / rate_std > self.spike_threshold:
+                found.append(_anomaly(machine_id, timestamp, f'{metric}_spike', value,
+                                      f'{metric} changed at {rate * 60:+.2f}/min, far outside its usual rate.'))
+
+        return found
+
+    def _fold(self, state, value, seconds):
+        alpha = self.alpha
+        if state.count == 0:
+            state.mean = state.fast = state.slow = value
+        else:
+            delta = value - state.mean
+            state.mean += alpha * delta
+            state.var = (1 - alpha) * (state.var + alpha * delta * delta)
+            state.fast += self.fast_alpha * (value - state.fast)
+            state.slow += alpha * (value - state.slow)
+
+            if state.last_time is not None and seconds > state.last_time:
+                rate = (value - state.last_value) / (seconds - state.last_time)
+                rate_delta = rate - state.rate_mean
+                state.rate_mean += alpha * rate_delta
+                state.rate_var = (1 - alpha) * (state.rate_var + alpha * rate_delta * rate_delta)
+
+        state.count += 1
+        state.last_value = value
+        state.last_time = seconds
+
+    def save(self, path):
+        """Atomically write the per-machine state to a JSON file."""
+        snapshot = {
+            'metrics': list(self.metrics),
+            'states': {machine_id: [s.to_list() for s in states]
+                       for machine_id, states in self.states.items()},
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Restore per-machine state saved by ``save``; returns False if there is none."""
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if tuple(snapshot.get('metrics', ())) != self.metrics:
+            log.warning("⚠️ Saved detector state tracks different metrics, starting fresh.")
+            return False
+
+        self.states = {machine_id: tuple(MetricState.from_list(s) for s in states)
+                       for machine_id, states in snapshot['states'].items()}
+        return True
+
+
+def _anomaly(machine_id, timestamp, anomaly_type, value, description):
+    return {
+        'machine_id': machine_id,
+        'timestamp': timestamp,
+        'anomaly_type': anomaly_type,
+        'value': value,
+        'description': description
+    }
@@ -0,0 +1,170 @@
+import sys
+import os
+import logging
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+# Correct path resolution for imports
+backend_src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if backend_src_path not in sys.path:
+    sys.path.insert(0, backend_src_path)
+
+from database import DatabaseManager
+from storage import SQLiteBackend
+import archive
+from archive import ARCHIVE_BATCH_QUERY, _write_batch, archive_readings, read_archive
+
+NOW = datetime(2025, 7, 1, 12, 0)
+
+
+def make_database(tmp):
+    db = DatabaseManager(SQLiteBackend(os.path.join(tmp, 'test.db')))
+    # Three days of readings for two machines, every six hours
+    db.insert_readings_bulk([
+        (NOW - timedelta(hours=hours), machine_id, 60.0 + hours, hours, 0)
+        for hours in range(0, 72, 6) for machine_id in ('M1', 'M2')
+    ])
+    return db
+
+
+def test_old_readings_move_to_partitioned_parquet():
+    pytest.importorskip("pyarrow")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_database(tmp)
+        path = os.path.join(tmp, 'archive')
+        archived = archive_readings(db, retention_days=1, path=path, batch_rows=5, now=NOW)
+
+        db.cursor.execute("SELECT timestamp FROM machine_readings ORDER BY timestamp")
+        hot = [row[0] for row in db.cursor.fetchall()]
+        assert archived == 14 and len(hot) == 10
+        assert hot[0] == NOW - timedelta(days=1)
+        assert sorted(os.listdir(path)) == ['date=2025-06-28', 'date=2025-06-29', 'date=2025-06-30']
+        assert sorted(os.listdir(os.path.join(path, 'date=2025-06-29'))) == ['machine_id=M1', 'machine_id=M2']
+
+        table = read_archive(path=path)
+        assert table.num_rows == archived
+        assert sorted(table.column('id').to_pylist()) == list(range(11, 25))
+
+        # Nothing left to move on a second run
+        assert archive_readings(db, retention_days=1, path=path, now=NOW) == 0
+        db.close()
+
+
+def test_rerun_after_a_crash_does_not_duplicate_readings():
+    pytest.importorskip("pyarrow")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_database(tmp)
+        path = os.path.join(tmp, 'archive')
+
+        # A run that wrote its batch of ten but crashed before deleting it
+        db.cursor.execute(ARCHIVE_BATCH_QUERY, (NOW - timedelta(days=1), 10))
+        _write_batch(db.cursor.fetchall(), path)
+
+        # The re-run uses smaller batches, so its file names differ from the crashed run's
+        archived = archive_readings(db, retention_days=1, path=path, batch_rows=4, now=NOW)
+        db.close()
+
+        ids = read_archive(path=path).column('id').to_pylist()
+        assert archived == 14 and sorted(ids) == list(range(11, 25))
+
+
+def test_archive_queries_project_and_filter():
+    pytest.importorskip("pyarrow")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_database(tmp)
+        path = os.path.join(tmp, 'archive')
+        archive_readings(db, retention_days=1, path=path, now=NOW)
+        db.close()
+
+        table = read_archive(start=datetime(2025, 6, 29, 6), end=datetime(2025, 6, 30),
+                             machine_ids=['M2'], columns=['timestamp', 'temperature'], path=path)
+        assert table.column_names == ['timestamp', 'temperature']
+        assert sorted(table.column('timestamp').to_pylist()) == [
+            datetime(2025, 6, 29, 6), datetime(2025, 6, 29, 12), datetime(2025, 6, 29, 18)]
+
+        assert read_archive(path=os.path.join(tmp, 'missing')).num_rows == 0
+
+
+def test_machine_readings_can_include_the_archive():
+    pytest.importorskip("pyarrow")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_database(tmp)
+        os.environ['ARCHIVE_DIR'] = os.path.join(tmp, 'archive')
+        try:
+            now = datetime.now().replace(microsecond=0)
+            db.insert_readings_bulk([(now - timedelta(days=days), 'M3', 70.0, 10, 0) for days in range(4)])
+            archive_readings(db, retention_days=1, now=now + timedelta(minutes=1))
+
+            hot = db.get_machine_readings(hours=24 * 5)
+            both = db.get_machine_readings(hours=24 * 5, include_archive=True)
+        finally:
+            del os.environ['ARCHIVE_DIR']
+            db.close()
+
+        assert [row['timestamp'] for row in hot if row['machine_id'] == 'M3'] == [now]
+        recent = [row['timestamp'] for row in both if row['machine_id'] == 'M3']
+        assert recent == [now - timedelta(days=days) for days in range(4)]
+
+
+def test_machine_readings_fall_back_to_the_database_without_pyarrow():
+    records = []
+    logger = logging.getLogger('intellifactory.database')
+    handler = type('ListHandler', (logging.Handler,), {'emit': lambda self, r: records.append(r)})()
+    logger.addHandler(handler)
+    saved, archive.ds = archive.ds, None
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_database(tmp)
+        try:
+            now = datetime.now().replace(microsecond=0)
+            db.insert_readings_bulk([(now, 'M3', 70.0, 10, 0)])
+            readings = db.get_machine_readings(hours=24, include_archive=True)
+        finally:
+            archive.ds = saved
+            logger.removeHandler(handler)
+            db.close()
+
+    assert [row['machine_id'] for row in readings] == ['M3']
+    warnings = [r.getMessage() for r in records if r.levelno == logging.WARNING]
+    assert len(warnings) == 1 and 'pyarrow' in warnings[0]
+
+
+def test_machine_readings_fall_back_to_the_database_on_a_corrupt_archive():
+    pytest.importorskip("pyarrow")
+    records = []
+    logger = logging.getLogger('intellifactory.database')
+    handler = type('ListHandler', (logging.Handler,), {'emit': lambda self, r: records.append(r)})()
+    logger.addHandler(handler)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_database(tmp)
+        path = os.path.join(tmp, 'archive')
+        os.environ['ARCHIVE_DIR'] = path
+        try:
+            now = datetime.now().replace(microsecond=0)
+            db.insert_readings_bulk([(now - timedelta(days=days), 'M3', 70.0, 10, 0) for days in range(3)])
+            archive_readings(db, retention_days=1, now=now + timedelta(minutes=1))
+
+            # A half-written part file, as left by a crash mid-write
+            for root, _, files in os.walk(path):
+                for name in files:
+                    with open(os.path.join(root, name), 'r+b') as f:
+                        f.truncate(os.path.getsize(os.path.join(root, name)) // 2)
+            readings = db.get_machine_readings(hours=24 * 5, include_archive=True)
+        finally:
+            del os.environ['ARCHIVE_DIR']
+            logger.removeHandler(handler)
+            db.close()
+
+    assert [row['timestamp'] for row in readings if row['machine_id'] == 'M3'] == [now]
+    assert len([r for r in records if r.levelno == logging.WARNING]) == 1
+
+
+if __name__ == '__main__':
+    test_old_readings_move_to_partitioned_parquet()
+    test_rerun_after_a_crash_does_not_duplicate_readings()
+    test_archive_queries_project_and_filter()
+    test_machine_readings_can_include_the_archive()
+    test_machine_readings_fall_back_to_the_database_without_pyarrow()
+    test_machine_readings_fall_back_to_the_database_on_a_corrupt_archive()
+    print("✅ All archive tests passed")
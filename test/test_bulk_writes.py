@@ -0,0 +1,57 @@
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# Correct path resolution for imports
+backend_src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if backend_src_path not in sys.path:
+    sys.path.insert(0, backend_src_path)
+
+from database import DatabaseManager
+from storage import SQLiteBackend
+from events import subscribe, unsubscribe
+
+T0 = datetime(2025, 6, 30, 10, 0)
+
+
+def make_rows(count, machine_id='M1'):
+    return [(T0 + timedelta(minutes=i), machine_id, 'high_temperature', 80.0 + i, f'reading {i}')
+            for i in range(count)]
+
+
+def test_batches_commit_separately_and_a_failed_batch_rolls_back():
+    published = []
+    listener = lambda table, **details: published.append((table, details.get('rows')))
+    subscribe(listener)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(SQLiteBackend(os.path.join(tmp, 'test.db')))
+            rows = make_rows(5)
+            rows[4] = (rows[4][0], None, 'high_temperature', 84.0, 'no machine')  # violates NOT NULL
+
+            # Batches of two: the first two commit, the third fails as a whole
+            assert db.insert_anomalies_bulk(rows, batch_size=2) == 4
+            db.cursor.execute("SELECT COUNT(*) FROM anomalies")
+            assert db.cursor.fetchone()[0] == 4
+            db.close()
+    finally:
+        unsubscribe(listener)
+    assert published.count(('anomalies', 4)) == 1
+
+
+def test_missing_values_are_written_as_null():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(SQLiteBackend(os.path.join(tmp, 'test.db')))
+        rows = make_rows(2)
+        rows[1] = rows[1][:3] + (float('nan'), rows[1][4])
+        assert db.insert_anomalies_bulk(rows) == 2
+        db.cursor.execute("SELECT value FROM anomalies ORDER BY timestamp")
+        assert [row[0] for row in db.cursor.fetchall()] == [80.0, None]
+        db.close()
+
+
+if __name__ == '__main__':
+    test_batches_commit_separately_and_a_failed_batch_rolls_back()
+    test_missing_values_are_written_as_null()
+    print("✅ All bulk write tests passed")
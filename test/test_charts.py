@@ -0,0 +1,64 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Correct path resolution for imports
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from chartHelper import machine_color, pivot_series, process_temperature_data
+
+T0 = datetime(2025, 6, 30, 10, 0)
+
+
+def reference_pivot(readings, metric):
+    """The per-label scan pivot_series replaced: first matching reading per machine and label."""
+    labels = sorted({r['timestamp'].strftime('%H:%M') for r in readings})
+    return labels, {
+        machine_id: [next((r[metric] for r in readings
+                           if r['machine_id'] == machine_id and r['timestamp'].strftime('%H:%M') == label), None)
+                     for label in labels]
+        for machine_id in {r['machine_id'] for r in readings}
+    }
+
+
+def make_readings():
+    readings = []
+    for minute in range(0, 12, 2):
+        for machine_id in ('M2', 'M1', 'M10'):
+            if machine_id == 'M10' and minute % 4:
+                continue  # M10 reports half as often, leaving gaps
+            readings.append({'timestamp': T0 - timedelta(minutes=minute), 'machine_id': machine_id,
+                             'temperature': 70.0 + minute, 'units_produced': 100 - minute})
+    # A second reading in an occupied bucket: the first in query order wins
+    readings.append({'timestamp': T0 + timedelta(seconds=30), 'machine_id': 'M1',
+                     'temperature': 99.0, 'units_produced': 1})
+    return readings
+
+
+def test_pivot_matches_the_per_label_scan():
+    readings = make_readings()
+    chart = pivot_series(readings, 'temperature', 'Temperature')
+    labels, expected = reference_pivot(readings, 'temperature')
+
+    assert chart['labels'] == labels
+    assert [dataset['label'] for dataset in chart['datasets']] == ['M1 Temperature', 'M10 Temperature',
+                                                                   'M2 Temperature']
+    for dataset in chart['datasets']:
+        machine_id = dataset['label'].split()[0]
+        assert dataset['data'] == expected[machine_id]
+        assert (dataset['borderColor'], dataset['backgroundColor']) == machine_color(machine_id)
+    assert chart['datasets'][0]['data'][-1] == 70.0
+    assert None in chart['datasets'][1]['data']
+
+
+def test_empty_readings_give_an_empty_chart():
+    chart = process_temperature_data([])
+    assert chart['labels'] == [] and chart['datasets'][0]['data'] == []
+
+
+if __name__ == '__main__':
+    test_pivot_matches_the_per_label_scan()
+    test_empty_readings_give_an_empty_chart()
+    print("✅ All chart pivot tests passed")
@@ -0,0 +1,110 @@
+import sys
+import os
+import threading
+import time
+
+# Correct path resolution for imports
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from connectionPool import ConnectionPool, PoolError, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self):
+        self.healthy = True
+        self.closed = False
+
+    def is_connected(self):
+        return self.healthy and not self.closed
+
+    def close(self):
+        self.closed = True
+
+
+def test_exhausted_pool_times_out_then_recovers():
+    pool = ConnectionPool(FakeConnection, pool_size=1, max_overflow=1, timeout=0.05)
+    first, second = pool.acquire(), pool.acquire()
+
+    started = time.monotonic()
+    try:
+        pool.acquire()
+        assert False, "expected PoolTimeoutError"
+    except PoolTimeoutError:
+        assert time.monotonic() - started >= 0.05
+    assert pool.stats()['timeouts'] == 1
+
+    # The overflow connection is closed on release, the other goes back to idle
+    pool.release(first)
+    pool.release(second)
+    assert second.closed and not first.closed
+    assert pool.acquire() is first
+    assert pool.stats()['total'] == 1
+
+
+def test_concurrent_callers_never_exceed_the_bound():
+    pool = ConnectionPool(FakeConnection, pool_size=2, max_overflow=1, timeout=5)
+    lock = threading.Lock()
+    state = {'active': 0, 'peak': 0}
+
+    def worker():
+        for _ in range(20):
+            with pool.connection():
+                with lock:
+                    state['active'] += 1
+                    state['peak'] = max(state['peak'], state['active'])
+                time.sleep(0.001)
+                with lock:
+                    state['active'] -= 1
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = pool.stats()
+    assert state['peak'] <= 3
+    assert stats['in_use'] == 0 and stats['total'] <= 2 and stats['timeouts'] == 0
+
+
+def test_broken_connections_are_replaced():
+    pool = ConnectionPool(FakeConnection, pool_size=1, max_overflow=0, timeout=0.05)
+    connection = pool.acquire()
+    pool.release(connection)
+    connection.healthy = False
+
+    replacement = pool.acquire()
+    assert replacement is not connection and connection.closed
+    assert pool.stats()['recycled'] == 1
+
+    # A failure inside the context manager discards the connection
+    pool.release(replacement)
+    try:
+        with pool.connection():
+            raise RuntimeError('query failed')
+    except RuntimeError:
+        pass
+    assert pool.stats()['discarded'] == 1 and pool.stats()['total'] == 0
+
+
+def test_failed_connect_frees_its_slot():
+    pool = ConnectionPool(lambda: None, pool_size=1, max_overflow=0, timeout=0.05)
+    for _ in range(2):
+        try:
+            pool.acquire()
+            assert False, "expected PoolError"
+        except PoolTimeoutError:
+            assert False, "a failed connect must not hold its slot"
+        except PoolError:
+            pass
+    assert pool.stats()['total'] == 0
+
+
+if __name__ == '__main__':
+    test_exhausted_pool_times_out_then_recovers()
+    test_concurrent_callers_never_exceed_the_bound()
+    test_broken_connections_are_replaced()
+    test_failed_connect_frees_its_slot()
+    print("✅ All connection pool tests passed")
@@ -0,0 +1,124 @@
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Correct path resolution for imports
+test_dir = os.path.dirname(__file__)
+for path in (os.path.join(test_dir, '..', 'src'), os.path.join(test_dir, '..', 'backend')):
+    path = os.path.abspath(path)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from database import DatabaseManager
+from storage import SQLiteBackend
+from dbHelper import CACHE_TTLS, DBHelper, decode_cursor, encode_cursor
+
+T0 = datetime(2025, 6, 30, 10, 0)
+
+
+def make_helper(tmp):
+    path = os.path.join(tmp, 'test.db')
+    DatabaseManager(SQLiteBackend(path)).close()
+    return DBHelper(backend=SQLiteBackend(path))
+
+
+def insert_readings(helper, rows):
+    connection = helper.backend.connect()
+    connection.cursor().executemany(
+        "INSERT INTO machine_readings (timestamp, machine_id, temperature, units_produced, error_flag) "
+        "VALUES (?, ?, 70.0, 10, 0)", rows)
+    connection.commit()
+    connection.close()
+
+
+def test_late_readings_are_still_picked_up():
+    with tempfile.TemporaryDirectory() as tmp:
+        helper = make_helper(tmp)
+        insert_readings(helper, [(T0, 'M1'), (T0 + timedelta(minutes=5), 'M2')])
+        marks = helper.get_high_water_marks()
+        assert marks['reading_id'] == 2
+
+        # M3's clock is behind: its reading is stamped before the newest one
+        insert_readings(helper, [(T0 - timedelta(minutes=1), 'M3')])
+        late = helper.get_readings_since(marks['reading_id'])
+        assert [row['machine_id'] for row in late] == ['M3']
+        assert helper.get_readings_since(late[-1]['id']) == []
+        assert [row['id'] for row in helper.get_readings_since(0, limit=2)] == [1, 2]
+
+
+def test_heartbeats_report_an_unreadable_registry():
+    with tempfile.TemporaryDirectory() as tmp:
+        helper = make_helper(tmp)
+        assert helper.get_machine_heartbeats() == []
+        connection = helper.backend.connect()
+        connection.cursor().execute("DROP TABLE machines")
+        connection.commit()
+        connection.close()
+        helper.cache.invalidate()
+
+        assert helper.get_machine_heartbeats() is None
+        assert helper.get_machines() == []
+
+
+def test_cursors_round_trip_and_reject_garbage():
+    cursor = encode_cursor(T0, 42)
+    assert decode_cursor(cursor) == (T0, 42)
+    for bad in ('not-base64!', encode_cursor(T0, 1)[:-4], 'MjAyNQ==', ''):
+        try:
+            decode_cursor(bad)
+            assert False, f"expected ValueError for {bad!r}"
+        except ValueError:
+            pass
+
+
+def test_pages_split_timestamp_ties_by_id():
+    with tempfile.TemporaryDirectory() as tmp:
+        helper = make_helper(tmp)
+        # Five readings share one timestamp, so only the id orders them
+        insert_readings(helper, [(T0, f'M{i}') for i in range(5)] + [(T0 - timedelta(minutes=1), 'M9')])
+
+        ids = []
+        cursor = None
+        while True:
+            rows, cursor = helper.get_readings_page(limit=2, cursor=cursor)
+            ids.extend(row['id'] for row in rows)
+            if cursor is None:
+                break
+        assert ids == [5, 4, 3, 2, 1, 6]
+
+        connection = helper.backend.connect()
+        connection.cursor().executemany(
+            "INSERT INTO anomalies (timestamp, machine_id, anomaly_type, value, message) VALUES (?, ?, ?, 1, '')",
+            [(T0, 'M1', kind) for kind in ('high_temperature', 'low_production', 'error_flag_raised')])
+        connection.commit()
+        connection.close()
+        first, cursor = helper.get_anomalies_page(limit=2)
+        rest, last = helper.get_anomalies_page(limit=2, cursor=cursor)
+        assert [row['id'] for row in first + rest] == [3, 2, 1] and last is None
+
+
+def test_repeated_machine_reading_calls_hit_the_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        helper = make_helper(tmp)
+        now = datetime.now().replace(microsecond=0)
+        insert_readings(helper, [(now - timedelta(minutes=minutes), 'M1') for minutes in range(3)])
+
+        # Keep both calls inside one TTL window
+        ttl = CACHE_TTLS['machine_readings']
+        if ttl - time.time() % ttl < 0.5:
+            time.sleep(0.5)
+        first = helper.get_machine_readings(hours=1)
+        second = helper.get_machine_readings(hours=1)
+        assert len(first) == 3 and second is first
+        assert helper.cache_stats()['hits'] == 1
+
+
+if __name__ == '__main__':
+    test_late_readings_are_still_picked_up()
+    test_heartbeats_report_an_unreadable_registry()
+    test_cursors_round_trip_and_reject_garbage()
+    test_pages_split_timestamp_ties_by_id()
+    test_repeated_machine_reading_calls_hit_the_cache()
+    print("✅ All DBHelper tests passed")
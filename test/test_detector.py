@@ -1,106 +1,99 @@
 import sys
 import os
+import tempfile
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
 # Correct path resolution for imports
 backend_src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
 if backend_src_path not in sys.path:
     sys.path.insert(0, backend_src_path)
 
-try:
-    from database import DatabaseManager
-    from detector import AnomalyDetector
-except ImportError as e:
-    print(f"Import error: {e}")
-    print("Please ensure:")
-    print("1. The backend/src directory exists")
-    print("2. It contains database.py and detector.py files")
-    print(f"Current Python path: {sys.path}")
-    sys.exit(1)
-
-def test_detector():
-    db_manager = DatabaseManager()
-    
-    if db_manager.connection and db_manager.connection.is_connected():
+from database import DatabaseManager
+from detector import AnomalyDetector
+from storage import SQLiteBackend
+
+T0 = datetime(2025, 3, 7, 9, 0)
+
+
+def legacy_detect(record):
+    """The per-row detector detect_batch replaced, kept as the reference it must match."""
+    machine_id = record.get('machine_id')
+    timestamp = record.get('timestamp')
+    units_produced = record.get('units_produced')
+    temperature = record.get('temperature')
+    error_flag = record.get('error_flag')
+    if not timestamp:
+        return []
+
+    found = []
+    if units_produced is not None and units_produced < 50:
+        found.append((machine_id, timestamp, 'low_production', units_produced))
+    if temperature is not None and temperature > 75:
+        found.append((machine_id, timestamp, 'high_temperature', temperature))
+    if error_flag == 1:
+        found.append((machine_id, timestamp, 'error_flag_raised', error_flag))
+    return found
+
+
+def make_detector(tmp):
+    db_manager = DatabaseManager(SQLiteBackend(os.path.join(tmp, 'test.db')))
+    return db_manager, AnomalyDetector(db_manager)
+
+
+def test_single_records_are_detected():
+    records = [
+        {'machine_id': 'M1', 'timestamp': T0, 'units_produced': 80, 'temperature': 60.0, 'error_flag': 0},
+        {'machine_id': 'M2', 'timestamp': T0, 'units_produced': 40, 'temperature': 70.0, 'error_flag': 0},
+        {'machine_id': 'M3', 'timestamp': T0, 'units_produced': 90, 'temperature': 85.0, 'error_flag': 0},
+        {'machine_id': 'M4', 'timestamp': T0, 'units_produced': 100, 'temperature': 65.0, 'error_flag': 1},
+        {'machine_id': 'M5', 'timestamp': T0, 'units_produced': 30, 'temperature': 90.0, 'error_flag': 1},
+        {'machine_id': 'M6', 'timestamp': None, 'units_produced': 30, 'temperature': 90.0, 'error_flag': 1},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager, detector = make_detector(tmp)
         try:
-            # Fixed: SQL query assuming table is named 'anomalies' not 'anomaly'
-            db_manager.cursor.execute("DELETE FROM anomalies")
-            db_manager.connection.commit()
-            print("✅ Cleared old anomalies from the database before testing.")
-        except Exception as e:
-            print(f"❌ Error clearing anomalies: {e}")
+            found = [[a['anomaly_type'] for a in detector.detect_anomalies(record)] for record in records]
+        finally:
             db_manager.close()
-            return
-    else:
-        print("❌ Database connection failed.")
-        return
-    
-    detector = AnomalyDetector(db_manager)
-    
-    # Fixed: test records corrected timestamp typo and added proper datetime format
-    test_records = [
-        {
-            'machine_id': 'M1',
-            'timestamp': datetime.strptime('2025-03-07 09:00', '%Y-%m-%d %H:%M'),
-            'units_produced': 80,
-            'temperature': 60.0,
-            'error_flag': 0
-        },
-        {
-            'machine_id': 'M2', 
-            'timestamp': datetime.strptime('2025-03-07 09:05', '%Y-%m-%d %H:%M'),
-            'units_produced': 40,  # Low production
-            'temperature': 70.0,
-            'error_flag': 0
-        },
-        {
-            'machine_id': 'M3',
-            'timestamp': datetime.strptime('2025-03-07 09:10', '%Y-%m-%d %H:%M'),
-            'units_produced': 90,
-            'temperature': 85.0,  # High temperature
-            'error_flag': 0
-        },
-        {
-            'machine_id': 'M4',
-            'timestamp': datetime.strptime('2025-03-07 09:15', '%Y-%m-%d %H:%M'),
-            'units_produced': 100,
-            'temperature': 65.0,
-            'error_flag': 1  # Error flag
-        },
-        {
-            'machine_id': 'M5',
-            'timestamp': datetime.strptime('2025-03-07 09:20', '%Y-%m-%d %H:%M'),
-            'units_produced': 30,  # Low production
-            'temperature': 90.0,   # High temperature
-            'error_flag': 1        # Error flag - Multiple anomalies
-        }
+
+    assert found == [
+        [],
+        ['low_production'],
+        ['high_temperature'],
+        ['error_flag_raised'],
+        ['low_production', 'high_temperature', 'error_flag_raised'],
+        [],
     ]
-    
-    total_anomalies = 0
-    
-    try:
-        for record in test_records:
-            try:
-                anomalies = detector.detect_anomalies(record)
-                print(f"Input: {record}")
-                
-                if anomalies:
-                    print("🚨 Detected anomalies:")
-                    for anomaly in anomalies:
-                        print(f"  - {anomaly}")
-                        total_anomalies += len(anomalies)
-                else:
-                    print("✅ No anomalies detected.")
-                print("-" * 40)
-                
-            except Exception as e:
-                print(f"❌ Error processing record {record}: {e}")
-                continue
-                
-        print(f"📊 Total anomalies detected in test: {total_anomalies}")
-        
-    finally:
-        db_manager.close()
+
+
+def test_detect_batch_matches_the_per_row_detector():
+    # Every value on and either side of each threshold, plus missing ones
+    units = [49, 50, 51, None, np.nan, 0, -1]
+    temperatures = [74.9, 75.0, 75.01, None, np.nan, 120.0]
+    error_flags = [0, 1, 2, None, np.nan]
+    records = [
+        {'machine_id': f'M{i % 3}', 'timestamp': T0 if i % 11 else None,
+         'units_produced': units[i % len(units)], 'temperature': temperatures[i % len(temperatures)],
+         'error_flag': error_flags[i % len(error_flags)]}
+        for i in range(len(units) * len(temperatures) * len(error_flags))
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager, detector = make_detector(tmp)
+        try:
+            batch = detector.detect_batch(pd.DataFrame(records))
+        finally:
+            db_manager.close()
+
+    expected = [anomaly for record in records for anomaly in legacy_detect(record)]
+    got = list(zip(batch['machine_id'], batch['timestamp'], batch['anomaly_type'], batch['value'].astype(float)))
+    assert got == [(m, t, kind, float(value)) for m, t, kind, value in expected]
+
 
 if __name__ == '__main__':
-    test_detector()
+    test_single_records_are_detected()
+    test_detect_batch_matches_the_per_row_detector()
+    print("✅ All detector tests passed")
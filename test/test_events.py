@@ -0,0 +1,91 @@
+import sys
+import os
+import threading
+import time
+
+# Correct path resolution for imports
+backend_src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if backend_src_path not in sys.path:
+    sys.path.insert(0, backend_src_path)
+
+from events import Debouncer, publish, subscribe, unsubscribe
+
+
+def test_subscribers_receive_their_topics():
+    received = []
+    readings = subscribe(lambda topic, **details: received.append((topic, details)), 'machine_readings')
+    everything = subscribe(lambda topic, **details: received.append(('*', topic)))
+    try:
+        publish('machine_readings', rows=3)
+        publish('anomalies', rows=1)
+    finally:
+        unsubscribe(readings)
+        unsubscribe(everything)
+
+    assert received == [('machine_readings', {'rows': 3}), ('*', 'machine_readings'), ('*', 'anomalies')]
+
+
+def test_failing_subscriber_does_not_stop_publish():
+    received = []
+    broken = subscribe(lambda topic, **details: 1 / 0, 'anomalies')
+    working = subscribe(lambda topic, **details: received.append(topic), 'anomalies')
+    try:
+        publish('anomalies')
+    finally:
+        unsubscribe(broken)
+        unsubscribe(working)
+    assert received == ['anomalies']
+
+
+def test_debouncer_coalesces_a_burst():
+    debouncer = Debouncer(quiet=0.05, max_delay=1.0)
+    assert not debouncer.due()
+
+    for _ in range(5):
+        debouncer.touch('machine_readings', rows=1)
+    assert not debouncer.due()
+    time.sleep(0.06)
+    assert debouncer.due()
+    assert not debouncer.due()
+
+
+def test_debouncer_fires_during_a_continuous_burst():
+    debouncer = Debouncer(quiet=0.05, max_delay=0.1)
+    started = time.monotonic()
+    fired = False
+    while time.monotonic() - started < 0.3 and not fired:
+        debouncer.touch()
+        time.sleep(0.01)
+        fired = debouncer.due()
+    assert fired
+
+
+def test_debouncer_wait_wakes_a_blocked_thread():
+    debouncer = Debouncer(quiet=0.05, max_delay=1.0)
+    assert not debouncer.wait(timeout=0.05)
+
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(debouncer.wait(timeout=5)))
+    started = time.monotonic()
+    waiter.start()
+    time.sleep(0.02)
+    debouncer.touch('anomalies')
+    waiter.join(2)
+    assert results == [True]
+    assert time.monotonic() - started < 1
+
+
+def test_debouncer_wait_settles_a_burst_past_its_timeout():
+    debouncer = Debouncer(quiet=0.05, max_delay=1.0)
+    debouncer.touch()
+    assert debouncer.wait(timeout=0)
+
+
+if __name__ == '__main__':
+    test_subscribers_receive_their_topics()
+    test_failing_subscriber_does_not_stop_publish()
+    test_debouncer_coalesces_a_burst()
+    test_debouncer_fires_during_a_continuous_burst()
+    test_debouncer_wait_wakes_a_blocked_thread()
+    test_debouncer_wait_settles_a_burst_past_its_timeout()
+    print("✅ All event tests passed")
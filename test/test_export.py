@@ -0,0 +1,69 @@
+import sys
+import os
+import gzip
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+# Correct path resolution for imports
+backend_src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if backend_src_path not in sys.path:
+    sys.path.insert(0, backend_src_path)
+
+from database import DatabaseManager
+from storage import SQLiteBackend
+from export import export_table, format_for, pq
+
+
+def make_database(tmp):
+    backend = SQLiteBackend(os.path.join(tmp, 'test.db'))
+    db = DatabaseManager(backend)
+    db.insert_readings_bulk([
+        (datetime(2025, 6, 30, 10, minute), machine_id, 70.0 + minute, 100, minute % 2)
+        for minute in range(10) for machine_id in ('M1', 'M2')
+    ])
+    db.close()
+    return backend
+
+
+def test_format_follows_extension():
+    assert format_for('out.csv') == 'csv'
+    assert format_for('out.csv.gz') == 'csv.gz'
+    assert format_for('out.parquet') == 'parquet'
+    assert format_for('out.dat', 'parquet') == 'parquet'
+
+
+def test_filtered_gzip_csv_export_streams_every_chunk():
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = make_database(tmp)
+        path = os.path.join(tmp, 'readings.csv.gz')
+        written = export_table(backend, 'readings', path, machine_ids=['M1'],
+                               start=datetime(2025, 6, 30, 10, 2), end=datetime(2025, 6, 30, 10, 8), chunk_rows=4)
+
+        with gzip.open(path, 'rt') as f:
+            df = pd.read_csv(f)
+        assert written == len(df) == 6
+        assert set(df['machine_id']) == {'M1'}
+        assert list(df['error_flag']) == [0, 1, 0, 1, 0, 1]
+
+
+def test_parquet_export_writes_one_row_group_per_chunk():
+    if pq is None:
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = make_database(tmp)
+        path = os.path.join(tmp, 'readings.parquet')
+        assert export_table(backend, 'machine_readings', path, chunk_rows=8) == 20
+
+        parquet = pq.ParquetFile(path)
+        assert parquet.metadata.num_rows == 20
+        assert parquet.num_row_groups == 3
+        assert str(parquet.schema_arrow.field('timestamp').type) == 'timestamp[us]'
+
+
+if __name__ == '__main__':
+    test_format_follows_extension()
+    test_filtered_gzip_csv_export_streams_every_chunk()
+    test_parquet_export_writes_one_row_group_per_chunk()
+    print("✅ All export tests passed")
@@ -0,0 +1,195 @@
+import sys
+import os
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+# Correct path resolution for imports
+backend_src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if backend_src_path not in sys.path:
+    sys.path.insert(0, backend_src_path)
+
+from database import DatabaseManager
+from storage import SQLiteBackend
+from csv_stream import start_position, advance_watermark, iter_csv_chunks, read_complete_lines
+from main import run_anomaly_detection, run_streaming_detection
+
+HEADER = b'timestamp,machine_id,temperature,units_produced,error_flag\n'
+ROWS = [
+    b'2025-06-30 10:00:00,M1,70.0,45,0\n',
+    b'2025-06-30 11:00:00,M1,76.0,90,0\n',
+]
+
+
+def make_anomalies():
+    return pd.DataFrame({
+        'timestamp': [datetime(2025, 6, 30, 10, 0), datetime(2025, 6, 30, 11, 0)],
+        'machine_id': ['M1', 'M1'],
+        'anomaly_type': ['low_production', 'high_temperature'],
+        'value': [45.0, 76.0],
+        'description': ['low', 'hot'],
+    })
+
+
+def test_anomaly_writes_are_idempotent():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(SQLiteBackend(os.path.join(tmp, 'test.db')))
+        db.insert_anomalies_bulk(make_anomalies())
+        db.insert_anomalies_bulk(make_anomalies())
+        db.insert_anomaly(datetime(2025, 6, 30, 10, 0), 'M1', 'low_production', 44.0, 'lower')
+
+        db.cursor.execute("SELECT anomaly_type, value FROM anomalies ORDER BY timestamp")
+        assert db.cursor.fetchall() == [('low_production', 44.0), ('high_temperature', 76.0)]
+        db.close()
+
+
+def test_watermark_resumes_after_processed_rows():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(SQLiteBackend(os.path.join(tmp, 'test.db')))
+        path = os.path.join(tmp, 'readings.csv')
+        with open(path, 'wb') as f:
+            f.write(HEADER + ROWS[0])
+
+        assert start_position(db, path, HEADER) == (len(HEADER), 0)
+        advance_watermark(db, path, HEADER, len(HEADER) + len(ROWS[0]), 1,
+                          pd.DataFrame({'timestamp': ['2025-06-30 10:00:00']}))
+
+        with open(path, 'ab') as f:
+            f.write(ROWS[1])
+        assert start_position(db, path, HEADER) == (len(HEADER) + len(ROWS[0]), 1)
+        assert start_position(db, path, HEADER, full=True) == (len(HEADER), 0)
+
+        # A rewritten file with a different header is read from the start
+        other = b'timestamp,machine_id,temperature\n'
+        with open(path, 'wb') as f:
+            f.write(other + ROWS[0])
+        assert start_position(db, path, other) == (len(other), 0)
+        db.close()
+
+
+def test_partial_final_line_is_left_for_the_next_run():
+    partial = ROWS[1][:-4]  # '...,76.0,9' while '0,0' is still being written
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'readings.csv')
+        with open(path, 'wb') as f:
+            f.write(HEADER + ROWS[0] + partial)
+
+        with open(path, 'rb') as f:
+            header = f.readline()
+            chunks = list(iter_csv_chunks(f, header, 10))
+            assert [len(chunk) for chunk in chunks] == [1]
+            assert f.tell() == len(HEADER) + len(ROWS[0])
+        with open(path, 'rb') as f:
+            f.readline()
+            assert read_complete_lines(f) == ROWS[0]
+            assert f.tell() == len(HEADER) + len(ROWS[0])
+
+        os.environ.update(STORAGE_BACKEND='sqlite', SQLITE_PATH=os.path.join(tmp, 'test.db'))
+        try:
+            run_anomaly_detection(path)
+            with open(path, 'ab') as f:
+                f.write(ROWS[1][len(partial):])
+            run_anomaly_detection(path)
+
+            db = DatabaseManager()
+            db.cursor.execute("SELECT SUM(reading_count), SUM(units_produced_sum) FROM machine_rollup_hour")
+            assert db.cursor.fetchone() == (2, 135)
+            assert db.get_watermark(os.path.abspath(path))['byte_offset'] == len(HEADER) + len(ROWS[0]) + len(ROWS[1])
+            db.close()
+        finally:
+            del os.environ['STORAGE_BACKEND'], os.environ['SQLITE_PATH']
+
+
+def test_unparseable_timestamps_never_reach_the_database():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'readings.csv')
+        with open(path, 'wb') as f:
+            f.write(HEADER + ROWS[0] + b'0,80,1,,\n' + ROWS[1])
+        with open(path, 'rb') as f:
+            header = f.readline()
+            chunk = next(iter_csv_chunks(f, header, 10))
+        assert list(chunk['timestamp']) == ['2025-06-30 10:00:00', '2025-06-30 11:00:00']
+
+        db = DatabaseManager(SQLiteBackend(os.path.join(tmp, 'test.db')))
+        anomalies = make_anomalies().astype({'timestamp': object})
+        anomalies.loc[1, 'timestamp'] = 'not a time'
+        assert db.insert_anomalies_bulk(anomalies) == 1
+        assert [a['anomaly_type'] for a in db.get_recent_anomalies()] == ['low_production']
+        db.close()
+
+
+def test_full_run_only_replaces_its_own_rollups():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, name) for name in ('a.csv', 'b.csv')]
+        for path in paths:
+            with open(path, 'wb') as f:
+                f.write(HEADER + ROWS[0] + ROWS[1])
+
+        os.environ.update(STORAGE_BACKEND='sqlite', SQLITE_PATH=os.path.join(tmp, 'test.db'))
+        try:
+            for path in paths:
+                run_anomaly_detection(path)
+            run_anomaly_detection(paths[1], full=True)
+
+            db = DatabaseManager()
+            db.cursor.execute("SELECT source, SUM(reading_count) FROM machine_rollup_hour GROUP BY source ORDER BY source")
+            assert db.cursor.fetchall() == [(os.path.abspath(path), 2) for path in paths]
+
+            # Clearing the watermarks makes the next run start over without double counting
+            assert db.clear_watermarks()
+            assert start_position(db, paths[0], HEADER) == (len(HEADER), 0)
+            db.close()
+            run_anomaly_detection(paths[0])
+            db = DatabaseManager()
+            db.cursor.execute("SELECT SUM(reading_count) FROM machine_rollup_hour")
+            assert db.cursor.fetchone() == (4,)
+            db.close()
+        finally:
+            del os.environ['STORAGE_BACKEND'], os.environ['SQLITE_PATH']
+
+
+def test_interrupted_stream_resumes_after_its_last_committed_chunk():
+    rows = [f'2025-06-30 10:{minute:02d}:00,M1,70.0,50,0\n'.encode() for minute in range(5)]
+    write_rollups = DatabaseManager.write_rollups
+    calls = []
+
+    def fail_second_chunk(self, *args, **kwargs):
+        calls.append(kwargs.get('watermark'))
+        return len(calls) != 2 and write_rollups(self, *args, **kwargs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'readings.csv')
+        with open(path, 'wb') as f:
+            f.write(HEADER + b''.join(rows))
+        os.environ.update(STORAGE_BACKEND='sqlite', SQLITE_PATH=os.path.join(tmp, 'test.db'))
+        DatabaseManager.write_rollups = fail_second_chunk
+        try:
+            run_streaming_detection(path, chunk_rows=2)
+        finally:
+            DatabaseManager.write_rollups = write_rollups
+        try:
+            db = DatabaseManager()
+            assert db.get_watermark(os.path.abspath(path))['byte_offset'] == len(HEADER) + len(rows[0]) * 2
+            db.cursor.execute("SELECT SUM(reading_count) FROM machine_rollup_hour")
+            assert db.cursor.fetchone() == (2,)
+            db.close()
+
+            run_streaming_detection(path, chunk_rows=2)
+            db = DatabaseManager()
+            db.cursor.execute("SELECT SUM(reading_count), SUM(units_produced_sum) FROM machine_rollup_hour")
+            assert db.cursor.fetchone() == (5, 250)
+            assert db.get_watermark(os.path.abspath(path))['rows_processed'] == 5
+            db.close()
+        finally:
+            del os.environ['STORAGE_BACKEND'], os.environ['SQLITE_PATH']
+
+
+if __name__ == '__main__':
+    test_anomaly_writes_are_idempotent()
+    test_watermark_resumes_after_processed_rows()
+    test_partial_final_line_is_left_for_the_next_run()
+    test_unparseable_timestamps_never_reach_the_database()
+    test_full_run_only_replaces_its_own_rollups()
+    test_interrupted_stream_resumes_after_its_last_committed_chunk()
+    print("✅ All incremental detection tests passed")
@@ -0,0 +1,152 @@
+import sys
+import os
+import json
+import tempfile
+from datetime import datetime
+
+# Correct path resolution for imports
+backend_src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if backend_src_path not in sys.path:
+    sys.path.insert(0, backend_src_path)
+
+from database import DatabaseManager
+from storage import SQLiteBackend
+from ingest import InvalidReadings, ReadingWriter, parse_readings
+
+
+def test_json_and_ndjson_batches_parse_to_rows():
+    reading = {"timestamp": "2025-06-30T10:00:00", "machine_id": "M1", "temperature": 80.5,
+               "units_produced": 40, "error_flag": True}
+    expected = [(datetime(2025, 6, 30, 10, 0), 'M1', 80.5, 40, 1)]
+
+    assert parse_readings(json.dumps([reading]), 'application/json') == expected
+    assert parse_readings(json.dumps({"readings": [reading]}), 'application/json') == expected
+    assert parse_readings(json.dumps(reading) + '\n\n', 'application/x-ndjson') == expected
+
+
+def test_invalid_rows_reject_the_batch():
+    body = json.dumps([
+        {"timestamp": "2025-06-30T10:00:00", "machine_id": "M1"},
+        {"timestamp": "yesterday", "machine_id": "M1"},
+        {"timestamp": "2025-06-30T10:00:00", "machine_id": "M1", "units_produced": "many"},
+    ])
+    try:
+        parse_readings(body, 'application/json')
+    except InvalidReadings as e:
+        assert len(e.errors) == 2
+        assert e.errors[0].startswith('reading 1:')
+        return
+    assert False, "expected InvalidReadings"
+
+
+def test_full_queue_rejects_and_writer_drains_batches():
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteBackend(os.path.join(tmp, 'test.db'))
+        writer = ReadingWriter(max_queued_rows=3, batch_rows=2, max_delay=0.05,
+                               db_factory=lambda: DatabaseManager(backend))
+        rows = [(datetime(2025, 6, 30, 10, i), 'M1', 80.0, 100, 0) for i in range(3)]
+        assert writer.submit(rows)
+        assert not writer.submit(rows[:1])
+
+        writer.start()
+        writer.stop()
+
+        db = DatabaseManager(backend)
+        db.cursor.execute("SELECT COUNT(*) FROM machine_readings")
+        assert db.cursor.fetchone()[0] == 3
+        db.cursor.execute("SELECT COUNT(*) FROM anomalies WHERE anomaly_type = 'high_temperature'")
+        assert db.cursor.fetchone()[0] == 3
+        db.close()
+
+
+class FlakyDatabase(DatabaseManager):
+    """Rejects the first ``failures`` reading inserts, as during a database outage."""
+
+    def __init__(self, backend, failures):
+        super().__init__(backend)
+        self.failures = failures
+
+    def insert_readings_bulk(self, rows, batch_size=1000):
+        if self.failures:
+            self.failures -= 1
+            return 0
+        return super().insert_readings_bulk(rows, batch_size)
+
+
+def test_rejected_batches_are_retried_and_still_count_as_queued():
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteBackend(os.path.join(tmp, 'test.db'))
+        writer = ReadingWriter(max_queued_rows=3, batch_rows=3, max_delay=0, retry_delays=(0.01, 0.01),
+                               db_factory=lambda: FlakyDatabase(backend, failures=2))
+        rows = [(datetime(2025, 6, 30, 10, i), 'M1', 70.0, 100, 0) for i in range(3)]
+        assert writer.submit(rows)
+
+        # A batch taken by the writer keeps its place until it is written
+        batch = writer._next_batch()
+        assert writer.queued == 3 and not writer.submit(rows[:1])
+        writer._pending.extendleft(reversed(batch))
+        writer._in_flight = 0
+
+        writer.start()
+        writer.stop()
+        assert writer.queued == 0
+
+        db = DatabaseManager(backend)
+        db.cursor.execute("SELECT COUNT(*) FROM machine_readings")
+        assert db.cursor.fetchone()[0] == 3
+        db.close()
+
+        # Past the last retry the batch is dropped rather than blocking the queue forever
+        writer = ReadingWriter(batch_rows=3, max_delay=0, retry_delays=(0.01,),
+                               db_factory=lambda: FlakyDatabase(backend, failures=2))
+        assert writer.submit(rows)
+        writer.start()
+        writer.stop()
+        assert writer.queued == 0
+        db = DatabaseManager(backend)
+        db.cursor.execute("SELECT COUNT(*) FROM machine_readings")
+        assert db.cursor.fetchone()[0] == 3
+        db.close()
+
+
+class FlakyRollups(DatabaseManager):
+    """Fails the first ``failures`` rollup writes, after the readings are committed."""
+
+    def __init__(self, backend, failures):
+        super().__init__(backend)
+        self.failures = failures
+
+    def update_rollups(self, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            return False
+        return super().update_rollups(*args, **kwargs)
+
+
+def test_failed_detection_is_retried_without_rewriting_readings():
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteBackend(os.path.join(tmp, 'test.db'))
+        writer = ReadingWriter(batch_rows=3, max_delay=0, retry_delays=(0.01, 0.01),
+                               db_factory=lambda: FlakyRollups(backend, failures=2))
+        rows = [(datetime(2025, 6, 30, 10, i), 'M1', 80.0, 100, 0) for i in range(3)]
+        assert writer.submit(rows)
+        writer.start()
+        writer.stop()
+
+        db = DatabaseManager(backend)
+        db.cursor.execute("SELECT COUNT(*) FROM machine_readings")
+        assert db.cursor.fetchone()[0] == 3
+        db.cursor.execute("SELECT COUNT(*) FROM anomalies")
+        assert db.cursor.fetchone()[0] == 3
+        db.cursor.execute("SELECT SUM(reading_count), SUM(anomaly_count) FROM machine_rollup_hour")
+        assert db.cursor.fetchone() == (3, 3)
+        db.close()
+
+
+if __name__ == '__main__':
+    test_json_and_ndjson_batches_parse_to_rows()
+    test_invalid_rows_reject_the_batch()
+    test_full_queue_rejects_and_writer_drains_batches()
+    test_rejected_batches_are_retried_and_still_count_as_queued()
+    test_failed_detection_is_retried_without_rewriting_readings()
+    print("✅ All ingest tests passed")
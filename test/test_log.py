@@ -0,0 +1,49 @@
+import sys
+import os
+import logging
+
+# Correct path resolution for imports
+backend_src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if backend_src_path not in sys.path:
+    sys.path.insert(0, backend_src_path)
+
+from log import RepeatFilter, RunSummary
+
+
+def make_record(message, *args):
+    return logging.LogRecord('intellifactory.test', logging.ERROR, __file__, 1, message, args, None)
+
+
+def test_repeated_messages_are_suppressed_and_counted():
+    repeats = RepeatFilter(interval=60)
+    assert repeats.filter(make_record('❌ Error executing %s: %s', 'get_anomalies', 'timeout'))
+    assert not repeats.filter(make_record('❌ Error executing %s: %s', 'get_anomalies', 'timeout'))
+    assert not repeats.filter(make_record('❌ Error executing %s: %s', 'get_anomalies', 'timeout'))
+    assert repeats.filter(make_record('❌ Error executing %s: %s', 'get_machines', 'timeout'))
+
+    repeats.interval = 0
+    record = make_record('❌ Error executing %s: %s', 'get_anomalies', 'timeout')
+    assert repeats.filter(record)
+    assert record.getMessage().endswith('(repeated 2 more times)')
+
+
+def test_run_summary_logs_one_line():
+    records = []
+    logger = logging.getLogger('test_run_summary')
+    logger.addHandler(type('ListHandler', (logging.Handler,), {'emit': lambda self, r: records.append(r)})())
+    logger.setLevel(logging.INFO)
+
+    summary = RunSummary(logger, 'Detection')
+    summary.add(rows=100000, anomalies=12)
+    summary.add(rows=50000, anomalies=3)
+    summary.log()
+
+    assert len(records) == 1
+    assert 'Detection: rows=150000 anomalies=15' in records[0].getMessage()
+    assert records[0].fields['rows'] == 150000
+
+
+if __name__ == '__main__':
+    test_repeated_messages_are_suppressed_and_counted()
+    test_run_summary_logs_one_line()
+    print("✅ All logging tests passed")
@@ -0,0 +1,143 @@
+import sys
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# Correct path resolution for imports
+backend_src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if backend_src_path not in sys.path:
+    sys.path.insert(0, backend_src_path)
+
+from database import DatabaseManager
+from storage import SQLiteBackend
+from main import run_anomaly_detection
+from parallel import run_parallel_detection
+
+T0 = datetime(2025, 6, 30, 10, 0)
+
+REGISTRY_QUERY = '''
+    SELECT machine_id, status, first_seen, last_seen, last_reading_at,
+           last_temperature, last_units_produced, last_error_flag
+    FROM machines ORDER BY machine_id
+'''
+
+
+def test_ingest_keeps_one_registry_row_per_machine():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(SQLiteBackend(os.path.join(tmp, 'test.db')))
+        db.insert_readings_bulk([
+            (T0 + timedelta(minutes=2), 'M1', 72.0, 90, 0),
+            (T0, 'M1', 70.0, 100, 0),
+            (T0, 'M2', 65.0, 80, 1),
+        ])
+        db.cursor.execute(REGISTRY_QUERY)
+        first = db.cursor.fetchall()
+        assert [row[0] for row in first] == ['M1', 'M2']
+        assert first[0][1] == 'online'
+        assert first[0][4:] == (T0 + timedelta(minutes=2), 72.0, 90, 0)
+        assert first[1][4:] == (T0, 65.0, 80, 1)
+
+        db.insert_machine_reading(T0 + timedelta(minutes=5), 'M1', 75.0, 95, False)
+        db.cursor.execute(REGISTRY_QUERY)
+        m1 = db.cursor.fetchone()
+        assert m1[2] == first[0][2]  # first_seen is kept
+        assert m1[3] >= first[0][3]
+        assert m1[4:] == (T0 + timedelta(minutes=5), 75.0, 95, 0)
+        assert [machine['machine_id'] for machine in db.get_machines()] == ['M1', 'M2']
+        db.close()
+
+
+def test_older_readings_and_manual_statuses_are_kept():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(SQLiteBackend(os.path.join(tmp, 'test.db')))
+        db.insert_readings_bulk([(T0, 'M1', 70.0, 100, 0), (T0, 'M2', 60.0, 100, 0)])
+        db.cursor.execute("UPDATE machines SET status = 'maintenance' WHERE machine_id = 'M1'")
+        db.cursor.execute("UPDATE machines SET status = 'offline' WHERE machine_id = 'M2'")
+        db.connection.commit()
+
+        # A late reading from before the newest one
+        db.insert_readings_bulk([(T0 - timedelta(minutes=5), 'M1', 90.0, 5, 1), (T0, 'M2', 61.0, 100, 0)])
+        db.cursor.execute(REGISTRY_QUERY)
+        m1, m2 = db.cursor.fetchall()
+        assert m1[1] == 'maintenance' and m1[4:] == (T0, 70.0, 100, 0)
+        assert m2[1] == 'online' and m2[4:] == (T0, 61.0, 100, 0)
+        db.close()
+
+
+def test_stale_machines_are_those_past_the_heartbeat_timeout():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(SQLiteBackend(os.path.join(tmp, 'test.db')))
+        db.insert_readings_bulk([(T0, 'M1', 70.0, 100, 0), (T0, 'M2', 70.0, 100, 0)])
+        db.cursor.execute("UPDATE machines SET last_seen = %s WHERE machine_id = 'M2'",
+                          (datetime.now() - timedelta(minutes=10),))
+        db.connection.commit()
+
+        assert [machine['machine_id'] for machine in db.get_stale_machines(timeout=300)] == ['M2']
+        assert db.get_stale_machines(timeout=3600) == []
+        db.close()
+
+
+def test_detection_runs_over_files_register_their_machines():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(SQLiteBackend(os.path.join(tmp, 'test.db')))
+        assert db.register_machines(pd.DataFrame({
+            'timestamp': ['2025-06-30 10:02:00', '2025-06-30 10:00:00', 'never', '2025-06-30 10:00:00'],
+            'machine_id': ['M1', 'M1', 'M2', None],
+            'temperature': [72.0, 70.0, 60.0, 50.0],
+        }))
+        db.cursor.execute(REGISTRY_QUERY)
+        assert [row[0] for row in db.cursor.fetchall()] == ['M1']
+        db.cursor.execute(REGISTRY_QUERY)
+        assert db.cursor.fetchone()[4:] == (T0 + timedelta(minutes=2), 72.0, None, 0)
+        db.close()
+
+        paths = [os.path.join(tmp, name) for name in ('serial.csv', 'parallel.csv')]
+        for path, machines in zip(paths, (('M3', 'M4'), ('M5', 'M6', 'M7'))):
+            with open(path, 'w') as f:
+                f.write('timestamp,machine_id,temperature,units_produced,error_flag\n')
+                f.writelines(f'2025-06-30 10:00:00,{machine_id},70.0,100,0\n' for machine_id in machines)
+        os.environ.update(STORAGE_BACKEND='sqlite', SQLITE_PATH=os.path.join(tmp, 'test.db'))
+        try:
+            run_anomaly_detection(paths[0])
+            run_parallel_detection(paths[1], workers=2)
+            db = DatabaseManager()
+            assert [machine['machine_id'] for machine in db.get_machines()] == ['M1', 'M3', 'M4', 'M5', 'M6', 'M7']
+            db.close()
+        finally:
+            del os.environ['STORAGE_BACKEND'], os.environ['SQLITE_PATH']
+
+
+def test_migration_registers_machines_from_existing_readings():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'test.db')
+        db = DatabaseManager(SQLiteBackend(path))
+        db.close()
+        # Readings written before the registry existed
+        connection = sqlite3.connect(path)
+        connection.executescript('''
+            INSERT INTO machine_readings (timestamp, machine_id, temperature) VALUES
+                ('2025-06-30 10:00:00', 'M1', 70), ('2025-06-30 11:00:00', 'M1', 71),
+                ('2025-06-30 10:30:00', 'M2', 60);
+            DELETE FROM schema_migrations WHERE version = 4;
+        ''')
+        connection.close()
+
+        db = DatabaseManager(SQLiteBackend(path))
+        db.cursor.execute("SELECT machine_id, first_seen, last_reading_at FROM machines ORDER BY machine_id")
+        assert db.cursor.fetchall() == [
+            ('M1', T0, T0 + timedelta(hours=1)),
+            ('M2', T0 + timedelta(minutes=30), T0 + timedelta(minutes=30)),
+        ]
+        db.close()
+
+
+if __name__ == '__main__':
+    test_ingest_keeps_one_registry_row_per_machine()
+    test_older_readings_and_manual_statuses_are_kept()
+    test_stale_machines_are_those_past_the_heartbeat_timeout()
+    test_detection_runs_over_files_register_their_machines()
+    test_migration_registers_machines_from_existing_readings()
+    print("✅ All machine registry tests passed")
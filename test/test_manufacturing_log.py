@@ -0,0 +1,45 @@
+import sys
+import os
+
+# Correct path resolution for imports
+data_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+if data_path not in sys.path:
+    sys.path.insert(0, data_path)
+
+from manufacturing_log import COLUMNS, generate_readings, total_rows
+
+
+def test_same_seed_gives_same_data():
+    first = generate_readings(machines=3, hours=2, interval_seconds=60, seed=7)
+    second = generate_readings(machines=3, hours=2, interval_seconds=60, seed=7)
+    other = generate_readings(machines=3, hours=2, interval_seconds=60, seed=8)
+
+    assert first.equals(second)
+    assert not first.equals(other)
+
+
+def test_shape_follows_machines_duration_and_interval():
+    df = generate_readings(machines=4, hours=1, interval_seconds=300, anomaly_rate=0)
+
+    assert list(df.columns) == COLUMNS
+    assert len(df) == total_rows(4, 1, 300) == 48
+    assert sorted(df['machine_id'].unique()) == ['M1', 'M2', 'M3', 'M4']
+    assert df['timestamp'].is_monotonic_increasing
+
+
+def test_anomaly_rate_controls_injection():
+    clean = generate_readings(machines=10, hours=10, interval_seconds=60, anomaly_rate=0)
+    noisy = generate_readings(machines=10, hours=10, interval_seconds=60, anomaly_rate=0.1)
+
+    assert (clean['temperature'] <= 75).all() and (clean['units_produced'] >= 50).all()
+    assert clean['error_flag'].sum() == 0
+    injected = ((noisy['temperature'] > 75) | (noisy['units_produced'] < 50)
+                | (noisy['error_flag'] == 1) | noisy['units_produced'].isna())
+    assert 0.08 < injected.mean() < 0.12
+
+
+if __name__ == '__main__':
+    test_same_seed_gives_same_data()
+    test_shape_follows_machines_duration_and_interval()
+    test_anomaly_rate_controls_injection()
+    print("✅ All generator tests passed")
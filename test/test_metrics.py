@@ -0,0 +1,51 @@
+import sys
+import os
+
+# Correct path resolution for imports
+backend_src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if backend_src_path not in sys.path:
+    sys.path.insert(0, backend_src_path)
+
+from metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_counter_and_gauge_render_prometheus_text():
+    registry = Registry()
+    requests = registry.register(Counter('requests_total', 'Requests.', ['route']))
+    clients = registry.register(Gauge('clients', 'Clients.', function=lambda: 3))
+    requests.inc(route='/api/logs')
+    requests.inc(2, route='/api/logs')
+
+    text = registry.render()
+    assert '# TYPE requests_total counter' in text
+    assert 'requests_total{route="/api/logs"} 3' in text
+    assert 'clients 3' in text
+    assert registry.register(Counter('requests_total', 'Again.')) is requests
+
+
+def test_histogram_buckets_are_cumulative():
+    latency = Histogram('query_seconds', 'Query time.', ['query'], buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.5):
+        latency.observe(value, query='get_anomalies')
+
+    lines = latency.render()
+    assert 'query_seconds_bucket{query="get_anomalies",le="0.01"} 1' in lines
+    assert 'query_seconds_bucket{query="get_anomalies",le="0.1"} 2' in lines
+    assert 'query_seconds_bucket{query="get_anomalies",le="+Inf"} 3' in lines
+    assert 'query_seconds_count{query="get_anomalies"} 3' in lines
+
+
+def test_wrong_labels_are_rejected():
+    latency = Histogram('query_seconds', 'Query time.', ['query'])
+    try:
+        latency.observe(0.1, route='/api/logs')
+    except ValueError:
+        return
+    assert False, "expected ValueError for unknown label"
+
+
+if __name__ == '__main__':
+    test_counter_and_gauge_render_prometheus_text()
+    test_histogram_buckets_are_cumulative()
+    test_wrong_labels_are_rejected()
+    print("✅ All metrics tests passed")
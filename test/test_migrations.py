@@ -0,0 +1,118 @@
+import sys
+import os
+import sqlite3
+import tempfile
+
+# Correct path resolution for imports
+backend_src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if backend_src_path not in sys.path:
+    sys.path.insert(0, backend_src_path)
+
+from database import DatabaseManager
+from storage import SQLiteBackend
+from migrations import MIGRATIONS
+from query_plans import check_query_plans
+
+# The schema as databases created before migrations existed have it
+OLD_SCHEMA = '''
+    CREATE TABLE anomalies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME NOT NULL,
+        machine_id VARCHAR(50) NOT NULL,
+        anomaly_type VARCHAR(100) NOT NULL,
+        value DECIMAL(10,2),
+        message TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX idx_anomalies_machine_id ON anomalies (machine_id);
+    CREATE INDEX idx_anomalies_type ON anomalies (anomaly_type);
+    CREATE TABLE machine_readings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME NOT NULL,
+        machine_id VARCHAR(50) NOT NULL,
+        temperature DECIMAL(5,2),
+        units_produced INT,
+        error_flag BOOLEAN DEFAULT FALSE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX idx_readings_timestamp ON machine_readings (timestamp);
+    CREATE INDEX idx_readings_machine_id ON machine_readings (machine_id);
+    CREATE TABLE machines (
+        machine_id VARCHAR(50) PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        location VARCHAR(100),
+        status VARCHAR(20) DEFAULT 'online',
+        last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    INSERT INTO anomalies (timestamp, machine_id, anomaly_type, value, message) VALUES
+        ('2025-06-30 10:00:00', 'M1', 'low_production', 45, 'old run'),
+        ('2025-06-30 10:00:00', 'M1', 'low_production', 45, 'new run'),
+        ('2025-06-30 11:00:00', 'M1', 'high_temperature', 80, 'only run');
+    CREATE TABLE machine_rollup_hour (
+        machine_id VARCHAR(50) NOT NULL,
+        bucket DATETIME NOT NULL,
+        reading_count INT NOT NULL DEFAULT 0,
+        temperature_count INT NOT NULL DEFAULT 0,
+        temperature_min DECIMAL(5,2),
+        temperature_max DECIMAL(5,2),
+        temperature_sum DOUBLE NOT NULL DEFAULT 0,
+        units_produced_sum BIGINT NOT NULL DEFAULT 0,
+        error_count INT NOT NULL DEFAULT 0,
+        anomaly_count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (machine_id, bucket)
+    );
+    INSERT INTO machine_rollup_hour (machine_id, bucket, reading_count) VALUES ('M1', '2025-06-30 10:00:00', 3);
+'''
+
+
+def test_old_database_is_migrated_in_place():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'old.db')
+        connection = sqlite3.connect(path)
+        connection.executescript(OLD_SCHEMA)
+        connection.close()
+
+        db = DatabaseManager(SQLiteBackend(path))
+        db.cursor.execute("SELECT version FROM schema_migrations ORDER BY version")
+        assert [row[0] for row in db.cursor.fetchall()] == [version for version, _, _ in MIGRATIONS]
+
+        db.cursor.execute("SELECT message FROM anomalies ORDER BY timestamp")
+        assert [row[0] for row in db.cursor.fetchall()] == ['new run', 'only run']
+        assert db.backend.column_exists(db.cursor, 'machines', 'thresholds')
+        assert db.backend.index_exists(db.cursor, 'anomalies', 'uq_anomaly')
+        assert not db.backend.index_exists(db.cursor, 'machine_readings', 'idx_readings_machine_id')
+        db.cursor.execute("SELECT machine_id, reading_count, source FROM machine_rollup_hour")
+        assert db.cursor.fetchall() == [('M1', 3, '')]
+        assert db.backend.index_exists(db.cursor, 'machine_rollup_hour', 'idx_machine_rollup_hour_bucket')
+        assert check_query_plans(db.cursor, db.backend) == []
+        db.close()
+
+        # Reconnecting finds nothing left to apply
+        db = DatabaseManager(SQLiteBackend(path))
+        db.cursor.execute("SELECT COUNT(*) FROM schema_migrations")
+        assert db.cursor.fetchone()[0] == len(MIGRATIONS)
+        db.close()
+
+
+def test_query_plan_check_reports_full_scans():
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteBackend(os.path.join(tmp, 'test.db'))
+        db = DatabaseManager(backend)
+        assert check_query_plans(db.cursor, backend) == []
+        db.cursor.execute("DROP INDEX idx_readings_machine_time")
+        db.cursor.execute("DROP INDEX idx_readings_time")
+        db.close()
+
+        # A plain connection, since DatabaseManager would recreate the indexes
+        connection = backend.connect()
+        problems = dict(check_query_plans(connection.cursor(), backend))
+        connection.close()
+        assert problems['machine_readings_recent'] == ['machine_readings']
+        assert problems['readings_page_by_machine'] == ['machine_readings']
+
+
+if __name__ == '__main__':
+    test_old_database_is_migrated_in_place()
+    test_query_plan_check_reports_full_scans()
+    print("✅ All migration tests passed")
@@ -0,0 +1,97 @@
+import sys
+import os
+import logging
+import tempfile
+
+# Correct path resolution for imports
+backend_src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if backend_src_path not in sys.path:
+    sys.path.insert(0, backend_src_path)
+
+from database import DatabaseManager
+from parallel import partition_csv, run_parallel_detection
+
+HEADER = 'timestamp,machine_id,temperature,units_produced,error_flag\n'
+ROWS = [f'2025-06-30 10:{minute:02d}:00,M{minute % 4},{70 + minute % 5}.0,{40 + minute},0\n' for minute in range(40)]
+
+ROLLUP_TOTALS = "SELECT COUNT(*), SUM(reading_count), SUM(units_produced_sum) FROM machine_rollup_minute"
+
+
+def write_csv(tmp, rows):
+    path = os.path.join(tmp, 'readings.csv')
+    with open(path, 'w') as f:
+        f.write(HEADER + ''.join(rows))
+    return path
+
+
+def rollup_totals():
+    db = DatabaseManager()
+    db.cursor.execute(ROLLUP_TOTALS)
+    totals = db.cursor.fetchone()
+    db.close()
+    return totals
+
+
+def test_rollups_and_watermark_commit_once_every_shard_succeeds():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_csv(tmp, ROWS)
+        os.environ.update(STORAGE_BACKEND='sqlite', SQLITE_PATH=os.path.join(tmp, 'test.db'))
+        try:
+            assert run_parallel_detection(path, workers=2, chunk_rows=7)['errors'] == []
+            expected = (40, 40, sum(40 + minute for minute in range(40)))
+            assert rollup_totals() == expected
+
+            # Re-running a full detection replaces the file's rollups instead of adding to them
+            assert run_parallel_detection(path, workers=2, chunk_rows=7, full=True)['errors'] == []
+            assert rollup_totals() == expected
+        finally:
+            del os.environ['STORAGE_BACKEND'], os.environ['SQLITE_PATH']
+
+
+def test_a_failed_shard_leaves_no_rollups_or_watermark():
+    insert = DatabaseManager.insert_anomalies_bulk
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_csv(tmp, ROWS)
+        os.environ.update(STORAGE_BACKEND='sqlite', SQLITE_PATH=os.path.join(tmp, 'test.db'))
+        # Worker processes are forked, so they inherit the failing insert
+        DatabaseManager.insert_anomalies_bulk = lambda self, anomalies: 0
+        try:
+            merged = run_parallel_detection(path, workers=2, chunk_rows=7)
+            assert merged['errors']
+        finally:
+            DatabaseManager.insert_anomalies_bulk = insert
+        try:
+            assert rollup_totals() == (0, None, None)
+            db = DatabaseManager()
+            assert db.get_watermark(os.path.abspath(path)) is None
+            db.close()
+
+            # The retry counts every row exactly once
+            assert run_parallel_detection(path, workers=2, chunk_rows=7)['errors'] == []
+            assert rollup_totals()[1] == 40
+        finally:
+            del os.environ['STORAGE_BACKEND'], os.environ['SQLITE_PATH']
+
+
+def test_rows_without_a_machine_id_are_logged():
+    records = []
+    logger = logging.getLogger('intellifactory.parallel')
+    handler = type('ListHandler', (logging.Handler,), {'emit': lambda self, r: records.append(r)})()
+    logger.addHandler(handler)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_csv(tmp, ROWS[:3] + ['2025-06-30 11:00:00,,70.0,40,0\n'])
+            shard_paths, _, rows, _ = partition_csv(path, tmp, 2)
+            sharded = sum(len(open(shard_path).readlines()) - 1 for shard_path in shard_paths)
+    finally:
+        logger.removeHandler(handler)
+
+    assert rows == 4 and sharded == 3
+    assert [record.getMessage() for record in records] == [f"⚠️ Skipped 1 rows of {path} without a machine_id"]
+
+
+if __name__ == '__main__':
+    test_rollups_and_watermark_commit_once_every_shard_succeeds()
+    test_a_failed_shard_leaves_no_rollups_or_watermark()
+    test_rows_without_a_machine_id_are_logged()
+    print("✅ All parallel detection tests passed")
@@ -0,0 +1,95 @@
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime
+
+# Correct path resolution for imports
+test_dir = os.path.dirname(__file__)
+for path in (os.path.join(test_dir, '..', 'src'), os.path.join(test_dir, '..', 'backend')):
+    path = os.path.abspath(path)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from database import DatabaseManager
+from storage import SQLiteBackend
+from dbHelper import DBHelper
+from queryCache import QueryCache, tables_read_by, tables_written_by
+
+
+def test_entries_expire_after_their_ttl():
+    cache = QueryCache()
+    cache.set('short', 1, 0.05, {'anomalies'})
+    cache.set('long', 2, 60, {'anomalies'})
+    assert cache.get('short') == (True, 1)
+
+    time.sleep(0.06)
+    assert cache.get('short') == (False, None)
+    assert cache.get('long') == (True, 2)
+    assert cache.stats()['size'] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(maxsize=2)
+    cache.set('a', 1, 60, ())
+    cache.set('b', 2, 60, ())
+    cache.get('a')  # 'b' is now the least recently used
+    cache.set('c', 3, 60, ())
+
+    assert cache.get('b') == (False, None)
+    assert cache.get('a') == (True, 1) and cache.get('c') == (True, 3)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_invalidation_drops_only_readers_of_the_written_tables():
+    cache = QueryCache()
+    cache.set('anomalies', 1, 60, tables_read_by("SELECT * FROM anomalies"))
+    cache.set('joined', 2, 60, tables_read_by("SELECT * FROM machines m JOIN `Machine_Readings` r ON 1"))
+    cache.set('rollups', 3, 60, tables_read_by("SELECT * FROM machine_rollup_hour"))
+
+    cache.invalidate(tables_written_by("INSERT INTO machine_readings (machine_id) VALUES (%s)"))
+    assert [cache.get(key)[0] for key in ('anomalies', 'joined', 'rollups')] == [True, False, True]
+
+    cache.invalidate()
+    assert cache.stats()['size'] == 0
+
+
+def test_results_read_before_a_write_are_not_cached():
+    cache = QueryCache()
+    generation = cache.generation()
+    cache.invalidate({'anomalies'})  # a write lands while the query is running
+    cache.set('stale', 1, 60, {'anomalies'}, generation)
+    cache.set('unrelated', 2, 60, {'machines'}, generation)
+    assert cache.get('stale') == (False, None) and cache.get('unrelated') == (True, 2)
+
+    generation = cache.generation()
+    cache.invalidate()
+    cache.set('cleared', 3, 60, {'machines'}, generation)
+    assert cache.get('cleared') == (False, None)
+    assert cache.stats()['stale_skips'] == 2
+
+    cache.set('fresh', 4, 60, {'anomalies'}, cache.generation())
+    assert cache.get('fresh') == (True, 4)
+
+
+def test_writes_through_the_helper_expire_cached_reads():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'test.db')
+        DatabaseManager(SQLiteBackend(path)).close()
+        helper = DBHelper(backend=SQLiteBackend(path))
+
+        assert helper.get_anomalies(limit=5) == []
+        assert helper.get_anomalies(limit=5) == []
+        assert helper.cache_stats()['hits'] == 1
+
+        helper.insert_anomaly(datetime(2025, 6, 30, 10, 0), 'M1', 'high_temperature', 90.0, 'hot')
+        assert [row['machine_id'] for row in helper.get_anomalies(limit=5)] == ['M1']
+
+
+if __name__ == '__main__':
+    test_entries_expire_after_their_ttl()
+    test_least_recently_used_entry_is_evicted()
+    test_invalidation_drops_only_readers_of_the_written_tables()
+    test_results_read_before_a_write_are_not_cached()
+    test_writes_through_the_helper_expire_cached_reads()
+    print("✅ All query cache tests passed")
@@ -0,0 +1,79 @@
+import sys
+import os
+import tempfile
+
+import pandas as pd
+
+# Correct path resolution for imports
+test_dir = os.path.dirname(__file__)
+for path in (os.path.join(test_dir, '..', 'src'), os.path.join(test_dir, '..', 'backend')):
+    path = os.path.abspath(path)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from database import DatabaseManager
+from storage import SQLiteBackend
+from dbHelper import DBHelper
+from rollups import aggregate_rollups, merge_rollups
+
+READINGS = pd.DataFrame({
+    'timestamp': ['2025-06-30 10:00:10', '2025-06-30 10:00:50', '2025-06-30 10:01:05',
+                  '2025-06-30 11:30:00', 'not a time', '2025-06-30 10:00:30'],
+    'machine_id': ['M1', 'M1', 'M1', 'M1', 'M1', 'M2'],
+    'temperature': [70.0, None, 80.0, 60.0, 99.0, 75.0],
+    'units_produced': [10, 20, 30, 40, 50, 5],
+    'error_flag': [0, 1, 0, 1, 1, 0],
+})
+ANOMALIES = pd.DataFrame({
+    'timestamp': ['2025-06-30 10:00:50', '2025-06-30 10:01:05', '2025-06-30 10:01:05'],
+    'machine_id': ['M1', 'M1', 'M1'],
+})
+
+
+def by_key(rollup):
+    return {(row['machine_id'], row['bucket']): row for row in rollup.to_dict('records')}
+
+
+def test_readings_fold_into_per_machine_buckets():
+    hours = by_key(aggregate_rollups(READINGS, ANOMALIES, 'h'))
+    assert sorted(hours) == [('M1', pd.Timestamp('2025-06-30 10:00')), ('M1', pd.Timestamp('2025-06-30 11:00')),
+                             ('M2', pd.Timestamp('2025-06-30 10:00'))]
+
+    # The unparseable timestamp is ignored; the missing temperature is counted as a reading only
+    m1 = hours[('M1', pd.Timestamp('2025-06-30 10:00'))]
+    assert (m1['reading_count'], m1['temperature_count']) == (3, 2)
+    assert (m1['temperature_min'], m1['temperature_max'], m1['temperature_sum']) == (70.0, 80.0, 150.0)
+    assert (m1['units_produced_sum'], m1['error_count'], m1['anomaly_count']) == (60, 1, 3)
+
+    minutes = by_key(aggregate_rollups(READINGS, ANOMALIES, 'min'))
+    assert minutes[('M1', pd.Timestamp('2025-06-30 10:01'))]['anomaly_count'] == 2
+    assert aggregate_rollups(READINGS.iloc[:0], None, 'h').empty
+
+
+def test_merged_batches_match_one_aggregate():
+    whole = by_key(aggregate_rollups(READINGS, ANOMALIES, 'h'))
+    merged = by_key(merge_rollups([aggregate_rollups(READINGS.iloc[:2], ANOMALIES.iloc[:1], 'h'),
+                                   aggregate_rollups(READINGS.iloc[2:], ANOMALIES.iloc[1:], 'h'),
+                                   aggregate_rollups(READINGS.iloc[:0], None, 'h')]))
+    assert merged == whole
+
+
+def test_dashboard_sums_rollups_across_sources():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'test.db')
+        db = DatabaseManager(SQLiteBackend(path))
+        assert db.update_rollups(READINGS.iloc[:2], ANOMALIES.iloc[:1], source='a.csv')
+        assert db.update_rollups(READINGS.iloc[2:], ANOMALIES.iloc[1:], source='api')
+        db.close()
+
+        rows = DBHelper(backend=SQLiteBackend(path)).get_dashboard_rollups(hours=24)
+        m1 = [row for row in rows if row['machine_id'] == 'M1']
+        assert [row['reading_count'] for row in m1] == [3, 1]
+        assert m1[0]['units_produced_sum'] == 60 and m1[0]['anomaly_count'] == 3
+
+
+if __name__ == '__main__':
+    test_readings_fold_into_per_machine_buckets()
+    test_merged_batches_match_one_aggregate()
+    test_dashboard_sums_rollups_across_sources()
+    print("✅ All rollup tests passed")
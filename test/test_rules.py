@@ -0,0 +1,90 @@
+import sys
+import os
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Correct path resolution for imports
+backend_src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if backend_src_path not in sys.path:
+    sys.path.insert(0, backend_src_path)
+
+from rules import Rule, RuleSet, load_rules, with_machine_thresholds
+
+RULES_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'anomaly_rules.json'))
+
+
+def make_readings():
+    return pd.DataFrame({
+        'machine_id': ['M001', 'M002', 'M003', 'M004'],
+        'timestamp': ['2025-03-07 09:00:00'] * 4,
+        'temperature': [78.0, 72.0, 60.0, 76.0],
+        'units_produced': [100, 100, 45, 100],
+        'error_flag': [0, 0, 0, 1],
+    })
+
+
+def test_default_rules_match_fixed_thresholds():
+    anomalies = RuleSet().evaluate(make_readings())
+
+    assert list(anomalies['anomaly_type']) == ['high_temperature', 'low_production',
+                                               'high_temperature', 'error_flag_raised']
+    assert anomalies['description'][0] == 'Temperature (78.0) above 75 degrees.'
+    assert anomalies['description'][1] == 'Units produced (45) below threshold (50).'
+
+
+def test_per_machine_overrides_from_config():
+    anomalies = RuleSet(load_rules(RULES_PATH)).evaluate(make_readings())
+    hits = set(zip(anomalies['machine_id'], anomalies['anomaly_type']))
+
+    # M001 is allowed up to 80, M002 only up to 70, M003 down to 40 units
+    assert ('M001', 'high_temperature') not in hits
+    assert ('M002', 'high_temperature') in hits
+    assert ('M003', 'low_production') not in hits
+    assert ('M004', 'high_temperature') in hits
+    assert 'above 70 degrees' in anomalies[anomalies['machine_id'] == 'M002']['description'].iloc[0]
+
+
+def test_machine_table_thresholds_win():
+    rules = [Rule('hot', 'temperature', '>', 75, overrides={'M004': 70})]
+    rules = with_machine_thresholds(rules, {'M004': {'hot': 80}, 'M002': {'hot': 71}})
+    anomalies = RuleSet(rules).evaluate(make_readings())
+
+    assert list(anomalies['machine_id']) == ['M001', 'M002']
+
+
+def test_malformed_machine_thresholds_are_skipped():
+    records = []
+    logger = logging.getLogger('intellifactory.rules')
+    handler = type('ListHandler', (logging.Handler,), {'emit': lambda self, r: records.append(r)})()
+    logger.addHandler(handler)
+    try:
+        rules = [Rule('hot', 'temperature', '>', 75)]
+        rules = with_machine_thresholds(rules, {'M001': {'hot': 'very'}, 'M002': {'hot': None},
+                                                'M003': {'hot': '90'}, 'M004': ['hot']})
+    finally:
+        logger.removeHandler(handler)
+
+    assert rules[0].overrides == {'M003': 90.0}
+    warnings = [r.getMessage() for r in records if r.levelno == logging.WARNING]
+    assert len(warnings) == 3
+    assert 'hot threshold for machine M001' in warnings[1] and 'machine M004' in warnings[0]
+
+
+def test_invalid_rows_and_missing_values_are_skipped():
+    df = make_readings()
+    df.loc[0, 'temperature'] = np.nan
+    valid = np.array([True, True, True, False])
+    anomalies = RuleSet([Rule('not_hot', 'temperature', '!=', 75)]).evaluate(df, valid)
+
+    assert list(anomalies['machine_id']) == ['M002', 'M003']
+
+
+if __name__ == '__main__':
+    test_default_rules_match_fixed_thresholds()
+    test_per_machine_overrides_from_config()
+    test_machine_table_thresholds_win()
+    test_malformed_machine_thresholds_are_skipped()
+    test_invalid_rows_and_missing_values_are_skipped()
+    print("✅ All rule engine tests passed")
@@ -0,0 +1,50 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Correct path resolution for imports
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from subscriptions import (ALL, MAX_SUBSCRIBED_MACHINES, group_by_machine, parse_scope, rows_for,
+                           scope_machine_ids)
+
+T0 = datetime(2025, 6, 30, 10, 0)
+LINES = {'M1': 'Assembly', 'M2': 'Assembly', 'M3': 'Packing'}
+
+
+def test_requests_normalise_to_one_scope():
+    assert parse_scope() == parse_scope([]) == parse_scope(' , ') == ALL
+    assert parse_scope('M2, M1,M2') == parse_scope(['M1', 'M2']) == 'machines=M1,M2'
+    assert parse_scope(['M1'], line=' Packing ') == 'line=Packing'
+    try:
+        parse_scope([f'M{i}' for i in range(MAX_SUBSCRIBED_MACHINES + 1)])
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_scopes_resolve_to_machine_ids():
+    assert scope_machine_ids(ALL, LINES) is None
+    assert scope_machine_ids('machines=M1,M9', LINES) == {'M1', 'M9'}
+    assert scope_machine_ids('line=Assembly', LINES) == {'M1', 'M2'}
+    assert scope_machine_ids('line=Welding', LINES) == frozenset()
+
+
+def test_scoped_rows_match_a_plain_filter():
+    readings = [{'id': i, 'timestamp': T0 + timedelta(minutes=i % 4), 'machine_id': f'M{i % 3 + 1}'}
+                for i in range(12)]
+    groups = group_by_machine(readings)
+    sort_key = lambda row: (row['timestamp'], row['id'])
+
+    for machine_ids in ({'M1'}, {'M1', 'M3'}, {'M9'}, {'M1', 'M2', 'M3'}):
+        expected = sorted((row for row in readings if row['machine_id'] in machine_ids), key=sort_key)
+        assert rows_for(groups, machine_ids, sort_key) == expected
+
+
+if __name__ == '__main__':
+    test_requests_normalise_to_one_scope()
+    test_scopes_resolve_to_machine_ids()
+    test_scoped_rows_match_a_plain_filter()
+    print("✅ All subscription tests passed")
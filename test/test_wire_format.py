@@ -0,0 +1,95 @@
+import sys
+import os
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import msgpack
+
+# Correct path resolution for imports
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from chartHelper import process_temperature_data
+import wireFormat
+from wireFormat import (ANOMALY_FIELDS, COLUMNAR, JSON, MSGPACK, READING_FIELDS,
+                        encode_chart, encode_payload, encode_rows, negotiate, to_epoch_ms)
+
+T0 = datetime(2025, 6, 30, 10, 0)
+
+READINGS = [
+    {'id': 1, 'timestamp': T0, 'machine_id': 'M1', 'temperature': Decimal('70.5'), 'units_produced': 10, 'error_flag': 0},
+    {'id': 2, 'timestamp': T0, 'machine_id': 'M2', 'temperature': None, 'units_produced': 12, 'error_flag': 1},
+    {'id': 3, 'timestamp': T0.replace(minute=2), 'machine_id': 'M1', 'temperature': 71.0, 'units_produced': 9,
+     'error_flag': 0},
+]
+
+
+def decode_rows(encoded):
+    """Rebuild row dicts the way the dashboard client does."""
+    columns = encoded['columns']
+    machines = encoded['dicts']['machine_id']
+    return [{field: machines[values[i]] if field == 'machine_id' else values[i] for field, values in columns.items()}
+            for i in range(encoded['count'])]
+
+
+def decode_chart(encoded):
+    """Put the None gaps back into compact Chart.js datasets."""
+    datasets = []
+    for dataset in encoded['datasets']:
+        data = [None] * len(encoded['labels'])
+        for position, value in zip(dataset['index'], dataset['data']):
+            data[position] = value
+        datasets.append({**{k: v for k, v in dataset.items() if k != 'index'}, 'data': data})
+    return {'labels': encoded['labels'], 'datasets': datasets}
+
+
+def test_negotiation_falls_back_without_msgpack():
+    assert negotiate() == JSON and negotiate('columnar') == COLUMNAR
+    assert negotiate('columnar', 'msgpack') == MSGPACK
+    saved, wireFormat.msgpack = wireFormat.msgpack, None
+    try:
+        assert negotiate(None, 'msgpack') == COLUMNAR
+    finally:
+        wireFormat.msgpack = saved
+
+
+def test_rows_and_charts_round_trip():
+    encoded = encode_rows(READINGS, READING_FIELDS)
+    assert encoded['dicts']['machine_id'] == ['M1', 'M2']
+    assert encoded['columns']['machine_id'] == [0, 1, 0]
+    assert decode_rows(encoded) == [
+        {**row, 'timestamp': to_epoch_ms(row['timestamp']),
+         'temperature': None if row['temperature'] is None else float(row['temperature'])}
+        for row in READINGS
+    ]
+    assert to_epoch_ms(datetime(1970, 1, 1, 0, 0, 1, tzinfo=timezone.utc)) == 1000
+
+    chart = process_temperature_data(READINGS)
+    compact = encode_chart(chart)
+    assert sum(len(dataset['data']) for dataset in compact['datasets']) == 2
+    assert decode_chart(compact) == {**chart, 'datasets': [
+        {**dataset, 'data': [None if v is None else float(v) for v in dataset['data']]}
+        for dataset in chart['datasets']]}
+    assert encode_chart(None) is None
+
+
+def test_payload_formats_carry_the_same_rows():
+    payload = {'timestamp': T0, 'seq': 7, 'anomalies': [], 'readings': READINGS, 'machine_count': 2,
+               'temperature_data': process_temperature_data(READINGS), 'production_data': None}
+    assert encode_payload(payload, JSON, lambda p: 'serialized') == 'serialized'
+
+    columnar = encode_payload(payload, COLUMNAR, None)
+    assert columnar['seq'] == 7 and columnar['machine_count'] == 2 and 'anomaly_count' not in columnar
+    assert columnar['anomalies'] == encode_rows([], ANOMALY_FIELDS)
+
+    packed = encode_payload(payload, MSGPACK, None)
+    assert isinstance(packed, bytes)
+    assert msgpack.unpackb(packed, raw=False) == columnar
+
+
+if __name__ == '__main__':
+    test_negotiation_falls_back_without_msgpack()
+    test_rows_and_charts_round_trip()
+    test_payload_formats_carry_the_same_rows()
+    print("✅ All wire format tests passed")